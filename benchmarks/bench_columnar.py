@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# bench_columnar.py - CSVログと列指向ログ（.tacl）の大きさと読み込み速度の比較
+"""合成した1日分のログをCSVと列指向ログで保存し、ファイルの大きさと全件・列指定の読み込みを比べる
+
+    python benchmarks/bench_columnar.py --rows 200000 --batch 50
+
+列指向ログは、保存1回を1ブロックとして書く ColumnarLogWriter（--batch 件ずつ）と、
+csv_to_columnar で変換したもの（4096件ずつ）の2通りを測る。
+「列指定」はプロセスごとの合計時間を求める集計で、start・duration_ms・process_name の列だけを読む。
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracking.activity_log import iter_rows, row_to_record
+from tracking.models.window_info import WindowInfo
+from tracking.storage import columnar
+from tracking.storage.csv_writer import AppendOnlyCsvWriter
+
+DATE = '20261017'
+PROJECTION = ('start', 'duration_ms', 'process_name')
+
+
+def make_records(rows: int):
+    """1日に rows 件の区間（プロセス37種・タイトル2000種、一部は日本語とカンマを含む）"""
+    day = datetime.strptime(DATE, '%Y%m%d').timestamp()
+    step = 86400 / (rows + 100)
+    rnd = random.Random(1)
+    t = day
+    records = []
+    for i in range(rows):
+        app = rnd.randrange(37)
+        duration = step * rnd.uniform(0.2, 1.8)
+        records.append(WindowInfo.create(
+            captured_at=t, ended_at=t + duration * 0.9, process_name=f"app{app}.exe",
+            window_title=f'報告書, "第{rnd.randrange(2000)}版" - Application {app}',
+            process_id=1000 + app, application_name=f"app{app}.exe",
+            application_path=f"C:\\Program Files\\Vendor\\app{app}.exe",
+            working_directory=f"C:\\Users\\user\\Documents\\Project {rnd.randrange(50)}",
+            monitor_type='general'
+        ))
+        t += duration
+    return records
+
+
+def write(writer, records, batch: int) -> str:
+    for start in range(0, len(records), batch):
+        writer.append(DATE, records[start:start + batch])
+    writer.close()
+    return writer.path_for(DATE)
+
+
+def timed(function, repeat: int = 1):
+    """(中央値の秒数, 最後の結果)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return times[len(times) // 2], result
+
+
+def totals_from_csv(path: str):
+    totals = {}
+    for row in iter_rows(path):
+        record = row_to_record(row)
+        if record is not None and record.duration_ms is not None:
+            totals[record.process_name] = totals.get(record.process_name, 0) + record.duration_ms
+    return totals
+
+
+def totals_from_columnar(path: str):
+    totals = {}
+    for block in columnar.iter_column_blocks(path, PROJECTION):
+        for duration_ms, process_name in zip(block['duration_ms'], block['process_name']):
+            if duration_ms is not None:
+                totals[process_name] = totals.get(process_name, 0) + duration_ms
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='1日の行数')
+    parser.add_argument('--batch', type=int, default=50, help='保存1回（1ブロック）の行数')
+    parser.add_argument('--repeat', type=int, default=3, help='読み込みの繰り返し回数')
+    parser.add_argument('--dir', help='作業ディレクトリ（省略時は一時ディレクトリ）')
+    args = parser.parse_args()
+
+    work_dir = args.dir or tempfile.mkdtemp(prefix='bench_columnar_')
+    try:
+        records = make_records(args.rows)
+        csv_path = write(AppendOnlyCsvWriter(work_dir, fsync_policy='never'), records, args.batch)
+        tacl_path = write(columnar.ColumnarLogWriter(work_dir, fsync_policy='never'), records, args.batch)
+        converted_path = os.path.join(work_dir, 'converted' + columnar.FILE_SUFFIX)
+        seconds, _ = timed(lambda: columnar.csv_to_columnar(csv_path, converted_path))
+        print(f"rows: {args.rows}  batch: {args.batch}  (csv_to_columnar took {seconds:.2f}s)")
+
+        csv_size = os.path.getsize(csv_path)
+        print(f"{'format':<28}{'size':>10}{'ratio':>8}{'all rows':>12}{'projection':>12}")
+        csv_all, csv_records = timed(lambda: [row_to_record(row) for row in iter_rows(csv_path)], args.repeat)
+        csv_projection, expected = timed(lambda: totals_from_csv(csv_path), args.repeat)
+        print(f"{'csv':<28}{csv_size / 1e6:8.1f}MB{1:8.2f}{csv_all:11.3f}s{csv_projection:11.3f}s")
+
+        for label, path in ((f"tacl ({args.batch} rows/block)", tacl_path),
+                            ('tacl (csv_to_columnar)', converted_path)):
+            size = os.path.getsize(path)
+            all_seconds, tacl_records = timed(lambda: list(columnar.iter_records(path)), args.repeat)
+            projection_seconds, totals = timed(lambda: totals_from_columnar(path), args.repeat)
+            print(f"{label:<28}{size / 1e6:8.1f}MB{size / csv_size:8.2f}"
+                  f"{all_seconds:11.3f}s{projection_seconds:11.3f}s")
+            if len(tacl_records) != len(csv_records) or totals != expected:
+                print(f"MISMATCH between {label} and the csv log")
+                sys.exit(1)
+    finally:
+        if not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
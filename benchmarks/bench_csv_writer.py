@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# bench_csv_writer.py - 1回の保存にかかる時間とログの大きさ（一時ファイルのコピーと追記）
+"""1日分のログを batch 件ずつ保存し、ファイルが大きくなるにつれて1回の保存の時間がどう変わるかを比べる
+
+    python benchmarks/bench_csv_writer.py --rows 200000 --batch 50
+
+「コピー」は変更前の save_buffer と同じく temp の一時ファイルに追記してから
+shutil.copy2 でログ全体を上書きする。「追記」は AppendOnlyCsvWriter で開いたままの
+ハンドルに追記する（--fsync で fsync の方針を指定）。
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracking.activity_log import write_records
+from tracking.models.window_info import WindowInfo
+from tracking.storage.csv_writer import AppendOnlyCsvWriter
+
+DATE = '20240115'
+CHECKPOINTS = 5
+
+
+def make_batch(start: int, count: int):
+    base = 1_705_276_800.0
+    return [
+        WindowInfo.create(
+            captured_at=base + i, ended_at=base + i + 1, process_name=f"app{i % 37}.exe",
+            window_title=f"ドキュメント {i % 500} - Application", process_id=1000 + i % 37,
+            application_name=f"app{i % 37}.exe", application_path=f"C:\\Apps\\app{i % 37}.exe",
+            working_directory='C:\\Users\\user\\Documents', monitor_type='general'
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def run(save, rows: int, batch: int, path_of):
+    """(経過割合ごとの1回の保存の平均ミリ秒, ログの大きさ, 合計秒数)"""
+    flushes = rows // batch
+    per_checkpoint = max(1, flushes // CHECKPOINTS)
+    points = []
+    elapsed = 0.0
+    total = 0.0
+    for flush in range(flushes):
+        records = make_batch(flush * batch, batch)
+        started = time.perf_counter()
+        save(records)
+        seconds = time.perf_counter() - started
+        elapsed += seconds
+        total += seconds
+        if (flush + 1) % per_checkpoint == 0:
+            points.append((elapsed / per_checkpoint * 1e3, os.path.getsize(path_of())))
+            elapsed = 0.0
+    return points, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='1日の行数')
+    parser.add_argument('--batch', type=int, default=50, help='1回の保存の行数')
+    parser.add_argument('--fsync', default='interval', choices=('always', 'interval', 'never'))
+    parser.add_argument('--dir', help='作業ディレクトリ（省略時は一時ディレクトリ）')
+    args = parser.parse_args()
+
+    work_dir = args.dir or tempfile.mkdtemp(prefix='bench_csv_writer_')
+    copy_dir = os.path.join(work_dir, 'copy')
+    append_dir = os.path.join(work_dir, 'append')
+    os.makedirs(os.path.join(copy_dir, 'temp'), exist_ok=True)
+    os.makedirs(append_dir, exist_ok=True)
+    try:
+        log_path = os.path.join(copy_dir, AppendOnlyCsvWriter.log_filename(DATE))
+        temp_path = os.path.join(copy_dir, 'temp', f"temp_{AppendOnlyCsvWriter.log_filename(DATE)}")
+
+        def copy_save(records):
+            write_records(temp_path, records)
+            shutil.copy2(temp_path, log_path)
+
+        copy_points, copy_total = run(copy_save, args.rows, args.batch, lambda: log_path)
+
+        writer = AppendOnlyCsvWriter(append_dir, fsync_policy=args.fsync)
+        append_points, append_total = run(
+            lambda records: writer.append(DATE, records), args.rows, args.batch, lambda: writer.path_for(DATE)
+        )
+        writer.close()
+
+        print(f"rows: {args.rows}  batch: {args.batch}  flushes: {args.rows // args.batch}  fsync: {args.fsync}")
+        print(f"{'log size':>12}  {'copy ms/flush':>14}  {'append ms/flush':>16}")
+        for (copy_ms, size), (append_ms, _) in zip(copy_points, append_points):
+            print(f"{size / 1e6:10.1f}MB  {copy_ms:14.2f}  {append_ms:16.2f}")
+        print(f"total: copy {copy_total:.1f} s, append {append_total:.1f} s")
+    finally:
+        if not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# bench_explorer_index.py - Explorerのフォルダ取得（全ウィンドウ走査と差分更新の対応表）の比較
+"""多数の模擬Shellウィンドウの間で切り替え、1回の切り替えあたりのCOM呼び出し回数を比べる
+
+    python benchmarks/bench_explorer_index.py --windows 500 --switches 10000
+
+FakeShellWindowSource の属性参照を1回のプロセス間COM呼び出しとして数える。
+「走査」は変更前の _get_explorer_path と同じく Shell.Windows() を列挙して HWND を
+順に比べ、一致したウィンドウの Document.Folder.Self.Path を読む。
+--com-latency-us を指定すると、COM呼び出し1回あたりの時間から所要時間を見積もる。
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracking.utils.explorer_index import ExplorerFolderIndex, FakeShellWindowSource
+
+
+def make_windows(count: int):
+    return [
+        SimpleNamespace(
+            hwnd=0x10000 + i,
+            url=f"file:///C:/Users/user/Projects/project{i}",
+            name=f"project{i}",
+            path=f"C:\\Users\\user\\Projects\\project{i}"
+        )
+        for i in range(count)
+    ]
+
+
+def scan_path(source: FakeShellWindowSource, hwnd: int):
+    """変更前の方法: 全ウィンドウの HWND を比べて一致したもののパスを読む"""
+    for window in source.windows():
+        if source.hwnd(window) == hwnd:
+            return source.folder_path(window)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--windows', type=int, default=500, help='Explorerのウィンドウ・タブの数')
+    parser.add_argument('--switches', type=int, default=10000, help='切り替えの回数')
+    parser.add_argument('--navigations', type=int, default=100, help='切り替えの間に起きるフォルダ移動の回数')
+    parser.add_argument('--com-latency-us', type=float, default=100.0, help='COM呼び出し1回の時間の見積もり（マイクロ秒）')
+    args = parser.parse_args()
+
+    windows = make_windows(args.windows)
+    rnd = random.Random(1)
+    targets = [rnd.choice(windows) for _ in range(args.switches)]
+    navigate_at = set(rnd.sample(range(args.switches), min(args.navigations, args.switches)))
+
+    # 変更前: 切り替えのたびに全ウィンドウを走査する
+    source = FakeShellWindowSource(windows)
+    started = time.perf_counter()
+    for window in targets:
+        assert scan_path(source, window.hwnd) == window.path
+    scan_seconds = time.perf_counter() - started
+    scan_calls = source.calls
+
+    # 変更後: 対応表を参照し、フォルダ移動で古くなった分は差分更新する
+    windows = make_windows(args.windows)
+    targets = [windows[window.hwnd - 0x10000] for window in targets]
+    source = FakeShellWindowSource(windows)
+    index = ExplorerFolderIndex(source=source, refresh_interval=3600)
+    index.refresh()
+    initial_calls = source.calls
+    hit_seconds = 0.0
+    stale_seconds = 0.0
+    for switch, window in enumerate(targets):
+        navigated = switch in navigate_at
+        if navigated:
+            # フォルダを移動した（次の参照ではタイトルが一致せず、差分更新を待つ）
+            window.name = f"folder{switch}"
+            window.url = f"{window.url}/folder{switch}"
+            window.path = f"{window.path}\\folder{switch}"
+        started = time.perf_counter()
+        assert index.resolve(window.hwnd, f"{window.name} - エクスプローラー") == window.path
+        if navigated:
+            stale_seconds += time.perf_counter() - started
+        else:
+            hit_seconds += time.perf_counter() - started
+    index.stop()
+    index_calls = source.calls - initial_calls
+    stats = index.stats()
+    navigations = max(1, len(navigate_at))
+
+    latency = args.com_latency_us / 1e6
+    diff_calls = 1 + 2 * args.windows
+    print(f"windows: {args.windows}  switches: {args.switches}  navigations: {len(navigate_at)}  "
+          f"(COM call estimated at {args.com_latency_us:.0f} us)")
+    print(f"scan:  {scan_calls / args.switches:7.1f} COM calls/switch  "
+          f"{(scan_seconds + scan_calls * latency) / args.switches * 1e3:8.3f} ms/switch")
+    print(f"index hit: 0 COM calls  {hit_seconds / max(1, stats['hits']) * 1e6:.1f} us/switch "
+          f"(hit rate {stats['hit_rate']:.1%})")
+    print(f"index after navigation: waits for one diff ({diff_calls} COM calls + 1 path), "
+          f"{stale_seconds / navigations * 1e3 + diff_calls * latency * 1e3:.3f} ms/switch")
+    print(f"index total: initial build {initial_calls} COM calls, then {index_calls} COM calls over "
+          f"{args.switches} switches ({index_calls / args.switches:.1f}/switch, all on the index thread)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# bench_log_reader.py - 索引付きリーダーと全件走査の時間範囲の読み込み速度の比較
+"""合成したCSVログで、1時間分の読み込みを全件走査と MappedLogReader で比較する
+
+    python benchmarks/bench_log_reader.py --rows 1000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracking.activity_log import iter_rows, row_to_record
+from tracking.models.window_info import WindowInfo
+from tracking.storage.csv_writer import AppendOnlyCsvWriter
+from tracking.storage.log_reader import MappedLogReader, overlaps
+
+
+def generate(logs_dir: str, date: str, rows: int) -> str:
+    """1日に rows 件の区間が並ぶログを作る（タイトルにカンマ・引用符・日本語を含む）"""
+    writer = AppendOnlyCsvWriter(logs_dir, fsync_policy='never')
+    day = datetime.strptime(date, '%Y%m%d').timestamp()
+    step = 86400 / (rows + 100)
+    rnd = random.Random(1)
+    t = day
+    batch = []
+    for i in range(rows):
+        duration = step * rnd.uniform(0.2, 1.8)
+        batch.append(WindowInfo.create(
+            captured_at=t, process_name=f"app{i % 37}.exe", window_title=f'タイトル, "q" {i}',
+            process_id=i % 500, application_name='App', application_path='C:\\app.exe',
+            working_directory='C:\\', monitor_type='general', ended_at=t + duration * 0.9
+        ))
+        t += duration
+        if len(batch) == 10000:
+            writer.append(date, batch)
+            batch = []
+    if batch:
+        writer.append(date, batch)
+    writer.close()
+    return writer.path_for(date)
+
+
+def timed(function, repeat: int = 1):
+    """(中央値の秒数, 最後の結果)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return times[len(times) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows in the synthetic log')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions of the indexed query')
+    parser.add_argument('--dir', help='Directory for the synthetic log (default: a temporary folder)')
+    args = parser.parse_args()
+
+    date = '20261017'
+    logs_dir = args.dir or tempfile.mkdtemp(prefix='bench_log_reader_')
+    path = os.path.join(logs_dir, AppendOnlyCsvWriter.log_filename(date))
+    if not os.path.exists(path):
+        seconds, _ = timed(lambda: generate(logs_dir, date, args.rows))
+        print(f"generated {args.rows} rows in {seconds:.1f}s")
+    print(f"log: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    start = datetime.strptime(f"{date} 14:00", '%Y%m%d %H:%M').timestamp()
+    end = start + 3600
+
+    def full_scan():
+        records = (row_to_record(row) for row in iter_rows(path))
+        return [r for r in records if r is not None and overlaps(r.captured_at, r.ended_at, start, end)]
+
+    seconds, expected = timed(full_scan)
+    print(f"full scan (iter_rows + filter):   {seconds:8.3f}s  {len(expected)} rows")
+
+    if os.path.exists(path + '.idx'):
+        os.remove(path + '.idx')
+    seconds, reader = timed(lambda: MappedLogReader(path))
+    seconds, _ = timed(reader.refresh)
+    print(f"index build (cold):               {seconds:8.3f}s  {reader.stats()['index_entries']} index points")
+    seconds, reader = timed(lambda: MappedLogReader(path), repeat=args.repeat)
+    print(f"index load ({os.path.getsize(path + '.idx') // 1024} KB):                {seconds:8.4f}s")
+
+    seconds, records = timed(lambda: reader.read_range(start, end), repeat=args.repeat)
+    print(f"indexed query (1 hour):           {seconds:8.3f}s  {len(records)} rows")
+    key = [(r.captured_at, r.ended_at, r.window_title) for r in records]
+    if key != [(r.captured_at, r.ended_at, r.window_title) for r in expected]:
+        print("MISMATCH between the indexed query and the full scan")
+        sys.exit(1)
+    seconds, records = timed(lambda: reader.read_range(start, start + 600), repeat=args.repeat)
+    print(f"indexed query (10 minutes):       {seconds:8.3f}s  {len(records)} rows")
+
+
+if __name__ == '__main__':
+    main()
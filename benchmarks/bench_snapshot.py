@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# bench_snapshot.py - 1ティックあたりのOS呼び出し回数（スナップショット共有の前後）
+"""模擬したウィンドウを順に切り替え、モニターの選択と情報抽出にかかるOS呼び出しを数える
+
+    python benchmarks/bench_snapshot.py --ticks 10000
+
+ウィンドウAPIは FakeWindowApi、プロセス情報は事前登録した ProcessInfoCache を使う。
+「共有前」は変更前のアクセスパターン（優先順位の順に各モニターの is_target_window が
+GetWindowThreadProcessId / GetClassName / GetWindowText / psutil の name() を呼び、
+get_active_window_info が GetForegroundWindow / GetWindowText / GetWindowThreadProcessId /
+name() / exe() を呼び直す）で、選ばれたモニターの順位から回数を求める。
+補完（作業ディレクトリなど）は対象外。
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 設定ファイルをユーザーのフォルダに作らない
+os.environ['HOME'] = os.environ['USERPROFILE'] = tempfile.mkdtemp(prefix='bench_snapshot_')
+os.environ.setdefault('WINDIR', 'C:\\Windows')
+
+from tracking.monitors.window_selector import WindowSelector
+from tracking.monitors.snapshot_provider import FakeWindowApi, WindowSnapshotProvider
+from tracking.monitors.core.browser_monitor import BrowserWindowMonitor
+from tracking.monitors.core.explorer_monitor import ExplorerWindowMonitor
+from tracking.monitors.core.general_monitor import GeneralWindowMonitor
+from tracking.monitors.core.pdf_monitor import PDFWindowMonitor
+from tracking.utils.explorer_index import ExplorerFolderIndex, FakeShellWindowSource
+from tracking.utils.process_cache import ProcessInfo, ProcessInfoCache
+
+# 変更前の1回の is_target_window / get_active_window_info のOS呼び出し回数
+LEGACY_CHECK_CALLS = 4
+LEGACY_EXTRACT_CALLS = 5
+
+# (hwnd, pid, クラス名, タイトル, プロセス名)
+WINDOWS = [
+    (101, 1001, 'CabinetWClass', 'Documents - エクスプローラー', 'explorer.exe'),
+    (102, 1002, 'Chrome_WidgetWin_1', 'Example Domain - Google Chrome', 'chrome.exe'),
+    (103, 1003, 'AcrobatSDIWindow', 'report.pdf - Adobe Acrobat Reader', 'AcroRd32.exe'),
+    (104, 1004, 'Notepad', 'memo.txt - メモ帳', 'notepad.exe'),
+]
+
+
+def build_selector():
+    api = FakeWindowApi({hwnd: (pid, class_name, title) for hwnd, pid, class_name, title, _ in WINDOWS})
+    # 一括更新で実在しないPIDが消されないよう、更新は行わない
+    process_cache = ProcessInfoCache(refresh_interval=float('inf'))
+    for _, pid, _, _, name in WINDOWS:
+        process_cache._store(ProcessInfo(pid=pid, create_time=1.0, name=name, exe=f"C:\\Apps\\{name}"))
+    # 初めてのウィンドウでのPID再利用の確認も、実在しないPIDを登録した時刻で通す
+    process_cache._create_time = lambda pid: 1.0
+
+    selector = WindowSelector(snapshot_provider=WindowSnapshotProvider(process_cache, window_api=api))
+    selector.enrichment_paused = True
+    selector.register_monitor('explorer', ExplorerWindowMonitor(
+        folder_index=ExplorerFolderIndex(source=FakeShellWindowSource(), refresh_interval=3600)
+    ))
+    selector.register_monitor('browser', BrowserWindowMonitor())
+    selector.register_monitor('pdf', PDFWindowMonitor())
+    selector.register_monitor('default', GeneralWindowMonitor())
+    return selector, api, process_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=10000, help='切り替えの回数')
+    args = parser.parse_args()
+
+    selector, api, process_cache = build_selector()
+    provider = selector.snapshot_provider
+    keys = {id(monitor): key for key, monitor in selector.monitors.items()}
+    shared_calls = 0
+    legacy_calls = 0
+    elapsed = 0.0
+    chosen = {}
+
+    # モニターが出力する選択結果は表示しない
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        for tick in range(args.ticks):
+            api.foreground = WINDOWS[tick % len(WINDOWS)][0]
+            calls_before = provider.os_call_count + process_cache.syscalls
+            started = time.perf_counter()
+            selector.get_window_info()
+            elapsed += time.perf_counter() - started
+            shared_calls += provider.os_call_count + process_cache.syscalls - calls_before
+
+            # 変更前は優先順位の順に、選ばれたモニターまで is_target_window を呼んでいた
+            key = keys[id(selector.get_appropriate_monitor(provider.capture()))]
+            chosen[key] = chosen.get(key, 0) + 1
+            legacy_calls += (WindowSelector.DEFAULT_PRIORITY.index(key) + 1) * LEGACY_CHECK_CALLS
+            legacy_calls += LEGACY_EXTRACT_CALLS
+
+    print(f"ticks: {args.ticks}  chosen monitors: {chosen}")
+    print(f"shared snapshot: {shared_calls / args.ticks:.1f} OS calls/tick")
+    print(f"per-monitor lookups (before): {legacy_calls / args.ticks:.1f} OS calls/tick")
+    print(f"selection + extraction: {elapsed / args.ticks * 1e6:.1f} us/tick (simulated API)")
+    for monitor in selector.monitors.values():
+        if isinstance(monitor, ExplorerWindowMonitor):
+            monitor.folder_index.stop()
+
+
+if __name__ == '__main__':
+    main()
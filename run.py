@@ -2,20 +2,245 @@
 # run.py - アプリケーションのエントリーポイント
 import os
 import sys
+import time
 import argparse
 from tracking.version import __version__
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Window Activity Tracker')
     parser.add_argument('--version', action='store_true', help='Show version and exit')
+    subparsers = parser.add_subparsers(dest='command')
+
+    sessionize = subparsers.add_parser(
+        'sessionize', help='Convert *_activity_log.csv files to intervals (start/end/duration_ms)'
+    )
+    sessionize.add_argument('files', nargs='+', help='Activity log files to convert')
+    sessionize.add_argument('--output-dir', help='Directory for converted files (default: next to the source)')
+    sessionize.add_argument('--in-place', action='store_true', help='Overwrite the source files')
+
+    migrate = subparsers.add_parser(
+        'migrate-sqlite', help='Import *_activity_log.csv files into the SQLite store'
+    )
+    migrate.add_argument('files', nargs='*', help='Activity log files to import, .csv or .csv.gz (default: all logs in the logs folder)')
+    migrate.add_argument('--db', help='SQLite database file (default: Storage.sqlite_path or logs/activity.db)')
+
+    export = subparsers.add_parser(
+        'export-csv', help='Export one day from the SQLite store as an activity log CSV'
+    )
+    export.add_argument('date', help='Day to export (YYYYMMDD)')
+    export.add_argument('--db', help='SQLite database file (default: Storage.sqlite_path or logs/activity.db)')
+    export.add_argument('--output', help='Output file (default: logs/<date>_activity_log.csv)')
+
+    convert = subparsers.add_parser(
+        'convert-log', help='Convert activity logs between CSV and the columnar format (.tacl)'
+    )
+    convert.add_argument('files', nargs='+', help='Activity log files to convert (.csv or .tacl)')
+    convert.add_argument('--output-dir', help='Directory for converted files (default: next to the source)')
+
+    stats = subparsers.add_parser('stats', help='Show the per-day stats sidecar (record counts by monitor type)')
+    stats.add_argument('date', nargs='?', help='Day to show (YYYYMMDD, default: today)')
+
+    rebuild_stats = subparsers.add_parser(
+        'rebuild-stats', help='Regenerate the per-day stats sidecars from existing logs'
+    )
+    rebuild_stats.add_argument('dates', nargs='*', help='Days to rebuild (YYYYMMDD, default: all days)')
+
+    query = subparsers.add_parser(
+        'range', help='Print the intervals of one day that overlap a time range (indexed for .csv, scanned for .csv.gz)'
+    )
+    query.add_argument('date', help='Day to read (YYYYMMDD)')
+    query.add_argument('start', help='Start of the range (HH:MM or HH:MM:SS)')
+    query.add_argument('end', help='End of the range (HH:MM or HH:MM:SS, exclusive)')
+
+    bulk = subparsers.add_parser(
+        'bulk-convert', help='Detect the encoding and format of every log in a folder and convert or validate them in parallel'
+    )
+    bulk.add_argument('source_dir', nargs='?', help='Folder with *_activity_log.csv(.gz) files (default: the logs folder)')
+    bulk.add_argument('--to', choices=['intervals', 'columnar'], default='intervals',
+                      help='Output format: interval CSV (*_activity_intervals.csv) or columnar (.tacl)')
+    bulk.add_argument('--validate', action='store_true', help='Only check that every row can be read; write nothing')
+    bulk.add_argument('--output-dir', help='Directory for converted files (default: next to the source)')
+    bulk.add_argument('--workers', type=int, default=0, help='Worker processes (default: number of CPUs)')
+    bulk.add_argument('--manifest', help='Progress manifest (default: bulk_convert_manifest.jsonl in the output folder)')
+    bulk.add_argument('--restart', action='store_true', help='Ignore the manifest and process every file again')
     return parser.parse_args()
 
+def run_sessionize(args):
+    from tracking.activity_log import convert_log_file, converted_path
+    for source_path in args.files:
+        output_path = source_path if args.in_place else converted_path(source_path, args.output_dir)
+        try:
+            count = convert_log_file(source_path, output_path)
+            print(f"{source_path} -> {output_path} ({count} intervals)")
+        except Exception as e:
+            print(f"Failed to convert {source_path}: {e}")
+
+def _sqlite_path(args):
+    from tracking.config import Config
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.sqlite_store import default_sqlite_path
+    return getattr(args, 'db', None) or Config().get_value('Storage', 'sqlite_path').strip() or default_sqlite_path(get_logs_dir())
+
+def run_migrate_sqlite(args):
+    import glob
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.sqlite_store import SqliteActivityStore
+    files = args.files or sorted(
+        glob.glob(os.path.join(get_logs_dir(), '*_activity_log.csv')) +
+        glob.glob(os.path.join(get_logs_dir(), '*_activity_log.csv.gz'))
+    )
+    store = SqliteActivityStore(_sqlite_path(args))
+    try:
+        for source_path in files:
+            try:
+                count = store.import_csv(source_path)
+                print(f"{source_path} -> {store.db_path} ({count} intervals)")
+            except Exception as e:
+                print(f"Failed to import {source_path}: {e}")
+    finally:
+        store.close()
+
+def run_export_csv(args):
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.csv_writer import AppendOnlyCsvWriter
+    from tracking.storage.sqlite_store import SqliteActivityStore
+    output_path = args.output or os.path.join(get_logs_dir(), AppendOnlyCsvWriter.log_filename(args.date))
+    store = SqliteActivityStore(_sqlite_path(args))
+    try:
+        count = store.export_csv(args.date, output_path)
+        print(f"{store.db_path} -> {output_path} ({count} intervals)")
+    finally:
+        store.close()
+
+def run_convert_log(args):
+    from tracking.storage.columnar import (
+        is_columnar_log, csv_to_columnar, columnar_to_csv, converted_columnar_path
+    )
+    for source_path in args.files:
+        output_path = converted_columnar_path(source_path, args.output_dir)
+        try:
+            if is_columnar_log(source_path):
+                count = columnar_to_csv(source_path, output_path)
+            else:
+                count = csv_to_columnar(source_path, output_path)
+            print(f"{source_path} -> {output_path} ({count} intervals)")
+        except Exception as e:
+            print(f"Failed to convert {source_path}: {e}")
+
+def run_stats(args):
+    from datetime import datetime
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.daily_stats import load_stats
+    date = args.date or datetime.now().strftime('%Y%m%d')
+    stats = load_stats(get_logs_dir(), date)
+    if stats is None:
+        print(f"No stats for {date} (run 'rebuild-stats {date}' to create them)")
+        return
+    print(f"{date}: {stats['record_count']} intervals")
+    for monitor_type, count in sorted(stats['monitor_types'].items()):
+        duration_minutes = stats['durations_ms'].get(monitor_type, 0) / 60000
+        print(f"  {monitor_type or '(none)'}: {count} intervals, {duration_minutes:.1f} min")
+    if stats['last_record']:
+        last = stats['last_record']
+        print(f"  last: {last['start']} {last['process_name']} {last['window_title']}")
+
+def run_rebuild_stats(args):
+    from tracking.config import Config
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.daily_stats import DailyStatsIndex, rebuild_log_stats
+    logs_dir = get_logs_dir()
+    if Config().get_value('Storage', 'backend').strip().lower() == 'sqlite':
+        from tracking.storage.sqlite_store import SqliteActivityStore
+        store = SqliteActivityStore(_sqlite_path(args))
+        try:
+            index = DailyStatsIndex(logs_dir)
+            results = [index.rebuild(date, store.iter_day(date), None)
+                       for date in (args.dates or store.dates())]
+        finally:
+            store.close()
+    else:
+        results = rebuild_log_stats(logs_dir, args.dates or None)
+    for stats in results:
+        print(f"{stats['date']}: {stats['record_count']} intervals")
+
+def _time_on(date, value):
+    from datetime import datetime
+    fmt = '%Y%m%d %H:%M:%S' if value.count(':') == 2 else '%Y%m%d %H:%M'
+    return datetime.strptime(f"{date} {value}", fmt).timestamp()
+
+def run_range(args):
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.csv_writer import AppendOnlyCsvWriter
+    from tracking.storage.log_reader import read_range
+    path = os.path.join(get_logs_dir(), AppendOnlyCsvWriter.log_filename(args.date))
+    if not os.path.exists(path):
+        # 保守処理で圧縮済みのログ
+        path = f"{path}.gz"
+        if not os.path.exists(path):
+            print(f"No log for {args.date}: {path[:-3]}")
+            return
+    records = read_range(path, _time_on(args.date, args.start), _time_on(args.date, args.end))
+    for record in records:
+        print(f"{record.start} {record.end or '':23} {record.process_name} {record.window_title}")
+    print(f"{len(records)} intervals")
+
+def run_bulk_convert(args):
+    from tracking.utils.paths import get_logs_dir
+    from tracking.storage.bulk_convert import BulkConverter
+    converter = BulkConverter(
+        args.source_dir or get_logs_dir(), target=args.to, output_dir=args.output_dir,
+        validate_only=args.validate, workers=args.workers, manifest_path=args.manifest,
+        resume=not args.restart
+    )
+
+    def report(result):
+        detail = f"{result.get('rows', 0)} rows, {result.get('encoding', '?')}, {result.get('schema', '?')}"
+        if result.get('missing_columns'):
+            detail += f", missing {','.join(result['missing_columns'])}"
+        if result['status'] == 'error':
+            detail = result['error']
+        elif result.get('bad_rows'):
+            detail += f", {result['bad_rows']} unreadable rows"
+        print(f"[{result['status']}] {result['source']} ({detail}, {result['seconds']:.2f}s)"
+              if 'seconds' in result else f"[{result['status']}] {result['source']} ({detail})")
+
+    started = time.perf_counter()
+    converter.run(on_result=report)
+    stats = converter.stats()
+    print(f"{stats['processed']} files processed, {stats['skipped']} already done, {stats['failed']} failed, "
+          f"{stats['rows']} rows with {stats['workers']} workers in {time.perf_counter() - started:.1f}s "
+          f"(manifest: {stats['manifest']})")
+
 def main():
     args = parse_args()
     if args.version:
         print(f"Window Activity Tracker v{__version__}")
         return
-        
+    if args.command == 'sessionize':
+        run_sessionize(args)
+        return
+    if args.command == 'migrate-sqlite':
+        run_migrate_sqlite(args)
+        return
+    if args.command == 'export-csv':
+        run_export_csv(args)
+        return
+    if args.command == 'convert-log':
+        run_convert_log(args)
+        return
+    if args.command == 'stats':
+        run_stats(args)
+        return
+    if args.command == 'rebuild-stats':
+        run_rebuild_stats(args)
+        return
+    if args.command == 'range':
+        run_range(args)
+        return
+    if args.command == 'bulk-convert':
+        run_bulk_convert(args)
+        return
+
     # メインモジュールをインポートして実行
     from tracking import main as app_main
     app_main.main()
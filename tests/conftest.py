@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# リポジトリのルートから tracking パッケージを読み込む
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
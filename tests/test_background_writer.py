@@ -0,0 +1,216 @@
+# test_background_writer.py
+import time
+import threading
+from datetime import datetime
+
+import pytest
+
+from tracking.models.window_info import WindowInfo
+from tracking.storage import background_writer
+from tracking.storage.background_writer import BackgroundWriter
+from tracking.storage.journal import WriteAheadJournal
+
+
+@pytest.fixture(autouse=True)
+def short_retry_delay(monkeypatch):
+    monkeypatch.setattr(background_writer, 'RETRY_DELAY', 0.01)
+    monkeypatch.setattr(background_writer, 'MAX_RETRY_DELAY', 0.05)
+
+
+def make_record(i: int) -> WindowInfo:
+    now = 1_700_000_000.0 + i
+    return WindowInfo.create(
+        captured_at=now, timestamp='2023-11-14 22:13:20', process_name='app.exe',
+        window_title=f"title {i}", process_id=i, application_name='', application_path='',
+        working_directory='', monitor_type='test', is_new_document=False,
+        office_app_type=None, ended_at=now + 1
+    )
+
+
+class FlakySink:
+    """指定した回数だけ失敗する書き込み先（ファイルがロックされている状態の代わり）"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.written = []
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, records):
+        with self.lock:
+            self.calls += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise OSError('log file is locked')
+            self.written.extend(record.window_title for record in records)
+
+
+def test_failed_batch_is_retried_in_order():
+    sink = FlakySink(failures=3)
+    checkpoints = []
+    writer = BackgroundWriter(sink, batch_size=5, max_batch_age=0.01, on_commit=checkpoints.append)
+    for i in range(20):
+        writer.put(make_record(i), seq=i + 1)
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    assert sink.written == [f"title {i}" for i in range(20)]
+    assert writer.stats()['retries'] >= 3
+    assert checkpoints == sorted(checkpoints)
+    assert checkpoints[-1] == 20
+
+
+def test_checkpoint_does_not_pass_uncommitted_records():
+    sink = FlakySink(failures=10 ** 6)
+    checkpoints = []
+    writer = BackgroundWriter(sink, batch_size=5, max_batch_age=0.01, on_commit=checkpoints.append)
+    for i in range(10):
+        writer.put(make_record(i), seq=i + 1)
+    assert not writer.flush(timeout=0.3)
+    assert checkpoints == []
+    assert writer.queue_depth == 10
+
+    # 書き込み先が復旧すれば、残っていたレコードがすべて書き込まれる
+    sink.failures = 0
+    assert writer.flush(timeout=5)
+    writer.stop()
+    assert sink.written == [f"title {i}" for i in range(10)]
+    assert checkpoints[-1] == 10
+
+
+def test_journal_keeps_records_when_sink_never_recovers(tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    journal = WriteAheadJournal(journal_path, fsync_policy='never')
+    sink = FlakySink(failures=2)
+    writer = BackgroundWriter(sink, batch_size=5, max_batch_age=0.01, on_commit=journal.checkpoint)
+    for i in range(5):
+        writer.put(make_record(i), seq=journal.append(make_record(i)))
+    assert writer.flush(timeout=5)
+
+    # 書き込み先が失敗し続けたまま終了する（異常終了の代わり）
+    sink.failures = 10 ** 6
+    for i in range(5, 12):
+        writer.put(make_record(i), seq=journal.append(make_record(i)))
+    writer.stop(timeout=0.3)
+    journal.close()
+
+    pending = WriteAheadJournal(journal_path, fsync_policy='never').pending()
+    assert [record.window_title for record in pending] == [f"title {i}" for i in range(5, 12)]
+    assert sink.written == [f"title {i}" for i in range(5)]
+
+
+def test_spilled_records_survive_a_failed_drain(tmp_path):
+    spill_path = str(tmp_path / 'spill.jsonl')
+    release = threading.Event()
+    sink = FlakySink()
+
+    def slow_sink(records):
+        release.wait()
+        sink(records)
+
+    checkpoints = []
+    writer = BackgroundWriter(slow_sink, capacity=5, batch_size=5, max_batch_age=0.01,
+                              overflow_policy='spill', spill_path=spill_path,
+                              on_commit=checkpoints.append)
+    for i in range(5):
+        writer.put(make_record(i), seq=i + 1)
+    time.sleep(0.1)
+    for i in range(5, 30):
+        writer.put(make_record(i), seq=i + 1)
+    assert writer.stats()['spilled'] > 0
+
+    sink.failures = 3
+    release.set()
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    assert sink.written == [f"title {i}" for i in range(30)]
+    assert checkpoints[-1] == 30
+    assert not (tmp_path / 'spill.jsonl').exists()
+    assert not (tmp_path / 'spill.jsonl.draining').exists()
+
+
+def test_dropped_records_do_not_block_the_checkpoint():
+    release = threading.Event()
+    sink = FlakySink()
+
+    def slow_sink(records):
+        release.wait()
+        sink(records)
+
+    checkpoints = []
+    writer = BackgroundWriter(slow_sink, capacity=3, batch_size=3, max_batch_age=0.01,
+                              overflow_policy='drop_oldest', on_commit=checkpoints.append)
+    for i in range(3):
+        writer.put(make_record(i), seq=i + 1)
+    time.sleep(0.1)
+    for i in range(3, 10):
+        writer.put(make_record(i), seq=i + 1)
+    release.set()
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    assert writer.stats()['dropped'] == 4
+    assert checkpoints[-1] == 10
+
+
+def test_retry_does_not_rewrite_days_already_saved(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    from tracking.data_manager import DataManager
+    manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never')
+    original_append = manager.writer.append
+    day1 = [make_record(i) for i in range(3)]
+    day2 = [make_record(86400 + i) for i in range(3)]
+    date1, date2 = (datetime.fromtimestamp(day[0].captured_at).strftime('%Y%m%d') for day in (day1, day2))
+    failures = {date2: 1}
+
+    def append(date, records):
+        if failures.get(date):
+            failures[date] -= 1
+            raise OSError('log file is locked')
+        return original_append(date, records)
+
+    monkeypatch.setattr(manager.writer, 'append', append)
+    # 2日にまたがるバッチ（1日目は書き込めて2日目だけ失敗する）
+    manager._enqueue(day1 + day2)
+    assert manager.background_writer.flush(timeout=5)
+    manager.close()
+
+    for date, expected in ((date1, day1), (date2, day2)):
+        saved = list(manager.writer.iter_day(date))
+        assert [record.window_title for record in saved] == [record.window_title for record in expected]
+
+
+def test_recover_after_a_crash_in_the_middle_of_a_batch(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    from tracking.data_manager import DataManager
+    manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never', journal_fsync='always')
+    records = [make_record(i) for i in range(12)]
+    date = datetime.fromtimestamp(records[0].captured_at).strftime('%Y%m%d')
+    manager._enqueue(records[:4])
+    assert manager.background_writer.flush(timeout=5)
+
+    original_append = manager.writer.append
+    crashed = threading.Event()
+    never = threading.Event()
+
+    def append(date, batch):
+        # バッチの半分を書いたところでプロセスが落ちる（ライタースレッドはここで止まる）
+        original_append(date, batch[:len(batch) // 2])
+        crashed.set()
+        never.wait()
+
+    monkeypatch.setattr(manager.writer, 'append', append)
+    manager._enqueue(records[4:])
+    assert not manager.background_writer.flush(timeout=0.1)
+    assert crashed.wait(5)
+    # stop() も close() も呼ばずに、次の起動で回復する
+    recovered = DataManager(batch_size=100, write_interval=60, fsync_policy='never', journal_fsync='always')
+    assert recovered.recover() == 4
+    recovered.close()
+
+    saved = [record.window_title for record in recovered.writer.iter_day(date)]
+    assert saved == [f"title {i}" for i in range(12)]
+    assert recovered.daily_stats(date)['record_count'] == 12
@@ -0,0 +1,54 @@
+# test_browser_title.py
+import pytest
+from tracking.monitors.browser_title import (
+    BROWSER_TITLE_SUFFIXES, TITLE_SEPARATORS, BrowserTitleClassifier, split_browser_suffix
+)
+
+PAGE = '四半期報告 - 営業部 - Intranet'
+
+
+@pytest.mark.parametrize('browser_type,suffix', [
+    (browser_type, suffix) for browser_type, suffixes in BROWSER_TITLE_SUFFIXES.items() for suffix in suffixes
+])
+@pytest.mark.parametrize('separator', TITLE_SEPARATORS)
+def test_every_browser_suffix_is_removed(browser_type, suffix, separator):
+    page_title, browser_name = split_browser_suffix(f"{PAGE}{separator}{suffix}", browser_type)
+    # ページタイトル中の " - " はそのまま残る
+    assert page_title == PAGE
+    assert browser_name == suffix.replace('\u200b', '')
+
+
+def test_title_without_a_known_suffix_is_kept():
+    assert split_browser_suffix('Chrome - 使い方 - Wiki', 'Firefox') == ('Chrome - 使い方 - Wiki', 'Firefox')
+    assert split_browser_suffix('Google Chrome', 'Chrome') == ('', 'Google Chrome')
+
+
+def test_excluded_domains_match_on_a_label_boundary():
+    classifier = BrowserTitleClassifier(excluded_domains=['ex.com', ' Bank.Example '])
+    excluded = {
+        'ex.com': True,
+        'mail.ex.com - 受信トレイ': True,
+        'ログイン | EX.COM': True,
+        'online.bank.example': True,
+        'apex.com': False,
+        'ex.community - フォーラム': False,
+        'ex.com.evil.org': False,
+        'my-ex.com': False,
+    }
+    for page, expected in excluded.items():
+        assert classifier.classify(f"{page} - Google Chrome", 'Chrome').excluded is expected, page
+    assert classifier.stats()['excluded'] == 4
+
+
+def test_repeated_titles_are_served_from_the_memo():
+    classifier = BrowserTitleClassifier(capacity=2)
+    first = classifier.classify(f"{PAGE} - Mozilla Firefox", 'Firefox')
+    assert classifier.classify(f"{PAGE} - Mozilla Firefox", 'Firefox') is first
+    # 同じタイトルでもブラウザが違えば別の結果
+    classifier.classify(f"{PAGE} - Mozilla Firefox", 'Chrome')
+    classifier.classify('other - Mozilla Firefox', 'Firefox')
+    assert classifier.stats()['hits'] == 1
+    assert classifier.stats()['misses'] == 3
+    # 容量を超えると最も古い結果から忘れる
+    assert classifier.stats()['size'] == 2
+    assert classifier.classify(f"{PAGE} - Mozilla Firefox", 'Firefox') is not first
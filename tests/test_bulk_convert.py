@@ -0,0 +1,50 @@
+# test_bulk_convert.py
+import json
+from tracking.activity_log import read_intervals, write_records
+from tracking.models.window_info import WindowInfo
+from tracking.storage.bulk_convert import BulkConverter
+
+BASE = 1_699_967_000.0
+
+
+def write_legacy_log(path, count: int) -> None:
+    records = [
+        WindowInfo.create(
+            captured_at=BASE + i * 10, process_name='notepad.exe', window_title=f"メモ{i}", process_id=1,
+            application_name='notepad.exe', application_path='', working_directory='', monitor_type='general'
+        )
+        for i in range(count)
+    ]
+    write_records(str(path), records)
+
+
+def test_interrupted_run_resumes_with_the_remaining_files(tmp_path):
+    source = tmp_path / 'logs'
+    output = tmp_path / 'out'
+    source.mkdir()
+    # 大きいファイルから処理するため、manifest には 14日 -> 13日 の順に記録される
+    write_legacy_log(source / '20231114_activity_log.csv', 6)
+    write_legacy_log(source / '20231113_activity_log.csv', 3)
+    first = BulkConverter(str(source), output_dir=str(output), workers=1)
+    first.run()
+    assert first.stats()['processed'] == 2
+
+    # 13日の変換中に中断した状態: manifest の最後の行は書きかけ、一時ファイルが残っている
+    manifest = output / 'bulk_convert_manifest.jsonl'
+    lines = manifest.read_text(encoding='utf-8').splitlines(keepends=True)
+    assert json.loads(lines[0])['source'].endswith('20231114_activity_log.csv')
+    manifest.write_text(lines[0] + lines[1][:20], encoding='utf-8')
+    (output / '20231113_activity_intervals.csv').rename(output / '20231113_activity_intervals.csv.tmp')
+
+    resumed = BulkConverter(str(source), output_dir=str(output), workers=1)
+    results = resumed.run()
+    assert [r['source'] for r in results] == [str(source / '20231113_activity_log.csv')]
+    assert resumed.stats()['skipped'] == 1
+    assert resumed.stats()['rows'] == 3
+    assert not (output / '20231113_activity_intervals.csv.tmp').exists()
+    assert len(read_intervals(str(output / '20231113_activity_intervals.csv'))) == 3
+
+    # すべて記録済みなら何もしない
+    done = BulkConverter(str(source), output_dir=str(output), workers=1)
+    assert done.run() == []
+    assert done.stats()['skipped'] == 2
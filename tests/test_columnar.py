@@ -0,0 +1,81 @@
+# test_columnar.py
+import os
+from tracking.activity_log import iter_intervals
+from tracking.models.window_info import WindowInfo
+from tracking.storage import columnar
+from tracking.storage.columnar import ColumnarLogWriter
+from tracking.storage.csv_writer import AppendOnlyCsvWriter
+
+DATE = '20231114'
+
+
+def make_record(i: int) -> WindowInfo:
+    captured_at = 1_699_967_000.0 + i * 2.5
+    return WindowInfo.create(
+        captured_at=captured_at, ended_at=None if i == 9 else captured_at + 1.25,
+        process_name=f"app{i % 3}.exe", window_title=f'報告書, "第{i}版" - メモ帳',
+        process_id=1000 + i % 3, application_name=f"app{i % 3}.exe",
+        application_path=f"C:\\Apps\\app{i % 3}.exe", working_directory='C:\\Users\\user',
+        monitor_type='general', is_new_document=i % 4 == 0,
+        office_app_type='Word' if i % 5 == 0 else None
+    )
+
+
+def key(record: WindowInfo) -> tuple:
+    return (round(record.captured_at, 3), record.duration_ms, record.process_name, record.window_title,
+            record.process_id, record.application_path, record.is_new_document, record.office_app_type)
+
+
+def test_csv_round_trip_keeps_every_field(tmp_path):
+    records = [make_record(i) for i in range(10)]
+    writer = AppendOnlyCsvWriter(str(tmp_path), fsync_policy='never')
+    writer.append(DATE, records)
+    writer.close()
+    csv_path = writer.path_for(DATE)
+
+    tacl_path = columnar.converted_columnar_path(csv_path)
+    assert tacl_path.endswith(columnar.FILE_SUFFIX)
+    assert columnar.csv_to_columnar(csv_path, tacl_path, block_rows=4) == 10
+    assert columnar.is_columnar_log(tacl_path)
+    assert [key(r) for r in columnar.iter_records(tacl_path)] == [key(r) for r in records]
+
+    back_path = str(tmp_path / 'back' / os.path.basename(csv_path))
+    os.makedirs(os.path.dirname(back_path))
+    assert columnar.columnar_to_csv(tacl_path, back_path) == 10
+    assert [key(r) for r in iter_intervals(back_path)] == [key(r) for r in records]
+
+
+def test_projection_reads_only_the_requested_columns(tmp_path):
+    writer = ColumnarLogWriter(str(tmp_path), fsync_policy='never')
+    writer.append(DATE, [make_record(i) for i in range(4)])
+    writer.append(DATE, [make_record(i) for i in range(4, 10)])
+    writer.close()
+
+    rows = list(columnar.iter_rows(writer.path_for(DATE), ['process_name', 'duration_ms']))
+    assert all(list(row) == ['process_name', 'duration_ms'] for row in rows)
+    # 後のブロックの文字列は、前のブロックで登録した辞書を参照する
+    assert [row['process_name'] for row in rows] == [f"app{i % 3}.exe" for i in range(10)]
+    assert [row['duration_ms'] for row in rows] == [1250] * 9 + [None]
+    assert writer.count(DATE) == 10
+
+
+def test_torn_last_block_is_truncated_on_reopen(tmp_path):
+    writer = ColumnarLogWriter(str(tmp_path), fsync_policy='never')
+    writer.append(DATE, [make_record(i) for i in range(4)])
+    writer.close()
+    path = writer.path_for(DATE)
+    complete_size = os.path.getsize(path)
+
+    # 2つ目のブロックの途中で異常終了した状態
+    block = columnar.encode_block([make_record(i) for i in range(4, 8)],
+                                  {s: i for i, s in enumerate(columnar.scan_dictionary(path)[1])})
+    with open(path, 'ab') as f:
+        f.write(block[:len(block) // 2])
+    assert [r.window_title for r in columnar.iter_records(path)] == [make_record(i).window_title for i in range(4)]
+
+    writer = ColumnarLogWriter(str(tmp_path), fsync_policy='never')
+    writer.append(DATE, [make_record(i) for i in range(4, 8)])
+    writer.close()
+    assert writer.repairs == 1
+    assert os.path.getsize(path) > complete_size
+    assert [r.window_title for r in columnar.iter_records(path)] == [make_record(i).window_title for i in range(8)]
@@ -0,0 +1,76 @@
+# test_com_worker.py
+import time
+import pytest
+from tracking.utils.com_worker import ComCallTimeout, ComWorker, FakeComProvider
+from tracking.utils.office_attach import StandInRegistry
+
+
+def make_worker(delay: float) -> ComWorker:
+    registry = StandInRegistry({('Excel', 1): object()})
+    return ComWorker('Excel', provider=FakeComProvider(registry, delay=delay), call_timeout=0.05)
+
+
+def test_calls_fail_fast_while_the_worker_is_hung():
+    worker = make_worker(delay=0.5)
+    try:
+        with pytest.raises(ComCallTimeout, match='timed out'):
+            worker.call(lambda app: 'ok', 1)
+        time.sleep(0.02)
+        started = time.monotonic()
+        with pytest.raises(ComCallTimeout, match='blocked since'):
+            worker.call(lambda app: 'ok', 1)
+        assert time.monotonic() - started < 0.05
+    finally:
+        worker.stop()
+
+
+def test_busy_state_changing_during_call_only_raises_timeouts():
+    # ハングが解けるのと同時に呼び出しても、開始時刻と期限の読み違いで別の例外にならない
+    worker = make_worker(delay=0.06)
+    try:
+        for _ in range(40):
+            try:
+                worker.call(lambda app: 'ok', 1)
+            except ComCallTimeout:
+                pass
+            time.sleep(0.005)
+    finally:
+        worker.stop()
+
+
+def test_object_is_reused_and_released_when_idle():
+    registry = StandInRegistry({('Excel', 1): object()})
+    provider = FakeComProvider(registry)
+    worker = ComWorker('Excel', provider=provider, idle_timeout=0.1, call_timeout=1)
+    try:
+        for _ in range(5):
+            assert worker.call(lambda app: app, 1) is registry.instances[('Excel', 1)]
+        assert worker.stats()['objects_created'] == 1
+        assert registry.lookups == 1
+        assert worker.has_object(1)
+
+        deadline = time.monotonic() + 2
+        while worker.has_object(1) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert worker.stats()['objects_released'] == 1
+        assert provider.released == 1
+    finally:
+        worker.stop()
+
+
+def test_idle_object_is_released_while_other_pids_are_called():
+    registry = StandInRegistry({('Excel', 1): object(), ('Excel', 2): object()})
+    worker = ComWorker('Excel', provider=FakeComProvider(registry), idle_timeout=0.1, call_timeout=1)
+    try:
+        worker.call(lambda app: 'ok', 2)
+        # PID 1 への呼び出しが idle_timeout より短い間隔で続く（キューの待ちは期限切れにならない）
+        deadline = time.monotonic() + 0.4
+        while time.monotonic() < deadline:
+            worker.call(lambda app: 'ok', 1)
+            time.sleep(0.02)
+        assert not worker.has_object(2)
+        assert worker.has_object(1)
+        assert worker.stats()['objects_released'] == 1
+        assert worker.stats()['objects_created'] == 2
+    finally:
+        worker.stop()
@@ -0,0 +1,66 @@
+# test_data_manager.py
+import threading
+import time
+from datetime import datetime
+from tracking.models.window_info import WindowInfo
+
+
+def make_record(i: int, base: float = 1_700_000_000.0) -> WindowInfo:
+    captured_at = base + i
+    return WindowInfo.create(
+        captured_at=captured_at, ended_at=captured_at + 1, process_name='app.exe', window_title=f"title {i}",
+        process_id=1, application_name='', application_path='', working_directory='', monitor_type='test'
+    )
+
+
+def test_export_reports_an_incomplete_flush(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    from tracking.data_manager import DataManager
+    manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never')
+    original_append = manager.writer.append
+    unblocked = threading.Event()
+
+    def append(date, records):
+        # ウイルス対策ソフトなどでログファイルへの書き込みが止まっている状態
+        unblocked.wait(5)
+        return original_append(date, records)
+
+    monkeypatch.setattr(manager.writer, 'append', append)
+    manager._enqueue([make_record(i) for i in range(3)])
+
+    started = time.monotonic()
+    output_path, complete = manager.export_csv(timeout=0.2)
+    assert time.monotonic() - started < 2
+    assert not complete
+    assert output_path
+
+    unblocked.set()
+    assert manager.save_buffer(force=True)
+    manager.close()
+
+
+def test_stats_sidecar_is_rebuilt_when_the_log_is_newer(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    from tracking.data_manager import DataManager
+    # recover() は今日のログを確認する
+    today = datetime.now().replace(hour=0, minute=0, second=1, microsecond=0).timestamp()
+    date = datetime.fromtimestamp(today).strftime('%Y%m%d')
+    records = [make_record(i, base=today) for i in range(5)]
+
+    manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never')
+    manager._write_records(records[:3])
+    # ログへの追記の後、サイドカーを更新する前に終了した
+    manager.writer.append(date, records[3:])
+    manager.close()
+
+    manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never')
+    assert manager.daily_stats(date)['record_count'] == 3
+    assert manager.recover() == 0
+    assert manager.daily_stats(date)['record_count'] == 5
+    assert manager.daily_stats(date)['byte_offset'] == manager.writer.file_size(date)
+    # 一致していれば作り直さない
+    manager.recover()
+    assert manager.stats_index.rebuilds == 1
+    manager.close()
@@ -0,0 +1,40 @@
+# test_dedup_filter.py
+from tracking.models.window_info import WindowInfo
+from tracking.monitors.dedup_filter import DedupFilter
+
+BASE = 1_700_000_000.0
+
+
+def make_record(offset: float, title: str, pid: int = 1) -> WindowInfo:
+    return WindowInfo.create(
+        captured_at=BASE + offset, process_name='notepad.exe', window_title=title, process_id=pid,
+        application_name='notepad.exe', application_path='', working_directory='', monitor_type='general'
+    )
+
+
+def test_returning_to_a_previous_window_is_recorded():
+    dedup = DedupFilter(window=300)
+    accepted = [dedup.accept(make_record(i, title)) for i, title in enumerate(['A', 'B', 'A'])]
+    assert accepted == [True, True, True]
+    assert dedup.stats()['returns'] == 1
+
+
+def test_repeated_state_is_dropped_until_the_window_expires():
+    dedup = DedupFilter(window=60)
+    assert dedup.accept(make_record(0, 'A'))
+    # 同じ状態の検出は window 秒の間は重複
+    assert not dedup.accept(make_record(1, 'A'))
+    assert not dedup.accept(make_record(59.9, 'A'))
+    # プロセスが違えば同じタイトルでも別の状態
+    assert dedup.accept(make_record(30, 'A', pid=2))
+    assert dedup.accept(make_record(31, 'A'))
+
+    # 最後に通してから window 秒が過ぎると、同じ状態でも区切って記録する
+    assert not dedup.accept(make_record(90, 'A'))
+    assert dedup.accept(make_record(91, 'A'))
+    assert not dedup.accept(make_record(92, 'A'))
+
+    stats = dedup.stats()
+    assert stats['suppressed'] == 4
+    assert stats['window_expired'] == 1
+    assert stats['accepted'] == 4
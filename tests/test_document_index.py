@@ -0,0 +1,36 @@
+# test_document_index.py
+import os
+from tracking.utils.document_index import DocumentLocationIndex
+
+EXCEL = ['.xlsx', '.xls']
+
+
+def test_refresh_rescans_only_changed_directories_and_misses_are_remembered(tmp_path):
+    for folder, file_name in (('sales', '売上.xlsx'), ('notes', 'memo.docx')):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / file_name).write_bytes(b'')
+    index = DocumentLocationIndex(roots=[str(tmp_path)], extensions=EXCEL + ['.docx'], negative_ttl=60)
+    # 更新はテストから呼ぶ（専用スレッドは起動しない）
+    index.start = lambda: None
+    index.refresh()
+    assert index.stats()['dirs_scanned'] == 3
+    assert index.lookup('売上', EXCEL) == str(tmp_path / 'sales' / '売上.xlsx')
+
+    # 見つからない名前は更新を依頼し、negative_ttl の間は依頼し直さない
+    assert index.lookup('新規.xlsx', EXCEL) is None
+    assert index._wakeup.is_set()
+    index._wakeup.clear()
+    assert index.lookup('新規.xlsx', EXCEL) is None
+    assert not index._wakeup.is_set()
+    assert index.stats()['misses'] == 1
+    assert index.stats()['negative_hits'] == 1
+
+    # 保存されたファイルのディレクトリだけを走査し直す
+    (tmp_path / 'sales' / '新規.xlsx').write_bytes(b'')
+    mtime = os.stat(tmp_path / 'sales').st_mtime + 1
+    os.utime(tmp_path / 'sales', (mtime, mtime))
+    index.refresh()
+    assert index.stats()['dirs_scanned'] == 4
+    assert index.stats()['dirs_skipped'] == 2
+    assert index.lookup('新規.xlsx', EXCEL) == str(tmp_path / 'sales' / '新規.xlsx')
+    assert index.lookup('memo.docx') == str(tmp_path / 'notes' / 'memo.docx')
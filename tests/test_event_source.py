@@ -0,0 +1,51 @@
+# test_event_source.py
+import importlib.util
+import logging
+import pytest
+from tracking.config import Config
+from tracking.events.event_source import (
+    PollingEventSource, ScriptedEventSource, create_event_source, parse_event_script
+)
+
+
+def make_config(tmp_path, **general) -> Config:
+    config = Config(str(tmp_path / 'config.ini'))
+    for key, value in general.items():
+        config.config.set('General', key, value)
+    return config
+
+
+def test_scripted_source_is_selected_by_config(tmp_path):
+    config = make_config(tmp_path, event_source='scripted', event_script='0:0x10, 0.01:32')
+    source = create_event_source(config)
+    try:
+        assert isinstance(source, ScriptedEventSource)
+        assert source.finished.wait(1)
+        # 溜まったイベントは最新の1件にまとめられる
+        assert source.wait(1).hwnd == 32
+    finally:
+        source.stop()
+
+
+def test_invalid_event_script_is_rejected():
+    with pytest.raises(ValueError):
+        parse_event_script('1:abc')
+
+
+@pytest.mark.skipif(importlib.util.find_spec('win32gui') is not None, reason='pywin32 is installed')
+def test_polling_without_win32gui_raises(tmp_path):
+    config = make_config(tmp_path, event_source='poll')
+    with pytest.raises(RuntimeError, match='event_source = scripted'):
+        create_event_source(config)
+
+
+def test_probe_failure_is_reported_once(caplog):
+    def probe():
+        raise OSError('access denied')
+
+    source = PollingEventSource(probe)
+    with caplog.at_level(logging.WARNING):
+        assert not source.poll()
+        assert not source.poll()
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    assert source.stats()['probe_failures'] == 2
@@ -0,0 +1,29 @@
+# test_explorer_index.py
+from types import SimpleNamespace
+from tracking.utils.explorer_index import ExplorerFolderIndex, FakeShellWindowSource
+
+
+def make_window(i: int) -> SimpleNamespace:
+    return SimpleNamespace(hwnd=100 + i, url=f"file:///C:/work/project{i}", name=f"project{i}",
+                           path=f"C:\\work\\project{i}")
+
+
+def test_switches_are_served_from_the_index():
+    windows = [make_window(i) for i in range(300)]
+    source = FakeShellWindowSource(windows)
+    index = ExplorerFolderIndex(source=source, refresh_interval=3600)
+    index.refresh()
+    calls = source.calls
+    for window in windows:
+        assert index.lookup(window.hwnd, f"{window.name} - エクスプローラー") == window.path
+    assert source.calls == calls
+
+    # フォルダを移動したウィンドウは1回の差分更新で1つだけパスを取り直す
+    moved = windows[7]
+    moved.name, moved.url, moved.path = 'reports', 'file:///C:/work/reports', 'C:\\work\\reports'
+    resolved = index.paths_resolved
+    try:
+        assert index.resolve(moved.hwnd, 'reports - エクスプローラー', timeout=5) == 'C:\\work\\reports'
+    finally:
+        index.stop()
+    assert index.paths_resolved - resolved == 1
@@ -0,0 +1,83 @@
+# test_idle.py
+import sys
+import pytest
+from tracking.config import Config
+from tracking.events.idle import (
+    IdleDetector, LastInputIdleSource, ScriptedIdleSource, create_idle_detector, parse_idle_script
+)
+from tracking.models.window_info import WindowInfo
+
+WALL = 1_700_000_000.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_config(tmp_path, **values) -> Config:
+    config = Config(str(tmp_path / 'config.ini'))
+    for key, value in values.items():
+        config.config.set('General', key, value)
+    return config
+
+
+def test_idle_detector_transitions_with_the_scripted_source():
+    clock = FakeClock()
+    # 開始時と 100 秒後に入力があり、その後は 400 秒後まで入力がない
+    source = ScriptedIdleSource([0.0, 100.0, 400.0], clock=clock)
+    detector = IdleDetector(source, threshold=60, clock=lambda: WALL + clock.now)
+
+    clock.now = 59.0
+    assert detector.check() is None
+    clock.now = 100.0
+    assert detector.check() is None
+    clock.now = 159.0
+    assert detector.check() is None
+    assert not detector.is_idle
+
+    clock.now = 160.0
+    assert detector.check() == IdleDetector.BECAME_IDLE
+    assert detector.check() is None
+    # アイドルマーカーの時刻は検出した時刻ではなく最後の入力時刻
+    marker = WindowInfo.create_idle_marker(detector.idle_since)
+    assert marker.captured_at == WALL + 100.0
+    assert marker.monitor_type == 'idle'
+
+    clock.now = 400.0
+    assert detector.check() == IdleDetector.BECAME_ACTIVE
+    assert not detector.is_idle
+    assert detector.idle_since is None
+    assert detector.stats()['idle_periods'] == 1
+    assert detector.stats()['total_idle_seconds'] == pytest.approx(300.0)
+
+
+def test_scripted_idle_source_is_selected_by_config(tmp_path):
+    config = make_config(tmp_path, idle_source='scripted', idle_script='0, 12.5', idle_threshold='30')
+    detector = create_idle_detector(config)
+    assert isinstance(detector.source, ScriptedIdleSource)
+    assert detector.threshold == 30
+    assert parse_idle_script(' 5, 1.5 ,') == [5.0, 1.5]
+    with pytest.raises(ValueError, match='idle_script'):
+        parse_idle_script('soon')
+
+
+def test_unknown_idle_source_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='Unknown idle source'):
+        create_idle_detector(make_config(tmp_path, idle_source='keyboard'))
+    assert create_idle_detector(make_config(tmp_path, idle_source='none')) is None
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='GetLastInputInfo is available')
+def test_auto_falls_back_but_lastinput_requires_windows(tmp_path):
+    with pytest.raises(RuntimeError, match='lastinput'):
+        create_idle_detector(make_config(tmp_path, idle_source='lastinput'))
+    assert create_idle_detector(make_config(tmp_path, idle_source='auto', event_source='poll')) is None
+    # 切り替えを再生しているときは入力も再生する
+    detector = create_idle_detector(make_config(tmp_path, idle_source='auto', event_source='scripted'))
+    assert isinstance(detector.source, ScriptedIdleSource)
+    with pytest.raises(OSError):
+        LastInputIdleSource()
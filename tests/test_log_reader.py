@@ -0,0 +1,66 @@
+# test_log_reader.py
+import gzip
+import shutil
+
+from tracking.activity_log import iter_rows, row_to_record
+from tracking.models.window_info import WindowInfo
+from tracking.storage.csv_writer import AppendOnlyCsvWriter
+from tracking.storage.log_reader import MappedLogReader, overlaps, read_range
+
+BASE = 1_700_000_000.0
+
+
+def make_record(start: float, duration: float, title: str) -> WindowInfo:
+    return WindowInfo.create(
+        captured_at=BASE + start, process_name='app.exe', window_title=title, process_id=1,
+        application_name='', application_path='', working_directory='', monitor_type='test',
+        ended_at=BASE + start + duration
+    )
+
+
+def write_log(tmp_path, records):
+    writer = AppendOnlyCsvWriter(str(tmp_path), fsync_policy='never')
+    writer.append('20231114', records)
+    writer.close()
+    return writer.path_for('20231114')
+
+
+def full_scan(path, start, end):
+    records = (row_to_record(row) for row in iter_rows(path))
+    return [r.window_title for r in records if r and overlaps(r.captured_at, r.ended_at, start, end)]
+
+
+def test_range_matches_full_scan_and_extends_incrementally(tmp_path):
+    path = write_log(tmp_path, [make_record(i * 10, 8, f"t{i}") for i in range(500)])
+    reader = MappedLogReader(path, every=20, interval=60)
+    for start, end in ((0, 5), (995, 1300), (4000, 6000), (4995, 5001)):
+        titles = [r.window_title for r in reader.read_range(BASE + start, BASE + end)]
+        assert titles == full_scan(path, BASE + start, BASE + end)
+
+    writer = AppendOnlyCsvWriter(str(tmp_path), fsync_policy='never')
+    writer.append('20231114', [make_record(5000 + i * 10, 8, f"u{i}") for i in range(50)])
+    writer.close()
+    assert reader.refresh() == 50
+    # 保存した索引を読み込んだリーダーは追記分だけを索引に加える
+    reloaded = MappedLogReader(path, every=20, interval=60)
+    assert reloaded.stats()['index_loads'] == 1
+    assert reloaded.refresh() == 0
+    assert [r.window_title for r in reloaded.read_range(BASE + 4990, BASE + 5020)] == ['t499', 'u0', 'u1']
+
+
+def test_rows_out_of_start_order_are_found(tmp_path):
+    records = [make_record(i * 10, 8, f"t{i}") for i in range(300)]
+    # 回復などで書き戻された古い区間が後ろに並ぶ
+    records.insert(250, make_record(15, 2, 'late'))
+    path = write_log(tmp_path, records)
+    reader = MappedLogReader(path, every=20, interval=60)
+    titles = [r.window_title for r in reader.read_range(BASE + 10, BASE + 20)]
+    assert titles == full_scan(path, BASE + 10, BASE + 20) == ['t1', 'late']
+
+
+def test_compressed_log_is_scanned(tmp_path):
+    path = write_log(tmp_path, [make_record(i * 10, 8, f"t{i}") for i in range(100)])
+    with open(path, 'rb') as source, gzip.open(f"{path}.gz", 'wb') as target:
+        shutil.copyfileobj(source, target)
+    titles = [r.window_title for r in read_range(f"{path}.gz", BASE + 100, BASE + 130)]
+    assert titles == full_scan(path, BASE + 100, BASE + 130) == ['t10', 't11', 't12']
@@ -0,0 +1,59 @@
+# test_maintenance.py
+import os
+from datetime import date, datetime, timedelta
+from tracking.models.window_info import WindowInfo
+from tracking.storage.maintenance import LogMaintenance
+from tracking.storage.sqlite_store import SqliteActivityStore
+
+
+def make_record(day: date, title: str) -> WindowInfo:
+    captured_at = datetime(day.year, day.month, day.day, 10).timestamp()
+    return WindowInfo.create(
+        captured_at=captured_at, ended_at=captured_at + 60, process_name='app.exe', window_title=title,
+        process_id=1, application_name='', application_path='', working_directory='', monitor_type='test'
+    )
+
+
+def make_maintenance(tmp_path, **kwargs) -> LogMaintenance:
+    logs_dir = tmp_path / 'logs'
+    logs_dir.mkdir(exist_ok=True)
+    return LogMaintenance(str(logs_dir), str(tmp_path / 'temp'), retention_days=30, compress=False,
+                          slice_seconds=60.0, **kwargs)
+
+
+def test_retention_deletes_expired_days_from_sqlite_store(tmp_path):
+    today = date(2026, 10, 17)
+    old, recent = today - timedelta(days=40), today - timedelta(days=3)
+    store = SqliteActivityStore(str(tmp_path / 'activity.db'))
+    store.insert([make_record(old, 'old title'), make_record(recent, 'recent title')])
+    archive_dir = tmp_path / 'archive'
+    maintenance = make_maintenance(tmp_path, store=store, archive_dir=str(archive_dir), vacuum_interval=0.0)
+
+    maintenance.run_once(today)
+
+    assert store.dates() == [recent.strftime('%Y%m%d')]
+    assert os.path.exists(archive_dir / f"{old.strftime('%Y%m%d')}_activity_log.csv")
+    assert maintenance.rows_deleted == 1
+    assert maintenance.vacuums == 1
+    # 期限切れの区間だけが参照していた文字列も消え、その後の挿入も正しく参照できる
+    with store._lock:
+        titles = {row[0] for row in store._connection.execute('SELECT value FROM strings')}
+    assert 'old title' not in titles
+    store.insert([make_record(today, 'old title')])
+    assert [record.window_title for record in store.iter_day(today.strftime('%Y%m%d'))] == ['old title']
+    store.close()
+
+
+def test_retention_deletes_expired_columnar_logs(tmp_path):
+    today = date(2026, 10, 17)
+    maintenance = make_maintenance(tmp_path)
+    logs_dir = tmp_path / 'logs'
+    expired = logs_dir / f"{(today - timedelta(days=40)).strftime('%Y%m%d')}_activity_log.tacl"
+    kept = logs_dir / f"{(today - timedelta(days=3)).strftime('%Y%m%d')}_activity_log.tacl"
+    expired.write_bytes(b'')
+    kept.write_bytes(b'')
+
+    maintenance.run_once(today)
+
+    assert not expired.exists()
+    assert kept.exists()
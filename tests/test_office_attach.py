@@ -0,0 +1,90 @@
+# test_office_attach.py
+import sys
+import types
+from types import SimpleNamespace
+import pytest
+from tracking.utils.com_worker import ComWorker, FakeComProvider
+from tracking.utils.office_attach import StandInRegistry
+
+APP = 'Excel.Application'
+
+
+def make_application(path: str) -> SimpleNamespace:
+    return SimpleNamespace(ActiveWorkbook=SimpleNamespace(FullName=path))
+
+
+def active_path(application) -> str:
+    return application.ActiveWorkbook.FullName
+
+
+def disconnected(application) -> str:
+    raise RuntimeError('The object invoked has disconnected from its clients')
+
+
+@pytest.fixture(autouse=True)
+def forbid_dispatch(monkeypatch):
+    """Dispatch() などでOfficeを起動しようとしたら失敗させる"""
+    def launch(*args, **kwargs):
+        raise AssertionError('an Office instance was created')
+
+    client = types.ModuleType('win32com.client')
+    client.Dispatch = client.DispatchEx = client.GetActiveObject = launch
+    package = types.ModuleType('win32com')
+    package.client = client
+    monkeypatch.setitem(sys.modules, 'win32com', package)
+    monkeypatch.setitem(sys.modules, 'win32com.client', client)
+
+
+def test_binding_is_cached_per_pid():
+    registry = StandInRegistry({(APP, 1): make_application('C:\\a.xlsx'),
+                                (APP, 2): make_application('C:\\b.xlsx')})
+    provider = FakeComProvider(registry)
+    worker = ComWorker(APP, provider=provider, call_timeout=1)
+    try:
+        for _ in range(3):
+            # 各PIDは自分のインスタンスに繋がる
+            assert worker.call(active_path, 1) == 'C:\\a.xlsx'
+            assert worker.call(active_path, 2) == 'C:\\b.xlsx'
+    finally:
+        worker.stop()
+    assert registry.lookups == 2
+    assert provider.created == 2
+
+
+def test_failed_or_stale_binding_is_rebound():
+    registry = StandInRegistry({(APP, 1): make_application('C:\\a.xlsx')})
+    worker = ComWorker(APP, provider=FakeComProvider(registry), call_timeout=1)
+    try:
+        assert worker.call(active_path, 1) == 'C:\\a.xlsx'
+
+        # Excelが再起動して、キャッシュしたオブジェクトは切断されている
+        registry.instances[(APP, 1)] = make_application('C:\\c.xlsx')
+        with pytest.raises(RuntimeError, match='disconnected'):
+            worker.call(disconnected, 1)
+        assert not worker.has_object(1)
+        assert worker.call(active_path, 1) == 'C:\\c.xlsx'
+
+        # Excelが終了した（接続し直そうとしても見つからない）
+        registry.unregister(APP, 1)
+        with pytest.raises(RuntimeError, match='disconnected'):
+            worker.call(disconnected, 1)
+        with pytest.raises(RuntimeError, match='No running'):
+            worker.call(active_path, 1)
+    finally:
+        worker.stop()
+    assert registry.lookups == 3
+    assert worker.stats()['objects_released'] >= 1
+
+
+def test_pid_without_a_running_instance_raises_without_launching_office():
+    registry = StandInRegistry({(APP, 1): make_application('C:\\a.xlsx')})
+    provider = FakeComProvider(registry)
+    worker = ComWorker(APP, provider=provider, call_timeout=1)
+    try:
+        with pytest.raises(RuntimeError, match='No running'):
+            worker.call(active_path, 99)
+    finally:
+        worker.stop()
+    assert provider.created == 0
+    assert worker.stats()['objects_created'] == 0
+    assert worker.stats()['bound_pids'] == 0
@@ -0,0 +1,39 @@
+# test_pdf_path_resolver.py
+import time
+
+from tracking.utils.pdf_path_resolver import PdfPathResolver
+
+
+class StubResolver(PdfPathResolver):
+    """インデックスの初回の走査が終わるまでは見つからない状態を再現する"""
+
+    def __init__(self, **kwargs):
+        super().__init__(['acrord32.exe'], **kwargs)
+        self.indexed = False
+        self.calls = 0
+
+    def _extract_pdf_path(self, pid, title, process_name):
+        self.calls += 1
+        return 'C:\\docs\\report.pdf' if self.indexed else None
+
+
+def test_miss_is_retried_after_negative_ttl():
+    resolver = StubResolver(negative_ttl=0.05)
+    try:
+        assert resolver.resolve(1, 'report.pdf - Reader', 'acrord32.exe', timeout=1) is None
+        # 期限内は記憶した結果を返す
+        resolver.indexed = True
+        assert resolver.resolve(1, 'report.pdf - Reader', 'acrord32.exe', timeout=1) is None
+        assert resolver.calls == 1
+
+        time.sleep(0.06)
+        assert resolver.resolve(1, 'report.pdf - Reader', 'acrord32.exe', timeout=1) == 'C:\\docs\\report.pdf'
+        assert resolver.calls == 2
+        assert resolver.stats()['expired'] == 1
+
+        # 見つかった結果は期限なしで記憶する
+        time.sleep(0.06)
+        assert resolver.resolve(1, 'report.pdf - Reader', 'acrord32.exe', timeout=1) == 'C:\\docs\\report.pdf'
+        assert resolver.calls == 2
+    finally:
+        resolver.shutdown()
@@ -0,0 +1,58 @@
+# test_process_cache.py
+import os
+import sys
+import subprocess
+import psutil
+from tracking.utils.process_cache import ProcessInfo, ProcessInfoCache
+
+
+def make_cache(capacity: int = 256) -> ProcessInfoCache:
+    return ProcessInfoCache(capacity=capacity, refresh_interval=float('inf'))
+
+
+def test_reused_pid_is_detected_on_a_new_window():
+    cache = make_cache()
+    pid = os.getpid()
+    # 同じPIDで以前に動いていた別のプロセスのエントリ
+    cache._store(ProcessInfo(pid=pid, create_time=1.0, name='old.exe', exe='C:\\old.exe', hwnds={100}))
+
+    # 確認済みのウィンドウではOSを呼ばずに返す
+    assert cache.get(pid, hwnd=100).name == 'old.exe'
+    assert cache.syscalls == 0
+
+    info = cache.get(pid, hwnd=200)
+    assert info.create_time == psutil.Process(pid).create_time()
+    assert info.name == psutil.Process(pid).name()
+    assert cache.stats()['reused_pids'] == 1
+    assert cache.stats()['size'] == 1
+
+    # 確認が済めば、以降はどちらのウィンドウでもOSを呼ばない
+    syscalls = cache.syscalls
+    assert cache.get(pid, hwnd=200) is info
+    assert cache.syscalls == syscalls
+
+
+def test_least_recently_used_entry_is_evicted_at_capacity():
+    cache = make_cache(capacity=2)
+    for pid in (1, 2):
+        cache._store(ProcessInfo(pid=pid, create_time=1.0, name=f"app{pid}.exe", exe=''))
+    assert cache.get(1).name == 'app1.exe'
+
+    cache._store(ProcessInfo(pid=3, create_time=1.0, name='app3.exe', exe=''))
+    assert sorted(cache._pid_index) == [1, 3]
+    assert cache.stats()['size'] == 2
+
+
+def test_sweep_removes_dead_pids():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    cache = make_cache(capacity=4)
+    me = psutil.Process()
+    cache._store(ProcessInfo(pid=process.pid, create_time=1.0, name='python.exe', exe=''))
+    cache._store(ProcessInfo(pid=me.pid, create_time=me.create_time(), name=me.name(), exe=''))
+
+    cache.refresh()
+    assert process.pid not in cache._pid_index
+    assert cache._pid_index[me.pid] == (me.pid, me.create_time())
+    assert cache.stats()['sweeps'] == 1
+    assert cache.stats()['size'] <= 4
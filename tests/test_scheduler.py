@@ -0,0 +1,95 @@
+# test_scheduler.py
+import pytest
+from tracking.events.scheduler import AdaptiveScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_tick_rate_counts_event_and_timer_wakeups_separately():
+    clock = FakeClock()
+    scheduler = AdaptiveScheduler(polling_enabled=False, flush_interval=3.0, report_interval=0, clock=clock)
+
+    # フック使用時: イベントで起床してもタイマーの期限はまだ来ていない
+    for _ in range(5):
+        clock.now += 0.1
+        assert scheduler.pop_due(woken_by_event=True) == []
+    clock.now += 3.0
+    assert scheduler.pop_due() == [AdaptiveScheduler.TASK_FLUSH]
+
+    stats = scheduler.stats()
+    assert stats['event_wakeups'] == 5
+    assert stats['ticks'] == 1
+    assert stats['event_rate'] == 5 / 60
+    assert stats['timer_rate'] == 1 / 60
+    assert stats['tick_rate'] == pytest.approx(6 / 60)
+
+    # 60秒を過ぎた起床は数えない
+    clock.now += 61
+    assert scheduler.tick_rate() == 0.0
+
+
+def run_polls(scheduler: AdaptiveScheduler, clock: FakeClock, count: int):
+    """変化のないポーリングを count 回行い、(時刻, 次の間隔) の列を返す"""
+    polls = []
+    while len(polls) < count:
+        clock.now += scheduler.next_timeout()
+        if AdaptiveScheduler.TASK_POLL in scheduler.pop_due():
+            scheduler.notify_unchanged()
+            polls.append((clock.now, scheduler.poll_interval))
+    return polls
+
+
+def make_scheduler(clock: FakeClock) -> AdaptiveScheduler:
+    return AdaptiveScheduler(poll_interval=1.0, min_interval=0.25, max_interval=5.0, backoff_factor=2.0,
+                             idle_after=10.0, burst_duration=3.0, flush_interval=1000, report_interval=0,
+                             clock=clock)
+
+
+def test_switch_starts_a_burst_of_short_polls():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    run_polls(scheduler, clock, 3)
+
+    switched_at = clock.now
+    scheduler.notify_switch()
+    assert scheduler.next_timeout() == 0.25
+    polls = run_polls(scheduler, clock, 16)
+    # burst_duration の間は min_interval、その後は通常の間隔
+    assert [interval for at, interval in polls if at < switched_at + 3.0] == [0.25] * 11
+    assert [interval for at, interval in polls if at >= switched_at + 3.0] == [1.0] * 5
+
+
+def test_interval_backs_off_to_the_maximum_after_idle_after():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.notify_switch()
+    started = clock.now
+    polls = run_polls(scheduler, clock, 40)
+
+    # idle_after までは通常の間隔で、その後は backoff_factor 倍ずつ max_interval まで伸びる
+    backoff = [interval for at, interval in polls if at - started >= 10.0]
+    assert all(interval <= 1.0 for at, interval in polls if at - started < 10.0)
+    assert backoff[:3] == [2.0, 4.0, 5.0]
+    assert set(backoff[3:]) == {5.0}
+    assert scheduler.next_timeout() == 5.0
+
+
+def test_idle_pins_the_interval_at_the_maximum():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.notify_switch()
+    scheduler.set_idle(True)
+    assert scheduler.next_timeout() == 5.0
+    # バースト中でも、切り替えのない時間が短くても最大間隔のまま
+    assert [interval for _, interval in run_polls(scheduler, clock, 5)] == [5.0] * 5
+    assert scheduler.stats()['idle']
+
+    scheduler.set_idle(False)
+    assert scheduler.next_timeout() == 1.0
+    assert [interval for _, interval in run_polls(scheduler, clock, 3)] == [1.0] * 3
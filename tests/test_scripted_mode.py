@@ -0,0 +1,51 @@
+# test_scripted_mode.py
+import os
+from datetime import datetime
+import pytest
+from tracking.config import Config
+from tracking.events.event_source import ScriptedEventSource, create_event_source
+
+
+def test_scripted_switches_are_recorded_with_event_time(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    monkeypatch.setenv('WINDIR', 'C:\\Windows')
+    from tracking.data_manager import DataManager
+    from tracking.monitors.monitor_facade import WindowMonitorFacade
+
+    config = Config(str(tmp_path / 'config.ini'))
+    config.config.set('General', 'event_source', 'scripted')
+    config.config.set('General', 'event_script', '0.05:0x10, 0.05:0x20, 0.05:0x10')
+    config.config.set('General', 'scripted_windows', '0x10=memo.txt - メモ帳; 0x20=報告書.txt - メモ帳')
+    config.config.set('General', 'enrichment_workers', '0')
+    monitor = WindowMonitorFacade(config)
+    data_manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never')
+    source = create_event_source(config)
+    assert isinstance(source, ScriptedEventSource)
+
+    events = []
+    try:
+        while len(events) < 3:
+            event = source.wait(2)
+            assert event is not None
+            events.append(event)
+            data_manager.add_record(monitor.get_active_window_info(event.hwnd, event.timestamp))
+    finally:
+        source.stop()
+    data_manager.close_session()
+    assert data_manager.save_buffer(force=True)
+    data_manager.close()
+
+    records = []
+    for date in sorted({datetime.fromtimestamp(event.timestamp).strftime('%Y%m%d') for event in events}):
+        records.extend(data_manager.writer.iter_day(date))
+    assert [record.window_title for record in records] == [
+        'memo.txt - メモ帳', '報告書.txt - メモ帳', 'memo.txt - メモ帳'
+    ]
+    # 区間の開始はキャプチャした時刻ではなくイベントの時刻（ログはミリ秒単位）
+    assert [record.captured_at for record in records] == pytest.approx(
+        [event.timestamp for event in events], abs=1e-3
+    )
+    # 終了時刻は丸めた開始時刻と継続時間（ミリ秒）から復元するため、誤差は最大2ミリ秒
+    assert records[0].ended_at == pytest.approx(events[1].timestamp, abs=2e-3)
+    assert all(record.process_id == os.getpid() for record in records)
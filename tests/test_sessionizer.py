@@ -0,0 +1,59 @@
+# test_sessionizer.py
+from datetime import datetime
+from tracking.models.window_info import WindowInfo
+from tracking.sessionizer import Sessionizer
+
+
+def make_record(captured_at: float, title: str) -> WindowInfo:
+    return WindowInfo.create(
+        captured_at=captured_at, process_name='app.exe', window_title=title, process_id=1,
+        application_name='', application_path='', working_directory='', monitor_type='test'
+    )
+
+
+def test_idle_marker_before_open_interval_is_clamped():
+    sessionizer = Sessionizer()
+    base = 1_700_000_000.0
+    closed = sessionizer.push(make_record(base, 'A'))
+    closed += sessionizer.push(make_record(base + 100, 'B'))
+    # 最後の入力は A の使用中（B に切り替わる前）だった
+    closed += sessionizer.push(WindowInfo.create_idle_marker(base + 40))
+    closed += sessionizer.push(make_record(base + 500, 'A'))
+
+    assert [record.window_title for record in closed] == ['A', 'B', '<離席>']
+    starts = [record.captured_at for record in closed]
+    assert starts == sorted(starts)
+    for previous, following in zip(closed, closed[1:]):
+        assert previous.ended_at <= following.captured_at
+    # B は離席のマーカーと同じ時点で閉じる
+    assert closed[1].ended_at == closed[2].captured_at == base + 100
+    assert sessionizer.clamped == 1
+
+
+def test_idle_marker_after_open_interval_keeps_last_input_time():
+    sessionizer = Sessionizer()
+    base = 1_700_000_000.0
+    sessionizer.push(make_record(base, 'A'))
+    closed = sessionizer.push(WindowInfo.create_idle_marker(base + 40))
+    assert closed[0].ended_at == base + 40
+    assert sessionizer.current.captured_at == base + 40
+    assert sessionizer.clamped == 0
+
+
+def test_durations_and_midnight_split():
+    sessionizer = Sessionizer()
+    # ローカル時刻の 23:59:00 から翌日 00:01:30 まで使い、次の切り替えで閉じる
+    start = datetime(2023, 11, 14, 23, 59).timestamp()
+    midnight = datetime(2023, 11, 15).timestamp()
+    closed = sessionizer.push(make_record(start - 12.3456, 'A'))
+    closed += sessionizer.push(make_record(start, 'B'))
+    closed += sessionizer.push(make_record(midnight + 90, 'C'))
+
+    assert [record.window_title for record in closed] == ['A', 'B', 'B']
+    assert [record.duration_ms for record in closed] == [12346, 60000, 90000]
+    # 0時で分割した断片はそれぞれの日に入る
+    assert closed[1].ended_at == closed[2].captured_at == midnight
+    assert [record.timestamp for record in closed[1:]] == ['2023-11-14 23:59:00', '2023-11-15 00:00:00']
+    assert sessionizer.day_splits == 1
+    assert sessionizer.intervals_closed == 3
+    assert sessionizer.current.duration_ms is None
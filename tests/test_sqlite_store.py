@@ -0,0 +1,77 @@
+# test_sqlite_store.py
+from datetime import datetime
+import pytest
+from tracking.models.window_info import WindowInfo
+from tracking.storage.sqlite_store import SqliteActivityStore
+
+BASE = 1_700_000_000.0
+
+
+def make_record(offset: float, title: str) -> WindowInfo:
+    return WindowInfo.create(
+        captured_at=BASE + offset, ended_at=BASE + offset + 1, process_name='app.exe', window_title=title,
+        process_id=1, application_name='', application_path='', working_directory='', monitor_type='test'
+    )
+
+
+def test_rolled_back_string_ids_are_not_cached(tmp_path, monkeypatch):
+    store = SqliteActivityStore(str(tmp_path / 'activity.db'))
+    original_to_row = store._to_row
+
+    def failing_to_row(record, ids):
+        raise OSError('disk I/O error')
+
+    monkeypatch.setattr(store, '_to_row', failing_to_row)
+    with pytest.raises(OSError):
+        store.insert([make_record(0, 'first')])
+    # ロールバックされた文字列のIDはキャッシュに残らない
+    assert 'first' not in store._string_ids
+
+    monkeypatch.setattr(store, '_to_row', original_to_row)
+    assert store.insert([make_record(1, 'second'), make_record(2, 'first')]) == 2
+    assert [record.window_title for record in store.iter_records()] == ['second', 'first']
+    store.close()
+
+
+def test_string_cache_is_capped(tmp_path):
+    store = SqliteActivityStore(str(tmp_path / 'activity.db'), string_cache_capacity=4)
+    store.insert([make_record(i, f"title {i}") for i in range(10)])
+    assert len(store._string_ids) == 4
+    # キャッシュから外れた文字列も同じIDで参照できる
+    assert store.insert([make_record(100, 'title 0')]) == 1
+    with store._lock:
+        count = store._connection.execute("SELECT COUNT(*) FROM strings WHERE value = 'title 0'").fetchone()[0]
+    assert count == 1
+    store.close()
+
+
+def test_stats_do_not_count_duplicate_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    from tracking.data_manager import DataManager
+    manager = DataManager(batch_size=100, write_interval=60, fsync_policy='never', backend='sqlite')
+    records = [make_record(i, f"title {i}") for i in range(3)]
+    date = datetime.fromtimestamp(BASE).strftime('%Y%m%d')
+
+    manager._write_records(records)
+    # 同じ区間の再取り込み（INSERT OR IGNORE で挿入されない）
+    manager._write_records([make_record(i, f"title {i}") for i in range(3)] + [make_record(10, 'new')])
+
+    assert manager.daily_stats(date)['record_count'] == 4
+    assert manager.writer.count(date) == 4
+    manager.close()
+
+
+def test_reimporting_a_csv_inserts_nothing(tmp_path):
+    from tracking.storage.csv_writer import AppendOnlyCsvWriter
+    date = datetime.fromtimestamp(BASE).strftime('%Y%m%d')
+    writer = AppendOnlyCsvWriter(str(tmp_path), fsync_policy='never')
+    writer.append(date, [make_record(i * 1.5, f"title {i % 4}") for i in range(20)])
+    writer.close()
+
+    store = SqliteActivityStore(str(tmp_path / 'activity.db'))
+    assert store.import_csv(writer.path_for(date)) == 20
+    assert store.import_csv(writer.path_for(date)) == 0
+    assert store.count(date) == 20
+    assert store.stats()['duplicates'] == 20
+    store.close()
@@ -0,0 +1,62 @@
+# test_string_pool.py
+import gc
+import tracemalloc
+from tracking.models.window_info import WindowInfo
+from tracking.utils.string_pool import get_string_pool
+
+RECORDS = 50000
+BASE = 1_700_000_000.0
+
+
+def make_day():
+    """50k件の1日分（プロセス20種・タイトル300種）。値は毎回新しい文字列オブジェクトとして作る"""
+    records = []
+    for i in range(RECORDS):
+        app = i % 20
+        records.append(WindowInfo.create(
+            captured_at=BASE + i, timestamp='2023-11-14 22:13:20', process_id=1000 + app,
+            process_name=f"application{app}.exe",
+            window_title=f"Quarterly report draft {i % 300} - Application {app}",
+            application_name=f"application{app}.exe",
+            application_path=f"C:\\Program Files\\Vendor\\Application {app}\\application{app}.exe",
+            working_directory=f"C:\\Users\\user\\Documents\\Project {i % 300 // 10}",
+            monitor_type=''.join(['gen', 'eral']),
+            office_app_type=None
+        ))
+    return records
+
+
+def measure(capacity: int) -> int:
+    pool = get_string_pool()
+    pool.configure(capacity)
+    pool.clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        records = make_day()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(records) == RECORDS
+    return size
+
+
+def test_interning_reduces_memory_of_a_day():
+    pool = get_string_pool()
+    capacity = pool.capacity
+    try:
+        # 容量0では何も登録されず、レコードごとに別の文字列を持つ
+        unpooled = measure(0)
+        hits = pool.hits
+        pooled = measure(10000)
+        size = len(pool._strings)
+        hits = pool.hits - hits
+    finally:
+        pool.configure(capacity)
+        pool.clear()
+
+    # 6列 x 50k件のうち、初出の値以外はすべて共有オブジェクトを返す
+    assert size < 1000
+    assert hits > 6 * RECORDS - 1000
+    # 文字列の重複がなくなり、1日分のレコードのメモリが半分以下になる
+    assert pooled < unpooled * 0.5, f"pooled={pooled} unpooled={unpooled}"
@@ -0,0 +1,111 @@
+# test_window_selector.py
+from typing import FrozenSet
+from tracking.models.window_snapshot import WindowSnapshot
+from tracking.monitors.base.base_monitor import BaseWindowMonitor
+from tracking.monitors.core.browser_monitor import BrowserWindowMonitor
+from tracking.monitors.core.general_monitor import GeneralWindowMonitor
+from tracking.monitors.core.pdf_monitor import PDFWindowMonitor
+from tracking.monitors.snapshot_provider import FakeWindowApi, WindowSnapshotProvider
+from tracking.monitors.window_selector import WindowSelector
+from tracking.utils.process_cache import ProcessInfo, ProcessInfoCache
+
+
+def test_one_snapshot_serves_selection_and_extraction(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    windows = {
+        1: (11, 'Chrome_WidgetWin_1', 'Example - Google Chrome', 'chrome.exe'),
+        2: (12, 'AcrobatSDIWindow', 'report.pdf - Adobe Acrobat Reader', 'AcroRd32.exe'),
+        3: (13, 'Notepad', 'memo.txt - メモ帳', 'notepad.exe'),
+    }
+    api = FakeWindowApi({hwnd: window[:3] for hwnd, window in windows.items()})
+    process_cache = ProcessInfoCache(refresh_interval=float('inf'))
+    for pid, _, _, name in windows.values():
+        process_cache._store(ProcessInfo(pid=pid, create_time=1.0, name=name, exe=name))
+    # 実在しないPIDなので、PID再利用の確認では登録した create_time を返す
+    process_cache._create_time = lambda pid: 1.0
+    selector = WindowSelector(snapshot_provider=WindowSnapshotProvider(process_cache, window_api=api))
+    selector.enrichment_paused = True
+    selector.register_monitor('browser', BrowserWindowMonitor())
+    selector.register_monitor('pdf', PDFWindowMonitor())
+    selector.register_monitor('default', GeneralWindowMonitor())
+
+    provider = selector.snapshot_provider
+    for hwnd in windows:
+        api.foreground = hwnd
+        assert selector.get_window_info() is not None
+    # 初めてのウィンドウだけ、PIDが再利用されていないか create_time を1回確認する
+    assert process_cache.syscalls == len(windows)
+
+    os_calls, syscalls = provider.os_call_count, process_cache.syscalls
+    for hwnd in windows:
+        api.foreground = hwnd
+        assert selector.get_window_info() is not None
+    # ティックごとに GetForegroundWindow / GetWindowThreadProcessId / GetClassName / GetWindowText だけ
+    assert provider.os_call_count - os_calls == 4 * len(windows)
+    assert process_cache.syscalls == syscalls
+
+
+def test_general_monitor_reads_the_working_directory_in_enrich(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    process_cache = ProcessInfoCache(refresh_interval=float('inf'))
+    process_cache._store(ProcessInfo(pid=13, create_time=1.0, name='notepad.exe', exe='notepad.exe',
+                                     cwd='C:\\Users\\user\\Documents'))
+    process_cache._create_time = lambda pid: 1.0
+    monitor = GeneralWindowMonitor()
+    monitor._process_cache = process_cache
+    snapshot = WindowSnapshotProvider(process_cache, window_api=FakeWindowApi(
+        {3: (13, 'Notepad', 'memo.txt - メモ帳')}
+    )).capture(3)
+
+    # 記録の時点ではプロセスに問い合わせない
+    assert GeneralWindowMonitor.needs_enrichment
+    info = monitor.get_active_window_info(snapshot)
+    assert info.working_directory == ''
+    monitor.enrich(info, snapshot)
+    assert info.working_directory == 'C:\\Users\\user\\Documents'
+
+
+class ClaimingMonitor(BaseWindowMonitor):
+    """担当範囲だけを宣言し、is_target_window の呼び出しを数えるモニター"""
+
+    def __init__(self, processes: FrozenSet[str] = frozenset(), classes: FrozenSet[str] = frozenset(),
+                 conditional: FrozenSet[str] = frozenset(), accepts: bool = False):
+        super().__init__()
+        self.claimed_processes = processes
+        self.claimed_classes = classes
+        self.conditional_processes = conditional
+        self.accepts = accepts
+        self.checks = 0
+
+    def is_target_window(self, snapshot: WindowSnapshot) -> bool:
+        self.checks += 1
+        return self.accepts
+
+
+def test_dispatch_table_picks_the_claiming_monitor_or_the_default():
+    selector = WindowSelector(snapshot_provider=WindowSnapshotProvider(window_api=FakeWindowApi({})),
+                              priority=['shell', 'viewer', 'default'])
+    shell = ClaimingMonitor(classes=frozenset({'CabinetWClass'}), conditional=frozenset({'explorer.exe'}))
+    viewer = ClaimingMonitor(processes=frozenset({'viewer.exe'}))
+    default = ClaimingMonitor()
+    selector.register_monitor('default', default)
+    selector.register_monitor('viewer', viewer)
+    selector.register_monitor('shell', shell)
+
+    def select(class_name: str, process_name: str) -> BaseWindowMonitor:
+        return selector.get_appropriate_monitor(WindowSnapshot(
+            hwnd=1, pid=1, class_name=class_name, title='title', process_name=process_name, exe=''
+        ))
+
+    # 宣言したプロセス名（大文字小文字は区別しない）とクラス名は判定なしで選ばれる
+    assert select('Chrome_WidgetWin_1', 'Viewer.EXE') is viewer
+    assert select('CabinetWClass', 'explorer.exe') is shell
+    assert shell.checks == 0 and viewer.checks == 0
+    # 条件付きのプロセスは is_target_window が断れば一般モニターに回る
+    assert select('Shell_TrayWnd', 'explorer.exe') is default
+    assert shell.checks == 1
+    # どのモニターも宣言していないウィンドウは一般モニター
+    assert select('Notepad', 'notepad.exe') is default
+    assert default.checks == 0
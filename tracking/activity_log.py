@@ -0,0 +1,243 @@
+# activity_log.py
+"""アクティビティログ（*_activity_log.csv）の形式と変換
+
+旧形式のログは切り替え時刻（timestamp、秒単位）だけを記録していた。
+現在の形式は各行が使用区間を表し、start / end / duration_ms を持つ。
+convert_log_file() は旧形式のログの連続する行を組にして区間に変換する。
+"""
+import csv
+import gzip
+import codecs
+import os
+import re
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from .models.window_info import WindowInfo
+from .sessionizer import Sessionizer
+
+LEGACY_FIELDNAMES = [
+    'timestamp',
+    'process_name',
+    'window_title',
+    'process_id',
+    'application_name',
+    'application_path',
+    'working_directory',
+    'monitor_type',
+    'is_new_document',
+    'office_app_type'
+]
+
+# 既存の列の後ろに区間の列を追加する（旧形式を読むツールとの互換性のため）
+FIELDNAMES = LEGACY_FIELDNAMES + ['start', 'end', 'duration_ms']
+
+# 過去のバージョンではShift-JISで保存されたログもある
+ENCODINGS = ('utf-8-sig', 'cp932')
+
+# 文字コードの判定で一度に読む大きさ
+DETECT_CHUNK_SIZE = 1024 * 1024
+
+_CONTROL_CHARACTERS = re.compile(r'[\u0000-\u001F\u007F-\u009F\u200B-\u200F\u2028-\u202F]')
+
+
+def sanitize_text(text: str) -> str:
+    """制御文字や特殊文字を削除する"""
+    if not text:
+        return ""
+    return _CONTROL_CHARACTERS.sub('', text)
+
+
+def record_to_row(record: WindowInfo) -> Dict[str, object]:
+    duration_ms = record.duration_ms
+    return {
+        'timestamp': record.timestamp,
+        'process_name': record.process_name,
+        'window_title': sanitize_text(record.window_title),
+        'process_id': record.process_id,
+        'application_name': record.application_name,
+        'application_path': sanitize_text(record.application_path),
+        'working_directory': sanitize_text(record.working_directory),
+        'monitor_type': record.monitor_type,
+        'is_new_document': record.is_new_document,
+        'office_app_type': record.office_app_type or '',
+        'start': record.start,
+        'end': record.end,
+        'duration_ms': '' if duration_ms is None else duration_ms
+    }
+
+
+def _parse_time(value: str) -> Optional[float]:
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def row_to_record(row: Dict[str, str],
+                  times: Optional[Tuple[float, Optional[float]]] = None) -> Optional[WindowInfo]:
+    """CSVの1行からWindowInfoを復元する（旧形式・新形式の両方に対応）
+
+    times に解析済みの (開始時刻, 終了時刻) を渡すと、時刻の列は解析しない。
+    """
+    if times is not None:
+        captured_at, ended_at = times
+    else:
+        captured_at = _parse_time(row.get('start') or '') or _parse_time(row.get('timestamp') or '')
+        if captured_at is None:
+            return None
+        # end はミリ秒未満を切り捨てているため、継続時間があればそちらから終了時刻を求める
+        ended_at = _parse_time(row.get('end') or '')
+        try:
+            if ended_at is not None and row.get('duration_ms'):
+                ended_at = captured_at + int(row['duration_ms']) / 1000
+        except ValueError:
+            pass
+    try:
+        process_id = int(row.get('process_id') or 0)
+    except ValueError:
+        process_id = 0
+    return WindowInfo.create(
+        captured_at=captured_at,
+        timestamp=row.get('timestamp') or datetime.fromtimestamp(captured_at).strftime('%Y-%m-%d %H:%M:%S'),
+        process_name=row.get('process_name') or '',
+        window_title=row.get('window_title') or '',
+        process_id=process_id,
+        application_name=row.get('application_name') or '',
+        application_path=row.get('application_path') or '',
+        working_directory=row.get('working_directory') or '',
+        monitor_type=row.get('monitor_type') or '',
+        is_new_document=(row.get('is_new_document') or '').strip().lower() == 'true',
+        office_app_type=row.get('office_app_type') or None,
+        ended_at=ended_at
+    )
+
+
+def open_log(filepath: str, encoding: str) -> TextIO:
+    """ログファイルをテキストとして開く（保守処理で圧縮された *.gz もそのまま読める）"""
+    if filepath.endswith('.gz'):
+        return gzip.open(filepath, 'rt', encoding=encoding, newline='')
+    return open(filepath, 'r', encoding=encoding, newline='')
+
+
+def open_log_binary(filepath: str) -> BinaryIO:
+    """ログファイルをバイナリとして開く（*.gz は展開しながら読む）"""
+    if filepath.endswith('.gz'):
+        return gzip.open(filepath, 'rb')
+    return open(filepath, 'rb')
+
+
+def detect_encoding(filepath: str) -> str:
+    """ログファイルの文字コードを判定する（ファイル全体を少しずつ読み、メモリに溜めない）"""
+    for encoding in ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open_log_binary(filepath) as f:
+                while True:
+                    chunk = f.read(DETECT_CHUNK_SIZE)
+                    decoder.decode(chunk, final=not chunk)
+                    if not chunk:
+                        break
+        except UnicodeDecodeError:
+            continue
+        return encoding
+    raise UnicodeDecodeError('activity_log', b'', 0, 1, f"Unsupported encoding: {filepath}")
+
+
+def detect_schema(header: List[str]) -> str:
+    """ヘッダーからログの形式を判定する（intervals / legacy / unknown）"""
+    if 'start' in header and 'duration_ms' in header:
+        return 'intervals'
+    if 'timestamp' in header:
+        return 'legacy'
+    return 'unknown'
+
+
+def read_header(filepath: str) -> List[str]:
+    """ログファイルのヘッダー行を取得（読めなければ空リスト）"""
+    for encoding in ENCODINGS:
+        try:
+            with open_log(filepath, encoding) as f:
+                return next(csv.reader(f), [])
+        except UnicodeDecodeError:
+            continue
+        except OSError:
+            return []
+    return []
+
+
+def is_legacy_log(filepath: str) -> bool:
+    """区間の列を持たない旧形式のログか"""
+    header = read_header(filepath)
+    return bool(header) and 'duration_ms' not in header
+
+
+def iter_rows(filepath: str) -> Iterator[Dict[str, str]]:
+    """ログファイルの行を順に返す（文字コードは自動判定）"""
+    # 文字コードの判定のため、先に全体を読めるか確認する
+    encoding = detect_encoding(filepath)
+    with open_log(filepath, encoding) as f:
+        yield from csv.DictReader(f)
+
+
+def write_records(filepath: str, records: Iterable[WindowInfo]) -> int:
+    """レコードをログファイルに追記し、書き込んだ行数を返す（新しいファイルにはヘッダーを書く）"""
+    mode = 'a' if os.path.exists(filepath) else 'w'
+    count = 0
+    with open(filepath, mode, encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        if mode == 'w':
+            writer.writeheader()
+        for record in records:
+            writer.writerow(record_to_row(record))
+            count += 1
+    return count
+
+
+def iter_intervals(source_path: str) -> Iterator[WindowInfo]:
+    """ログファイルを読み、区間を順に返す（旧形式は区間に変換する）
+
+    連続する2行の切り替え時刻から直前の行の区間を求める。
+    最後の行は終了時刻が分からないため end / duration_ms を空にする。
+    日付をまたぐ区間は0時で分割する。
+    """
+    sessionizer = Sessionizer()
+    for row in iter_rows(source_path):
+        record = row_to_record(row)
+        if record is None:
+            continue
+        if record.ended_at is not None:
+            # すでに区間形式の行はそのまま使う
+            yield from sessionizer.close(record.captured_at)
+            yield record
+            continue
+        yield from sessionizer.push(record)
+    if sessionizer.current is not None:
+        yield sessionizer.current
+
+
+def read_intervals(source_path: str) -> List[WindowInfo]:
+    """ログファイルを読み、区間のリストを返す（iter_intervals() を参照）"""
+    return list(iter_intervals(source_path))
+
+
+def convert_log_file(source_path: str, output_path: str) -> int:
+    """旧形式のログを区間形式に変換し、書き込んだ行数を返す（1行ずつ読み書きする）"""
+    temp_path = f"{output_path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    count = write_records(temp_path, iter_intervals(source_path))
+    os.replace(temp_path, output_path)
+    return count
+
+
+def converted_path(source_path: str, output_dir: Optional[str] = None) -> str:
+    """変換後のファイル名（*_activity_log.csv -> *_activity_intervals.csv）"""
+    directory, filename = os.path.split(source_path)
+    if filename.endswith('.gz'):
+        filename = filename[:-3]
+    name = filename.replace('_activity_log.csv', '_activity_intervals.csv')
+    if name == filename:
+        name = os.path.splitext(filename)[0] + '_intervals.csv'
+    return os.path.join(output_dir or directory, name)
@@ -4,9 +4,77 @@ import os
 from .utils.paths import get_config_path, ensure_dir_exists
 
 class Config:
+    # 既定値（既存の設定ファイルに存在しないキーもここから補完される）
+    DEFAULTS = {
+        'General': {
+            'log_retention_days': '30',  # ログの保持日数（0で無期限。SQLiteのストアにも適用）
+            'log_archive_dir': '',       # 保持期間を過ぎたログの移動先（空なら削除）
+            'log_compress': 'true',      # 前日以前のCSVログをgzipで圧縮する
+            'maintenance_interval': '3600',  # ログフォルダの保守処理の間隔（秒）
+            'buffer_size': '500',
+            'write_interval': '3',
+            'excluded_processes': 'explorer.exe,SystemSettings.exe',
+            'office_cache_timeout': '5',
+            'office_retry_interval': '5',
+            'office_com_timeout': '30',  # COMオブジェクトのアイドルタイムアウト（秒）
+            'office_com_call_timeout': '3',  # COM呼び出し1回あたりの期限（秒）
+            'cache_capacity': '50',      # キャッシュの最大容量
+            'event_source': 'auto',      # フォアグラウンド変更の検出方式 (auto / hook / poll / scripted)
+            'event_script': '',          # scripted で再生する切り替え（"待機秒数:hwnd" のカンマ区切り）
+            'scripted_windows': '',      # scripted で再生するウィンドウのタイトル（"hwnd=タイトル" のセミコロン区切り）
+            'poll_interval': '1',        # ポーリング方式の通常の確認間隔（秒）
+            'poll_interval_min': '0.25', # ウィンドウ切り替え直後の確認間隔（秒）
+            'poll_interval_max': '5',    # 変化がない場合の最大確認間隔（秒）
+            'poll_backoff_factor': '1.5', # 変化がない場合に間隔を伸ばす倍率
+            'poll_idle_after': '10',     # 変化がない状態がこの秒数続くと間隔を伸ばし始める
+            'poll_burst_duration': '3',  # 切り替え後に短い間隔を維持する秒数
+            'tick_report_interval': '60', # ティックレートを報告する間隔（秒、0で無効）
+            'process_cache_capacity': '256',  # プロセス情報キャッシュの最大エントリ数
+            'process_cache_refresh_interval': '30',  # プロセス一覧の一括更新間隔（秒）
+            'enrichment_workers': '2',   # 作業ディレクトリなどを補完するワーカー数
+            'enrichment_timeout': '10',  # 補完を待つ最大秒数（超えると補完なしで保存）
+            'explorer_index_interval': '2',  # Explorerのフォルダ対応表を差分更新する間隔（秒）
+            'document_search_roots': '~/Documents,~/Desktop,~/Downloads',  # Officeドキュメントを探すフォルダ
+            'document_index_depth': '2',  # 検索フォルダから潜る深さ
+            'document_index_capacity': '20000',  # ドキュメント位置インデックスの最大ファイル数
+            'document_index_interval': '300',  # ドキュメント位置インデックスの差分更新間隔（秒）
+            'pdf_resolve_timeout': '2',  # PDFのパス解決を待つ最大秒数
+            'idle_source': 'auto',       # 離席の検出方式 (auto / lastinput / scripted / none)
+            'idle_script': '',           # scripted で再生する入力時刻（開始からの秒数のカンマ区切り、省略時は開始時のみ）
+            'idle_threshold': '300',     # この秒数入力がなければ離席とみなす（0で無効）
+            'idle_check_interval': '5',  # 離席状態を確認する間隔（秒）
+            'string_pool_capacity': '10000',  # 共有する文字列（プロセス名・タイトルなど）の最大数
+            'log_fsync': 'interval',     # ログのfsync方針 (always / interval / never)
+            'log_fsync_interval': '10',  # interval方針でfsyncする最小間隔（秒）
+            'log_write_buffer': '65536',  # ログ書き込みバッファの大きさ（バイト）
+            'write_batch_size': '50',    # この件数溜まったらまとめて書き込む（write_interval秒経っても書き込む）
+            'write_queue_overflow': 'block',  # 書き込みキュー（buffer_size件）が満杯のときの動作 (block / drop_oldest / spill)
+            'journal_fsync': 'interval',  # ジャーナルのfsync方針 (always / interval / never / off で無効)
+            'journal_fsync_interval': '1',  # interval方針でジャーナルをfsyncする最小間隔（秒）
+            'dedup_window': '300',       # 同じウィンドウの連続検出を重複とみなす最大秒数（0で期限なし）
+            'dedup_memory': '64'         # 重複除外で覚えておく直近のウィンドウ状態の数
+        },
+        # ログの保存先の設定
+        'Storage': {
+            'backend': 'csv',            # 保存形式 (csv / sqlite / columnar)
+            'sqlite_path': ''            # SQLiteのデータベースファイル（空ならログフォルダの activity.db）
+        },
+        # モニター選択の設定
+        'Monitors': {
+            'priority': 'explorer,excel,word,powerpoint,browser,pdf,default'  # 判定の優先順位
+        },
+        # ブラウザ設定セクション
+        'Browser': {
+            'capture_urls': 'false',      # URL取得機能（拡張機能連携時のみ有効）
+            'enhanced_monitoring': 'false', # 拡張機能との連携
+            'track_tab_changes': 'false',  # タブ切り替え監視機能
+            'excluded_domains': 'example.com,internal.local'  # 監視対象外ドメイン
+        }
+    }
+
     def __init__(self, config_path=None):
         self.config = configparser.ConfigParser()
-        
+
         # 設定ファイルのパスを取得
         self.config_path = config_path if config_path else get_config_path()
         self.load_config()
@@ -14,44 +82,33 @@ class Config:
     def load_config(self):
         if not os.path.exists(self.config_path):
             self.create_default_config()
+        # 既定値を先に読み込み、設定ファイルの値で上書きする
+        self.config.read_dict(self.DEFAULTS)
         self.config.read(self.config_path, encoding='utf-8')
 
     def create_default_config(self):
-        self.config['General'] = {
-            'log_retention_days': '30',
-            'buffer_size': '500',
-            'write_interval': '3',
-            'excluded_processes': 'explorer.exe,SystemSettings.exe',
-            'office_cache_timeout': '5',
-            'office_retry_interval': '5',
-            'office_com_timeout': '30',  # COMオブジェクトのアイドルタイムアウト（秒）
-            'cache_capacity': '50'       # キャッシュの最大容量
-        }
-        
-        # ブラウザ設定セクションを追加
-        self.config['Browser'] = {
-            'capture_urls': 'false',      # URL取得機能（拡張機能連携時のみ有効）
-            'enhanced_monitoring': 'false', # 拡張機能との連携
-            'track_tab_changes': 'false',  # タブ切り替え監視機能
-            'excluded_domains': 'example.com,internal.local'  # 監視対象外ドメイン
-        }
-        
+        self.config.read_dict(self.DEFAULTS)
+
         # 設定ファイルのディレクトリが存在することを確認
         config_dir = os.path.dirname(self.config_path)
         ensure_dir_exists(config_dir)
-        
+
         with open(self.config_path, 'w', encoding='utf-8') as configfile:
             self.config.write(configfile)
 
     def get_value(self, section, key):
         return self.config.get(section, key)
-        
+
+    def get_bool(self, section, key):
+        """真偽値として設定値を取得する"""
+        return self.config.getboolean(section, key)
+
     def set_value(self, section, key, value):
         """設定値を更新し、ファイルに保存する"""
         if not self.config.has_section(section):
             self.config.add_section(section)
-            
+
         self.config.set(section, key, value)
-        
+
         with open(self.config_path, 'w', encoding='utf-8') as configfile:
             self.config.write(configfile)
\ No newline at end of file
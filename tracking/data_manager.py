@@ -1,22 +1,45 @@
 # data_manager.py
-import csv
 import os
-import re
+import json
 from datetime import datetime
-import shutil
 import threading
-import codecs
-from typing import List, Dict, Any, Optional, Set
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from .models.window_info import WindowInfo
+from .sessionizer import Sessionizer
+from .activity_log import sanitize_text, row_to_record
+from .storage.csv_writer import AppendOnlyCsvWriter
+from .storage.background_writer import BackgroundWriter
+from .storage.sqlite_store import SqliteActivityStore, default_sqlite_path
+from .storage.columnar import ColumnarLogWriter, columnar_to_csv
+from .storage.journal import WriteAheadJournal
+from .storage.daily_stats import DailyStatsIndex
 from .utils.paths import get_logs_dir, get_temp_dir, ensure_dir_exists
+from .utils.string_pool import get_string_pool
+
+# 一時ディレクトリ内のファイル（保守処理でも削除しない）
+JOURNAL_FILENAME = 'activity_journal.jsonl'
+SPILL_FILENAME = 'activity_spill.jsonl'
+
+# GUIスレッドから書き込みの完了を待つ最大時間（秒）
+FLUSH_TIMEOUT = 5.0
 
 class DataManager:
-    def __init__(self, buffer_size: int = 500):
-        self.buffer: List[WindowInfo] = []
+    def __init__(self, buffer_size: int = 500, enrichment_timeout: float = 10.0,
+                 fsync_policy: str = 'interval', fsync_interval: float = 10.0,
+                 write_buffer_size: int = 65536, batch_size: int = 50,
+                 write_interval: float = 3.0, overflow_policy: str = 'block',
+                 backend: str = 'csv', sqlite_path: Optional[str] = None,
+                 journal_fsync: Optional[str] = 'interval', journal_fsync_interval: float = 1.0):
         self.buffer_size = buffer_size
+        # 補完処理の完了を待つ最大秒数（キャプチャ時刻から）
+        self.enrichment_timeout = enrichment_timeout
+        # 区間の作成を保護する（書き込みはライタースレッドで行う）
         self.buffer_lock = threading.Lock()
-        # 重複検出用ハッシュセット
-        self.window_hash_set: Set[str] = set()
+        # 切り替えイベントを使用区間に変換する（ライターには閉じた区間だけを渡す）
+        self.sessionizer = Sessionizer()
+        # 最後に閉じた区間（GUI表示用）
+        self._last_closed: Optional[WindowInfo] = None
         
         # ログディレクトリとテンプディレクトリのパスを取得
         self.logs_dir = get_logs_dir()
@@ -24,101 +47,300 @@ class DataManager:
         
         self.setup_directories()
 
+        self.backend = backend
+        if backend == 'sqlite':
+            # SQLiteに保存する（CSVは export_csv() で書き出す）
+            self.writer = SqliteActivityStore(
+                sqlite_path or default_sqlite_path(self.logs_dir),
+                fsync_policy=fsync_policy
+            )
+        elif backend == 'columnar':
+            # 列指向のバイナリ形式で日ごとのファイルに追記する
+            self.writer = ColumnarLogWriter(
+                self.logs_dir,
+                fsync_policy=fsync_policy,
+                fsync_interval=fsync_interval
+            )
+        elif backend == 'csv':
+            # 日ごとのログファイルに追記する（ハンドルは開いたまま保持する）
+            self.writer = AppendOnlyCsvWriter(
+                self.logs_dir,
+                fsync_policy=fsync_policy,
+                fsync_interval=fsync_interval,
+                buffer_size=write_buffer_size
+            )
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        # 日ごとの件数などの統計情報（GUIはログを読み直さずにこれを使う）
+        self.stats_index = DailyStatsIndex(self.logs_dir)
+
+        # キューに入れた区間を先に記録しておくジャーナル（journal_fsync=None で無効）
+        self.journal: Optional[WriteAheadJournal] = None
+        if journal_fsync:
+            self.journal = WriteAheadJournal(
+                os.path.join(self.temp_dir, JOURNAL_FILENAME),
+                fsync_policy=journal_fsync,
+                fsync_interval=journal_fsync_interval
+            )
+        # 前回の書き込みが失敗したか（再試行で書き込み済みの分を飛ばす）
+        self._write_failed = False
+        # ジャーナルへの追記とキューへの投入の順序を揃える
+        self._enqueue_lock = threading.Lock()
+        self.spill_path = os.path.join(self.temp_dir, SPILL_FILENAME)
+
+        # キューに入れた区間をまとめて書き込むライタースレッド
+        self.background_writer = BackgroundWriter(
+            self._write_records,
+            capacity=buffer_size,
+            batch_size=batch_size,
+            max_batch_age=write_interval,
+            overflow_policy=overflow_policy,
+            spill_path=self.spill_path,
+            enrichment_timeout=enrichment_timeout,
+            on_commit=self.journal.checkpoint if self.journal else None
+        )
+
     def setup_directories(self):
         for directory in [self.logs_dir, self.temp_dir]:
             ensure_dir_exists(directory)
 
-    def _generate_window_hash(self, record: WindowInfo) -> str:
-        """WindowInfoから一意のハッシュを生成"""
-        return f"{record.process_id}_{record.process_name}_{record.window_title}"
-
     def add_record(self, record: Optional[WindowInfo]) -> None:
+        """レコードを追加する（書き込みはライタースレッドに任せ、ここでは待たない）
+
+        重複の除外はモニター側（DedupFilter）で済んでいるため、渡されたレコードはすべて記録する。
+        """
         if not record:
             return
 
-        window_hash = self._generate_window_hash(record)
-
         with self.buffer_lock:
-            # 重複チェック (同じウィンドウの場合はスキップ)
-            if window_hash in self.window_hash_set:
-                return
-                
-            # 新しいウィンドウとして追加
-            self.buffer.append(record)
-            self.window_hash_set.add(window_hash)
-            print(f"Record added to buffer. Buffer size: {len(self.buffer)}")
-            
-            if len(self.buffer) >= self.buffer_size * 0.8:
-                self.save_buffer()
-
-    def save_buffer(self) -> None:
-        if not self.buffer:
+            # 新しいウィンドウとして直前の区間を閉じる
+            closed = self.sessionizer.push(record)
+
+        self._enqueue(closed)
+
+    def _enqueue(self, records: List[WindowInfo]) -> None:
+        if not records:
             return
+        with self._enqueue_lock:
+            for record in records:
+                seq = self.journal.append(record) if self.journal else None
+                self.background_writer.put(record, seq)
+                self._last_closed = record
 
-        with self.buffer_lock:
-            current_date = datetime.now().strftime('%Y%m%d')
-            filename = f"{current_date}_activity_log.csv"
-            filepath = os.path.join(self.logs_dir, filename)
-            temp_filepath = os.path.join(self.temp_dir, f"temp_{filename}")
+    def recover(self) -> int:
+        """前回の異常終了でログに書き込まれなかったレコードを書き戻し、件数を返す
+
+        起動時、記録を始める前に呼ぶ。ジャーナルのチェックポイント以降のレコードのうち、
+        ログの最後の行（書き込み済みの最後の区間）より後のものだけを書き込む。
+        書き込む前に、ログと一致していない統計情報のサイドカーを作り直す。
+        """
+        self._verify_stats(datetime.now().strftime('%Y%m%d'))
+        if self.journal is None:
+            return self._recover_spill()
+
+        records = self.journal.pending()
+        # 退避ファイルのレコードはジャーナルにも含まれている
+        self._remove_spill_file()
+        if not records:
+            self.journal.reset()
+            return 0
+
+        records_by_date: Dict[str, List[WindowInfo]] = {}
+        for record in records:
+            date = datetime.fromtimestamp(record.captured_at).strftime('%Y%m%d')
+            records_by_date.setdefault(date, []).append(record)
+
+        replay: List[WindowInfo] = []
+        for date, date_records in records_by_date.items():
+            self._verify_stats(date)
+            # 最後に書き込まれた区間までは、ジャーナルのチェックポイント後でも書き込み済み
+            replay.extend(self._unsaved(date, date_records))
+
+        if replay:
+            self._write_records(replay)
+        self.journal.reset()
+        print(f"Recovered {len(replay)} records from journal ({len(records) - len(replay)} already saved)")
+        return len(replay)
+
+    def _verify_stats(self, date: str) -> None:
+        """サイドカーがログと一致していなければ、ログから作り直す"""
+        try:
+            if self.backend == 'sqlite':
+                byte_offset = None
+                stale = self.stats_index.is_stale(date, None, record_count=self.writer.count(date))
+            else:
+                byte_offset = self.writer.file_size(date)
+                if byte_offset is None:
+                    return
+                stale = self.stats_index.is_stale(date, byte_offset)
+            if stale:
+                self.stats_index.rebuild(date, self.writer.iter_day(date), byte_offset)
+                print(f"Rebuilt stats for {date}")
+        except Exception as e:
+            self._log_error(f"Error verifying stats for {date}: {str(e)}")
+
+    @staticmethod
+    def _same_interval(record: WindowInfo, saved: WindowInfo) -> bool:
+        # 保存形式によっては開始時刻がミリ秒で切り捨てられている
+        return abs(record.captured_at - saved.captured_at) < 0.001 and \
+            record.process_id == saved.process_id and \
+            sanitize_text(record.window_title) == sanitize_text(saved.window_title)
+
+    def _recover_spill(self) -> int:
+        """ジャーナルを使わない場合は、残っている退避ファイルだけを書き戻す"""
+        records = []
+        for path in (f"{self.spill_path}.draining", self.spill_path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = row_to_record(json.loads(line))
+                        except ValueError:
+                            continue
+                        if record is not None:
+                            records.append(record)
+            except OSError:
+                continue
+        if records:
+            self._write_records(records)
+        self._remove_spill_file()
+        return len(records)
 
+    def _remove_spill_file(self) -> None:
+        for path in (f"{self.spill_path}.draining", self.spill_path):
             try:
-                self._write_to_csv(temp_filepath)
-                print(f"Temporary file written: {temp_filepath}")
-                
-                shutil.copy2(temp_filepath, filepath)
-                print(f"Log file updated: {filepath}")
-                
-                # バッファとハッシュセットを両方クリア
-                self.buffer.clear()
-                self.window_hash_set.clear()
-            except Exception as e:
-                self._log_error(f"Error saving buffer: {str(e)}")
-                print(f"Error saving buffer: {str(e)}")
+                os.remove(path)
+            except OSError:
+                pass
+
+    @property
+    def current_record(self) -> Optional[WindowInfo]:
+        """現在開いている区間のレコード"""
+        return self.sessionizer.current
+
+    @property
+    def last_record(self) -> Optional[WindowInfo]:
+        """最新のレコード（開いている区間がなければ最後に閉じた区間）"""
+        return self.sessionizer.current or self._last_closed
+
+    @property
+    def queue_depth(self) -> int:
+        """書き込み待ちのレコード数"""
+        return self.background_writer.queue_depth
+
+    def close_session(self) -> None:
+        """開いている区間を現在時刻で閉じて書き込み待ちにする（終了時に呼ぶ）"""
+        with self.buffer_lock:
+            closed = self.sessionizer.close(time.time())
+        self._enqueue(closed)
+
+    def save_buffer(self, force: bool = False, timeout: Optional[float] = FLUSH_TIMEOUT) -> bool:
+        """定期保存の処理を行う
+
+        日付が変わっていれば開いている区間の前日分を書き込み待ちにする。
+        書き込み自体はライタースレッドがまとめて行う。force=True の場合は
+        補完を待たずに、書き込み待ちのレコードがすべて書き込まれるまで最大 timeout 秒待つ。
+        書き込みが終わらなかった場合は False を返す。
+        """
+        # 日付が変わっていれば開いている区間の前日分を閉じ、文字列プールを空にする
+        now = time.time()
+        with self.buffer_lock:
+            closed = self.sessionizer.rollover(now)
+        get_string_pool().clear_if_new_day(now)
+        self._enqueue(closed)
+
+        if force and not self.background_writer.flush(timeout=timeout):
+            print(f"書き込みが {timeout} 秒以内に完了しませんでした（書き込み待ち: {self.queue_depth}件）")
+            return False
+        return True
+
+    def _write_records(self, records: List[WindowInfo]) -> None:
+        """区間の開始日ごとのログファイルに書き込む（ライタースレッドから呼ばれる）"""
+        records_by_date: Dict[str, List[WindowInfo]] = {}
+        for record in records:
+            record.sync_enrichment()
+            date = datetime.fromtimestamp(record.captured_at).strftime('%Y%m%d')
+            records_by_date.setdefault(date, []).append(record)
+
+        try:
+            for date, date_records in records_by_date.items():
+                if self._write_failed:
+                    # 失敗したバッチの再試行では、前回書き込めた日の分を書き直さない
+                    date_records = self._unsaved(date, date_records)
+                    if not date_records:
+                        continue
+                if self.backend == 'sqlite':
+                    # 既存の区間と重複して挿入されなかった行は統計に数えない
+                    date_records = self.writer.insert_new(date_records)
+                    end_offset = None
+                else:
+                    end_offset = self.writer.append(date, date_records)
+                if date_records:
+                    self.stats_index.update(date, date_records, end_offset)
+                print(f"Log file updated: {self.writer.path_for(date)}")
+        except Exception as e:
+            self._write_failed = True
+            self._log_error(f"Error saving buffer: {str(e)}")
+            print(f"Error saving buffer: {str(e)}")
+            raise
+        self._write_failed = False
+
+    def _unsaved(self, date: str, records: List[WindowInfo]) -> List[WindowInfo]:
+        """records のうち、ログの最後の行より後のもの"""
+        tail = self.writer.tail_record(date)
+        if tail is not None:
+            for index in range(len(records) - 1, -1, -1):
+                if self._same_interval(records[index], tail):
+                    return records[index + 1:]
+        return records
+
+    def daily_stats(self, date: Optional[str] = None) -> Dict[str, Any]:
+        """date (YYYYMMDD、省略時は今日) の統計情報（ログは読まない）"""
+        return self.stats_index.get(date or datetime.now().strftime('%Y%m%d'))
+
+    def is_active_log(self, path: str) -> bool:
+        """path が書き込み中のログファイルかどうか（保守処理から呼ばれる）"""
+        current_path = self.writer.current_path
+        if not current_path:
+            return False
+        return os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(current_path))
+
+    def export_csv(self, date: Optional[str] = None, timeout: Optional[float] = FLUSH_TIMEOUT) -> Tuple[str, bool]:
+        """date (YYYYMMDD、省略時は今日) のログをCSVとして書き出し、(パス, 書き込み待ちをすべて含むか) を返す
+
+        書き込み待ちのレコードは最大 timeout 秒待ち、終わらなければ書き込み済みの分だけを書き出す。
+        CSVバックエンドではログファイルそのものを返す。
+        """
+        date = date or datetime.now().strftime('%Y%m%d')
+        complete = self.save_buffer(force=True, timeout=timeout)
+        output_path = os.path.join(self.logs_dir, AppendOnlyCsvWriter.log_filename(date))
+        if self.backend == 'sqlite':
+            self.writer.export_csv(date, output_path)
+            return output_path, complete
+        if self.backend == 'columnar':
+            source_path = self.writer.path_for(date)
+            if os.path.exists(source_path):
+                columnar_to_csv(source_path, output_path)
+            return output_path, complete
+        return self.writer.path_for(date), complete
 
     def _sanitize_text(self, text: str) -> str:
         """文字列をサニタイズする"""
-        if not text:
-            return ""
-            
-        # 制御文字や特殊文字を削除
-        sanitized = re.sub(r'[\u0000-\u001F\u007F-\u009F\u200B-\u200F\u2028-\u202F]', '', text)
-        return sanitized
-
-    def _write_to_csv(self, filepath: str) -> None:
-        fieldnames = [
-            'timestamp',
-            'process_name',
-            'window_title',
-            'process_id',
-            'application_name',
-            'application_path',
-            'working_directory',
-            'monitor_type',
-            'is_new_document',
-            'office_app_type'
-        ]
-
-        mode = 'a' if os.path.exists(filepath) else 'w'
-        
-        # codecs.openの代わりに標準のopen関数を使用する
-        with open(filepath, mode, encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            if mode == 'w':
-                writer.writeheader()
-            
-            for record in self.buffer:
-                writer.writerow({
-                    'timestamp': record.timestamp,
-                    'process_name': record.process_name,
-                    'window_title': self._sanitize_text(record.window_title),
-                    'process_id': record.process_id,
-                    'application_name': record.application_name,
-                    'application_path': self._sanitize_text(record.application_path),
-                    'working_directory': self._sanitize_text(record.working_directory),
-                    'monitor_type': record.monitor_type,
-                    'is_new_document': record.is_new_document,
-                    'office_app_type': record.office_app_type or ''
-                })
+        return sanitize_text(text)
+
+    def close(self) -> None:
+        """書き込み待ちのレコードを書き込んでからログファイルを閉じる（終了時に呼ぶ）"""
+        self.background_writer.stop()
+        self.writer.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'writer': self.background_writer.stats(),
+            'journal': self.journal.stats() if self.journal else None,
+            'log_file': self.writer.stats()
+        }
 
     def _log_error(self, error_message: str) -> None:
         error_log_path = os.path.join(self.logs_dir, 'tracking_error.log')
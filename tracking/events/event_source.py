@@ -0,0 +1,336 @@
+# event_source.py
+"""フォアグラウンドウィンドウ変更イベントのソース
+
+監視スレッドは ``wait()`` でイベントを待ち、イベントが届いたときだけ
+ウィンドウ情報の取得を行う。Windowsではフックで即時に通知を受け、
+フックが使えない環境ではポーリングにフォールバックする。
+Windows以外の環境では、設定した切り替えを再生する scripted を選べる。
+"""
+import sys
+import time
+import queue
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Callable, Iterable, Tuple, List, Dict, Any
+
+
+@dataclass(frozen=True)
+class ForegroundEvent:
+    """フォアグラウンド変更イベント"""
+    hwnd: int
+    timestamp: float = field(default_factory=time.time)
+    source: str = 'poll'  # 'hook', 'poll', 'scripted'
+
+
+class BaseEventSource:
+    """イベントソースの基底クラス"""
+
+    name = 'base'
+    # スケジューラから定期的に poll() を呼ぶ必要があるか
+    needs_polling = False
+
+    def __init__(self):
+        self._queue: "queue.Queue[ForegroundEvent]" = queue.Queue()
+        self._running = False
+        self.event_count = 0
+
+    def start(self) -> None:
+        self._running = True
+
+    def stop(self) -> None:
+        self._running = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def push(self, hwnd: int, timestamp: Optional[float] = None) -> None:
+        """イベントをパイプラインに投入する（任意のスレッドから呼び出し可）"""
+        event = ForegroundEvent(
+            hwnd=hwnd,
+            timestamp=timestamp if timestamp is not None else time.time(),
+            source=self.name
+        )
+        self._queue.put(event)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[ForegroundEvent]:
+        """次のイベントを待つ（タイムアウト時はNone）
+
+        溜まっているイベントは最新の1件にまとめて返す。
+        """
+        try:
+            event = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        # 連続したイベントは最後のものだけを処理する
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        self.event_count += 1
+        return event
+
+    def poll(self) -> bool:
+        """能動的な確認（プッシュ型のソースでは何もしない）"""
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {'source': self.name, 'events': self.event_count}
+
+
+def _require_win32gui() -> None:
+    """ポーリングに必要な pywin32 (win32gui) がなければ例外を投げる"""
+    try:
+        import win32gui  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "win32gui (pywin32) is not available; "
+            "set General.event_source = scripted to run without Windows"
+        ) from e
+
+
+def parse_event_script(text: str) -> List[Tuple[float, int]]:
+    """"待機秒数:hwnd" のカンマ区切りを ScriptedEventSource の script に変換する"""
+    script = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        delay, _, hwnd = item.partition(':')
+        try:
+            script.append((float(delay), int(hwnd, 0)))
+        except ValueError:
+            raise ValueError(f"Invalid event_script entry: {item!r} (expected seconds:hwnd)")
+    return script
+
+
+def _default_foreground_probe() -> Tuple[int, str]:
+    """現在のフォアグラウンドウィンドウのハンドルとタイトルを取得"""
+    import win32gui
+    hwnd = win32gui.GetForegroundWindow()
+    return hwnd, win32gui.GetWindowText(hwnd)
+
+
+class PollingEventSource(BaseEventSource):
+    """フォアグラウンドウィンドウを能動的に確認するフォールバック実装
+
+    確認の間隔はスケジューラが決め、poll() でハンドルかタイトルが
+    変わったときだけイベントを発行する。
+    """
+
+    name = 'poll'
+    needs_polling = True
+
+    def __init__(self, probe: Optional[Callable[[], Tuple[int, str]]] = None):
+        super().__init__()
+        self._probe = probe or _default_foreground_probe
+        self._last_state: Optional[Tuple[int, str]] = None
+        self.probe_failures = 0
+
+    def poll(self) -> bool:
+        """フォアグラウンドを1回確認し、変化していればイベントを発行する"""
+        try:
+            state = self._probe()
+        except Exception as e:
+            # 失敗が続く場合に毎回出力しないよう、警告は最初の1回だけにする
+            self.probe_failures += 1
+            if self.probe_failures == 1:
+                logging.warning(f"Foreground probe failed: {e}")
+            else:
+                logging.debug(f"Foreground probe failed: {e}")
+            return False
+        if state != self._last_state:
+            self._last_state = state
+            self.push(state[0])
+            return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats['probe_failures'] = self.probe_failures
+        return stats
+
+
+class ScriptedEventSource(BaseEventSource):
+    """あらかじめ用意したスクリプトに従ってイベントを発行するソース
+
+    Windows以外の環境での動作確認やテストに使用する。
+    script は (直前のイベントからの待機秒数, hwnd) のリスト。
+    """
+
+    name = 'scripted'
+
+    def __init__(self, script: Optional[Iterable[Tuple[float, int]]] = None):
+        super().__init__()
+        self._script: List[Tuple[float, int]] = list(script or [])
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.finished = threading.Event()
+
+    def start(self) -> None:
+        super().start()
+        self._stop_event.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._play, daemon=True)
+        self._thread.start()
+
+    def _play(self) -> None:
+        for delay, hwnd in self._script:
+            if self._stop_event.wait(delay):
+                break
+            self.push(hwnd)
+        self.finished.set()
+
+    def stop(self) -> None:
+        super().stop()
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+
+class WinEventHookSource(BaseEventSource):
+    """SetWinEventHook によるフォアグラウンド変更フック
+
+    専用スレッドでメッセージループを回し、フォアグラウンドの切り替えと
+    フォアグラウンドウィンドウのタイトル変更（タブ切り替えなど）を通知する。
+    """
+
+    name = 'hook'
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        super().__init__()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._hook_error: Optional[str] = None
+        self._callback = None
+
+    def start(self) -> None:
+        if sys.platform != 'win32':
+            raise OSError("WinEventHook is only available on Windows")
+
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self._hook_error or not self._ready.is_set():
+            raise OSError(self._hook_error or "WinEventHook did not start")
+        super().start()
+
+    def _run(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+        ]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        user32.GetForegroundWindow.restype = wintypes.HWND
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            try:
+                if not hwnd:
+                    return
+                if event == self.EVENT_OBJECT_NAMECHANGE:
+                    # フォアグラウンドウィンドウ自身のタイトル変更のみ対象
+                    if id_object != self.OBJID_WINDOW or id_child != 0:
+                        return
+                    if hwnd != user32.GetForegroundWindow():
+                        return
+                self.push(hwnd)
+            except Exception as e:
+                logging.debug(f"WinEvent callback error: {e}")
+
+        # コールバックがGCで解放されないよう参照を保持
+        self._callback = WinEventProc(on_event)
+        self._thread_id = kernel32.GetCurrentThreadId()
+
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        hooks = []
+        for event_id in (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_OBJECT_NAMECHANGE):
+            handle = user32.SetWinEventHook(event_id, event_id, 0, self._callback, 0, 0, flags)
+            if not handle:
+                self._hook_error = f"SetWinEventHook failed for event 0x{event_id:04X}"
+                for h in hooks:
+                    user32.UnhookWinEvent(h)
+                self._ready.set()
+                return
+            hooks.append(handle)
+
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for h in hooks:
+            user32.UnhookWinEvent(h)
+
+    def stop(self) -> None:
+        super().stop()
+        if self._thread_id:
+            try:
+                import ctypes
+                ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+            except Exception as e:
+                logging.debug(f"Failed to stop WinEvent hook thread: {e}")
+        if self._thread:
+            self._thread.join(timeout=1)
+
+
+def create_event_source(config) -> BaseEventSource:
+    """設定に従ってイベントソースを作成し開始する
+
+    General.event_source:
+        auto - フックを試し、使えなければポーリング
+        hook - フックのみ（失敗時もポーリングへフォールバック）
+        poll - 従来どおりのポーリング
+        scripted - General.event_script の切り替えを再生する（Windows以外での動作確認用）
+
+    ポーリングに必要な win32gui が使えない場合は RuntimeError を投げる。
+    """
+    mode = config.get_value('General', 'event_source').strip().lower()
+    if mode not in ('auto', 'hook', 'poll', 'scripted'):
+        raise ValueError(f"Unknown event source: {mode}")
+
+    if mode == 'scripted':
+        source = ScriptedEventSource(parse_event_script(config.get_value('General', 'event_script')))
+        source.start()
+        print("スクリプトのイベントを再生します")
+        return source
+
+    if mode in ('auto', 'hook'):
+        source = WinEventHookSource()
+        try:
+            source.start()
+            print("フォアグラウンド変更フックを使用します")
+            return source
+        except Exception as e:
+            logging.warning(f"WinEventHook unavailable, falling back to polling: {e}")
+
+    _require_win32gui()
+    source = PollingEventSource()
+    source.start()
+    print("ポーリング方式で監視します")
+    return source
\ No newline at end of file
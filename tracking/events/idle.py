@@ -0,0 +1,184 @@
+# idle.py
+"""入力のない状態（離席）の検出
+
+最後の入力からの経過時間を入力アイドルソースから取得し、しきい値を超えたら
+アイドル状態とみなす。アイドル中は最後のフォアグラウンドウィンドウを使用中として
+記録し続けないよう、監視スレッドが補完の停止やアイドルマーカーの記録を行う。
+"""
+import sys
+import time
+import logging
+from typing import Optional, Iterable, List, Callable, Dict, Any
+
+
+class BaseIdleSource:
+    """入力アイドルソースの基底クラス"""
+
+    name = 'base'
+
+    def idle_seconds(self) -> float:
+        """最後のキーボード・マウス入力からの経過秒数"""
+        raise NotImplementedError("Subclasses must implement idle_seconds()")
+
+
+class LastInputIdleSource(BaseIdleSource):
+    """GetLastInputInfo による入力アイドル時間の取得（Windows）"""
+
+    name = 'lastinput'
+
+    def __init__(self):
+        if sys.platform != 'win32':
+            raise OSError("GetLastInputInfo is only available on Windows")
+
+        import ctypes
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [('cbSize', wintypes.UINT), ('dwTime', wintypes.DWORD)]
+
+        self._ctypes = ctypes
+        self._info = LASTINPUTINFO()
+        self._info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.GetTickCount.restype = wintypes.DWORD
+
+    def idle_seconds(self) -> float:
+        if not self._user32.GetLastInputInfo(self._ctypes.byref(self._info)):
+            return 0.0
+        # GetTickCountは約49.7日で一周するため32ビットで差を取る
+        elapsed_ms = (self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF
+        return elapsed_ms / 1000.0
+
+
+class ScriptedIdleSource(BaseIdleSource):
+    """あらかじめ用意した入力時刻に従うソース
+
+    Windows以外の環境での動作確認やテストに使用する。
+    inputs は開始からの秒数で表した入力時刻のリスト。
+    record_input() で任意の時点の入力を追加することもできる。
+    """
+
+    name = 'scripted'
+
+    def __init__(self, inputs: Optional[Iterable[float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._started = clock()
+        self._inputs: List[float] = sorted(inputs or [0.0])
+
+    def record_input(self) -> None:
+        self._inputs.append(self._clock() - self._started)
+        self._inputs.sort()
+
+    def idle_seconds(self) -> float:
+        elapsed = self._clock() - self._started
+        last_input = 0.0
+        for at in self._inputs:
+            if at > elapsed:
+                break
+            last_input = at
+        return elapsed - last_input
+
+
+class IdleDetector:
+    """入力アイドル時間をしきい値と比較し、状態の変化を通知する"""
+
+    BECAME_IDLE = 'idle'
+    BECAME_ACTIVE = 'active'
+
+    def __init__(self, source: BaseIdleSource, threshold: float = 300.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Parameters:
+            source (BaseIdleSource): 入力アイドル時間の取得方法
+            threshold (float): この秒数入力がなければアイドルとみなす
+        """
+        self.source = source
+        self.threshold = threshold
+        self._clock = clock
+        self.is_idle = False
+        # アイドルが始まった時刻（最後の入力時刻、UNIX時間）
+        self.idle_since: Optional[float] = None
+
+        # 統計情報
+        self.idle_periods = 0
+        self.total_idle_seconds = 0.0
+
+    def check(self) -> Optional[str]:
+        """状態を確認し、変化があれば BECAME_IDLE / BECAME_ACTIVE を返す"""
+        try:
+            idle_seconds = self.source.idle_seconds()
+        except Exception as e:
+            logging.debug(f"Idle source failed: {e}")
+            return None
+
+        now = self._clock()
+        if not self.is_idle and idle_seconds >= self.threshold:
+            self.is_idle = True
+            self.idle_since = now - idle_seconds
+            self.idle_periods += 1
+            return self.BECAME_IDLE
+        if self.is_idle and idle_seconds < self.threshold:
+            self.is_idle = False
+            self.total_idle_seconds += max(0.0, now - idle_seconds - self.idle_since)
+            self.idle_since = None
+            return self.BECAME_ACTIVE
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'source': self.source.name,
+            'is_idle': self.is_idle,
+            'idle_periods': self.idle_periods,
+            'total_idle_seconds': self.total_idle_seconds
+        }
+
+
+def parse_idle_script(text: str) -> List[float]:
+    """"入力時刻（開始からの秒数）" のカンマ区切りを ScriptedIdleSource の inputs に変換する"""
+    inputs = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            inputs.append(float(item))
+        except ValueError:
+            raise ValueError(f"Invalid idle_script entry: {item!r} (expected seconds)")
+    return inputs
+
+
+def create_idle_detector(config) -> Optional[IdleDetector]:
+    """設定に従ってアイドル検出器を作成する（無効・利用不可ならNone）
+
+    General.idle_source:
+        auto      - GetLastInputInfo を使う。使えなければ、event_source が scripted の
+                    場合は scripted、それ以外は検出しない
+        lastinput - GetLastInputInfo のみ（使えなければ RuntimeError）
+        scripted  - General.idle_script の入力時刻を再生する（Windows以外での動作確認用）
+        none      - アイドル検出を行わない
+    """
+    mode = config.get_value('General', 'idle_source').strip().lower()
+    if mode not in ('auto', 'lastinput', 'scripted', 'none'):
+        raise ValueError(f"Unknown idle source: {mode}")
+    threshold = float(config.get_value('General', 'idle_threshold'))
+    if mode == 'none' or threshold <= 0:
+        return None
+
+    if mode in ('auto', 'lastinput'):
+        try:
+            source = LastInputIdleSource()
+        except Exception as e:
+            if mode == 'lastinput':
+                raise RuntimeError(f"idle_source = lastinput is unavailable: {e}") from e
+            if config.get_value('General', 'event_source').strip().lower() != 'scripted':
+                logging.warning(f"Idle detection unavailable: {e}")
+                return None
+            # 切り替えを再生している場合は、入力も再生する
+            mode = 'scripted'
+
+    if mode == 'scripted':
+        source = ScriptedIdleSource(parse_idle_script(config.get_value('General', 'idle_script')))
+    print(f"アイドル検出を使用します（{source.name}、しきい値: {threshold:.0f}秒）")
+    return IdleDetector(source, threshold)
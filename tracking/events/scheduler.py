@@ -0,0 +1,225 @@
+# scheduler.py
+"""監視スレッドのタイマーキュー
+
+ポーリングと定期保存を1つのタイマーキューで管理する。ポーリング間隔は
+ウィンドウ切り替え直後は短く（バースト）、同じウィンドウが続くと
+徐々に長くなる（アイドルバックオフ）。ユーザーが離席している間は最大間隔で確認する。
+"""
+import time
+import heapq
+import itertools
+from collections import deque
+from typing import List, Tuple, Dict, Any, Optional, Callable
+
+
+class AdaptiveScheduler:
+    """適応型ポーリングスケジューラ"""
+
+    TASK_POLL = 'poll'
+    TASK_FLUSH = 'flush'
+    TASK_REPORT = 'report'
+    TASK_IDLE = 'idle'
+
+    def __init__(self,
+                 poll_interval: float = 1.0,
+                 min_interval: float = 0.25,
+                 max_interval: float = 5.0,
+                 backoff_factor: float = 1.5,
+                 idle_after: float = 10.0,
+                 burst_duration: float = 3.0,
+                 flush_interval: float = 3.0,
+                 report_interval: float = 60.0,
+                 idle_check_interval: float = 0.0,
+                 polling_enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Parameters:
+            poll_interval (float): 通常時のポーリング間隔（秒）
+            min_interval (float): 切り替え直後（バースト中）のポーリング間隔（秒）
+            max_interval (float): バックオフ時の最大ポーリング間隔（秒）
+            backoff_factor (float): 変化がないときに間隔を伸ばす倍率
+            idle_after (float): 変化がない状態がこの秒数続くとバックオフを開始
+            burst_duration (float): 切り替え後に短い間隔を維持する秒数
+            flush_interval (float): バッファの定期保存間隔（秒）
+            report_interval (float): ティックレートを報告する間隔（秒）
+            idle_check_interval (float): 入力アイドル状態を確認する間隔（秒、0で無効）
+            polling_enabled (bool): ポーリングを行うか（フック使用時はFalse）
+        """
+        self.base_interval = poll_interval
+        self.min_interval = min(min_interval, poll_interval)
+        self.max_interval = max(max_interval, poll_interval)
+        self.backoff_factor = max(1.0, backoff_factor)
+        self.idle_after = idle_after
+        self.burst_duration = burst_duration
+        self.flush_interval = flush_interval
+        self.report_interval = report_interval
+        self.idle_check_interval = idle_check_interval
+        self.polling_enabled = polling_enabled
+        self._clock = clock
+
+        self.poll_interval = poll_interval
+        self._timers: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._scheduled: Dict[str, float] = {}
+
+        now = self._clock()
+        self._last_change = now
+        self._burst_until = now
+        # ユーザーが離席中か（アイドル中はポーリングを最大間隔にする）
+        self.idle = False
+        # 直近の起床時刻（実測ティックレートの算出用）。タイマーとイベントを分けて記録する
+        self._tick_times: deque = deque()
+        self._event_times: deque = deque()
+        self._tick_window = 60.0
+        self.tick_count = 0
+        self.event_wakeups = 0
+
+        if self.polling_enabled:
+            self.schedule(self.TASK_POLL, 0)
+        self.schedule(self.TASK_FLUSH, self.flush_interval)
+        if self.report_interval > 0:
+            self.schedule(self.TASK_REPORT, self.report_interval)
+        if self.idle_check_interval > 0:
+            self.schedule(self.TASK_IDLE, self.idle_check_interval)
+
+    @classmethod
+    def from_config(cls, config, polling_enabled: bool = True,
+                    idle_detection: bool = False) -> 'AdaptiveScheduler':
+        """Config の General セクションから作成"""
+        def value(key):
+            return float(config.get_value('General', key))
+
+        return cls(
+            poll_interval=value('poll_interval'),
+            min_interval=value('poll_interval_min'),
+            max_interval=value('poll_interval_max'),
+            backoff_factor=value('poll_backoff_factor'),
+            idle_after=value('poll_idle_after'),
+            burst_duration=value('poll_burst_duration'),
+            flush_interval=value('write_interval'),
+            report_interval=value('tick_report_interval'),
+            idle_check_interval=value('idle_check_interval') if idle_detection else 0.0,
+            polling_enabled=polling_enabled
+        )
+
+    def schedule(self, task: str, delay: float) -> None:
+        """タスクを delay 秒後に予約（同名タスクは置き換え）"""
+        due = self._clock() + max(0.0, delay)
+        self._scheduled[task] = due
+        heapq.heappush(self._timers, (due, next(self._seq), task))
+
+    def next_timeout(self) -> Optional[float]:
+        """次のタスクまでの秒数（予約がなければNone）"""
+        while self._timers:
+            due, _, task = self._timers[0]
+            # 置き換えられた古い予約は捨てる
+            if self._scheduled.get(task) != due:
+                heapq.heappop(self._timers)
+                continue
+            return max(0.0, due - self._clock())
+        return None
+
+    def pop_due(self, woken_by_event: bool = False) -> List[str]:
+        """期限が来たタスクを取り出し、周期タスクは次回を予約する
+
+        待機から戻るたびに呼ぶ。woken_by_event はイベントが届いて戻ったか
+        （イベントによる起床はタスクがなくても1回の起床として数える）。
+        """
+        now = self._clock()
+        due_tasks = []
+        while self._timers and self._timers[0][0] <= now:
+            due, _, task = heapq.heappop(self._timers)
+            if self._scheduled.get(task) != due:
+                continue
+            del self._scheduled[task]
+            due_tasks.append(task)
+
+        if woken_by_event:
+            self.event_wakeups += 1
+            self._record(self._event_times, now)
+        elif due_tasks:
+            self.tick_count += 1
+            self._record(self._tick_times, now)
+
+        # ポーリングの次回予約は結果の通知時（notify_*）に行う
+        for task in due_tasks:
+            if task == self.TASK_FLUSH:
+                self.schedule(self.TASK_FLUSH, self.flush_interval)
+            elif task == self.TASK_REPORT:
+                self.schedule(self.TASK_REPORT, self.report_interval)
+            elif task == self.TASK_IDLE:
+                self.schedule(self.TASK_IDLE, self.idle_check_interval)
+        return due_tasks
+
+    def notify_switch(self) -> None:
+        """ウィンドウ切り替えを通知（バーストモードに入る）"""
+        now = self._clock()
+        self._last_change = now
+        self._burst_until = now + self.burst_duration
+        self.poll_interval = self.min_interval
+        if self.polling_enabled:
+            self.schedule(self.TASK_POLL, self.poll_interval)
+
+    def notify_unchanged(self) -> None:
+        """ポーリングで変化がなかったことを通知（必要ならバックオフ）"""
+        now = self._clock()
+        if self.idle:
+            self.poll_interval = self.max_interval
+        elif now < self._burst_until:
+            self.poll_interval = self.min_interval
+        elif now - self._last_change < self.idle_after:
+            self.poll_interval = self.base_interval
+        else:
+            self.poll_interval = min(
+                max(self.poll_interval, self.base_interval) * self.backoff_factor,
+                self.max_interval
+            )
+        if self.polling_enabled:
+            self.schedule(self.TASK_POLL, self.poll_interval)
+
+    def set_idle(self, idle: bool) -> None:
+        """離席状態を通知（アイドル中は最大間隔、復帰時は通常の間隔に戻す）"""
+        self.idle = idle
+        if idle:
+            self.poll_interval = self.max_interval
+        else:
+            self._last_change = self._clock()
+            self.poll_interval = self.base_interval
+        if self.polling_enabled:
+            self.schedule(self.TASK_POLL, self.poll_interval)
+
+    def _record(self, times: deque, now: float) -> None:
+        times.append(now)
+        self._expire(times, now)
+
+    def _expire(self, times: deque, now: float) -> None:
+        while times and now - times[0] > self._tick_window:
+            times.popleft()
+
+    def _rate(self, times: deque) -> float:
+        self._expire(times, self._clock())
+        return len(times) / self._tick_window
+
+    def timer_rate(self) -> float:
+        """直近60秒間のタイマーによる起床回数/秒"""
+        return self._rate(self._tick_times)
+
+    def event_rate(self) -> float:
+        """直近60秒間のイベントによる起床回数/秒"""
+        return self._rate(self._event_times)
+
+    def tick_rate(self) -> float:
+        """直近60秒間の実測ティックレート（タイマーとイベントを合わせた起床回数/秒）"""
+        return self.timer_rate() + self.event_rate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tick_rate': self.tick_rate(),
+            'timer_rate': self.timer_rate(),
+            'event_rate': self.event_rate(),
+            'poll_interval': self.poll_interval,
+            'ticks': self.tick_count,
+            'event_wakeups': self.event_wakeups,
+            'polling_enabled': self.polling_enabled,
+            'idle': self.idle
+        }
\ No newline at end of file
@@ -2,7 +2,6 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import psutil
-from datetime import datetime
 import os
 from typing import Optional
 from .version import __version__, __app_name__
@@ -74,25 +73,14 @@ class TrackerGUI:
         memory_mb = process.memory_info().rss / 1024 / 1024
         self.memory_label.config(text=f"メモリ使用量: {memory_mb:.1f} MB")
         
-        current_date = datetime.now().strftime('%Y%m%d')
-        log_file = os.path.join(self.data_manager.logs_dir, f"{current_date}_activity_log.csv")
-        record_count = 0
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    record_count = sum(1 for line in f) - 1
-            except UnicodeDecodeError:
-                try:
-                    with open(log_file, 'r', encoding='shift-jis', errors='ignore') as f:
-                        record_count = sum(1 for line in f) - 1
-                except Exception as e:
-                    print(f"Error reading log file: {e}")
+        # 件数は書き込みのたびに更新される統計情報から取得する（ログは読み直さない）
+        record_count = self.data_manager.daily_stats()['record_count']
 
         self.record_count_label.config(text=f"今日の記録数: {record_count}")
 
-        # 最新レコードの情報を更新
-        if self.data_manager.buffer:
-            latest_record = self.data_manager.buffer[-1]
+        # 最新レコード（現在開いている区間）の情報を更新
+        latest_record = self.data_manager.last_record
+        if latest_record is not None:
             
             # モニタータイプの表示
             monitor_type = latest_record.monitor_type
@@ -118,8 +106,15 @@ class TrackerGUI:
             self.is_running = True
 
     def export_csv(self):
-        self.data_manager.save_buffer()
-        messagebox.showinfo("エクスポート完了", f"データを {self.data_manager.logs_dir} に保存しました。")
+        output_path, complete = self.data_manager.export_csv()
+        if not complete:
+            messagebox.showwarning(
+                "エクスポート完了",
+                f"データを {output_path} に保存しました。\n"
+                f"書き込みが完了していない {self.data_manager.queue_depth} 件は含まれていません。"
+            )
+            return
+        messagebox.showinfo("エクスポート完了", f"データを {output_path} に保存しました。")
 
     def open_logs_folder(self):
         os.startfile(self.data_manager.logs_dir)
@@ -130,7 +125,21 @@ class TrackerGUI:
 
     def quit_app(self):
         if messagebox.askyesno("終了確認", "アプリケーションを終了してもよろしいですか？"):
-            self.data_manager.save_buffer()
+            # 開いている区間を閉じてから保存する
+            self.data_manager.close_session()
+            if not self.data_manager.save_buffer(force=True):
+                # 書き込めなかったレコードはジャーナルに残り、次回起動時に書き戻される
+                if self.data_manager.journal is not None:
+                    consequence = "終了すると次回起動時に書き込みます。"
+                else:
+                    consequence = "終了するとこれらのレコードは失われます。"
+                if not messagebox.askyesno(
+                    "終了確認",
+                    f"{self.data_manager.queue_depth} 件の書き込みが完了していません。\n"
+                    f"{consequence}終了してもよろしいですか？"
+                ):
+                    return
+            self.data_manager.close()
             self.root.destroy()
 
     def run(self):
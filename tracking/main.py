@@ -1,8 +1,16 @@
 # main.py
 from .config import Config
 from .data_manager import DataManager
+from .storage.maintenance import LogMaintenance
 from .gui import TrackerGUI
 from .monitors.monitor_facade import WindowMonitorFacade
+from .events.event_source import create_event_source
+from .events.scheduler import AdaptiveScheduler
+from .events.idle import IdleDetector, create_idle_detector
+from .models.window_info import WindowInfo
+from .utils.process_cache import get_process_cache
+from .utils.document_index import get_document_index
+from .utils.string_pool import get_string_pool
 import threading
 import time
 import sys
@@ -13,10 +21,53 @@ def main():
     
     # Initialize components
     config = Config()
-    monitor = WindowMonitorFacade()
+    get_process_cache().configure(
+        capacity=int(config.get_value('General', 'process_cache_capacity')),
+        refresh_interval=float(config.get_value('General', 'process_cache_refresh_interval'))
+    )
+    get_document_index().configure(
+        roots=[r.strip() for r in config.get_value('General', 'document_search_roots').split(',') if r.strip()],
+        max_depth=int(config.get_value('General', 'document_index_depth')),
+        capacity=int(config.get_value('General', 'document_index_capacity')),
+        refresh_interval=float(config.get_value('General', 'document_index_interval'))
+    )
+    get_string_pool().configure(
+        capacity=int(config.get_value('General', 'string_pool_capacity'))
+    )
+    monitor = WindowMonitorFacade(config)
+    journal_fsync = config.get_value('General', 'journal_fsync').strip().lower()
     data_manager = DataManager(
-        buffer_size=int(config.get_value('General', 'buffer_size'))
+        buffer_size=int(config.get_value('General', 'buffer_size')),
+        enrichment_timeout=float(config.get_value('General', 'enrichment_timeout')),
+        fsync_policy=config.get_value('General', 'log_fsync').strip().lower(),
+        fsync_interval=float(config.get_value('General', 'log_fsync_interval')),
+        write_buffer_size=int(config.get_value('General', 'log_write_buffer')),
+        batch_size=int(config.get_value('General', 'write_batch_size')),
+        write_interval=float(config.get_value('General', 'write_interval')),
+        overflow_policy=config.get_value('General', 'write_queue_overflow').strip().lower(),
+        backend=config.get_value('Storage', 'backend').strip().lower(),
+        sqlite_path=config.get_value('Storage', 'sqlite_path').strip() or None,
+        journal_fsync=journal_fsync if journal_fsync != 'off' else None,
+        journal_fsync_interval=float(config.get_value('General', 'journal_fsync_interval'))
+    )
+    # 前回異常終了した場合は、ログに書き込まれていないレコードを書き戻す
+    try:
+        data_manager.recover()
+    except Exception as e:
+        print(f"ジャーナルの回復エラー: {e}")
+
+    # 古いログの圧縮・削除と一時ファイルの掃除をバックグラウンドで行う
+    maintenance = LogMaintenance(
+        data_manager.logs_dir,
+        data_manager.temp_dir,
+        retention_days=int(config.get_value('General', 'log_retention_days')),
+        archive_dir=config.get_value('General', 'log_archive_dir').strip() or None,
+        compress=config.get_bool('General', 'log_compress'),
+        interval=float(config.get_value('General', 'maintenance_interval')),
+        is_active=data_manager.is_active_log,
+        store=data_manager.writer if data_manager.backend == 'sqlite' else None
     )
+    maintenance.start()
 
     # Initialize GUI
     gui = TrackerGUI(data_manager)
@@ -24,26 +75,78 @@ def main():
     # Monitoring thread function
     def monitor_windows():
         try:
-            write_interval = int(config.get_value('General', 'write_interval'))
-            last_write = time.time()
+            event_source = create_event_source(config)
+            idle_detector = create_idle_detector(config)
+            scheduler = AdaptiveScheduler.from_config(
+                config, polling_enabled=event_source.needs_polling,
+                idle_detection=idle_detector is not None
+            )
 
-            while True:
+            def capture(event=None):
                 try:
-                    window_info = monitor.get_active_window_info()
+                    # イベントで通知されたウィンドウと時刻で記録する（タイマーからはその時点のフォアグラウンド）
+                    if event is not None:
+                        window_info = monitor.get_active_window_info(event.hwnd, event.timestamp)
+                    else:
+                        window_info = monitor.get_active_window_info()
                     if window_info:
                         data_manager.add_record(window_info)
                 except Exception as e:
                     print(f"監視エラー: {e}")
+                scheduler.notify_switch()
 
-                # 強制的な保存間隔の確認
-                if time.time() - last_write >= write_interval:
-                    try:
-                        data_manager.save_buffer()
-                        last_write = time.time()
-                    except Exception as e:
-                        print(f"保存エラー: {e}")
+            def check_idle():
+                transition = idle_detector.check()
+                if transition == IdleDetector.BECAME_IDLE:
+                    # 最後の入力時刻で直前のウィンドウの使用を打ち切る
+                    print("離席を検出しました")
+                    data_manager.add_record(WindowInfo.create_idle_marker(idle_detector.idle_since))
+                    monitor.set_enrichment_paused(True)
+                    scheduler.set_idle(True)
+                elif transition == IdleDetector.BECAME_ACTIVE:
+                    print("操作を再開しました")
+                    monitor.set_enrichment_paused(False)
+                    monitor.reset()
+                    scheduler.set_idle(False)
+                    # 離席前と同じウィンドウでも作業の再開として記録する
+                    capture()
+
+            while True:
+                # 次のタイマーまでフォアグラウンド変更イベントを待機
+                event = event_source.wait(scheduler.next_timeout())
+                if event:
+                    if idle_detector is not None and idle_detector.is_idle:
+                        # 入力のない切り替え（通知などのポップアップ）は記録しない
+                        check_idle()
+                        if idle_detector.is_idle:
+                            scheduler.notify_unchanged()
+                    else:
+                        capture(event)
 
-                time.sleep(1)  # CPU負荷を下げるために1秒待機
+                for task in scheduler.pop_due(woken_by_event=event is not None):
+                    if task == AdaptiveScheduler.TASK_POLL:
+                        # 変化があればイベントがキューに入り、次の待機で処理される
+                        if not event_source.poll():
+                            scheduler.notify_unchanged()
+                    elif task == AdaptiveScheduler.TASK_FLUSH:
+                        try:
+                            data_manager.save_buffer()
+                        except Exception as e:
+                            print(f"保存エラー: {e}")
+                    elif task == AdaptiveScheduler.TASK_IDLE:
+                        check_idle()
+                    elif task == AdaptiveScheduler.TASK_REPORT:
+                        stats = scheduler.stats()
+                        print(f"監視ティックレート: {stats['tick_rate']:.2f}回/秒 "
+                              f"(タイマー: {stats['timer_rate']:.2f}回/秒, イベント: {stats['event_rate']:.2f}回/秒, "
+                              f"ポーリング間隔: {stats['poll_interval']:.2f}秒)")
+                        writer_stats = data_manager.background_writer.stats()
+                        print(f"書き込みキュー: {writer_stats['queue_depth']}件 "
+                              f"(平均コミット遅延: {writer_stats['average_commit_latency']:.2f}秒, "
+                              f"破棄: {writer_stats['dropped']}件, 退避: {writer_stats['spilled']}件)")
+                        dedup_stats = monitor.dedup_stats()
+                        print(f"重複除外: {dedup_stats['suppressed']}/{dedup_stats['seen']}件 "
+                              f"(重複率: {dedup_stats['duplicate_rate']:.1%}, 復帰: {dedup_stats['returns']}件)")
         except Exception as e:
             print(f"監視スレッド致命的エラー: {e}")
             sys.exit(1)
@@ -1,7 +1,9 @@
 # window_info.py
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Any
+from ..utils.string_pool import get_string_pool
 
 @dataclass
 class WindowInfo:
@@ -12,13 +14,82 @@ class WindowInfo:
     application_name: str  # 実行ファイル名 (explorer.exe, excel.exe など)
     application_path: str  # 実行ファイルの完全パス
     working_directory: str # 作業ディレクトリパス (Explorerの場合は現在のフォルダ、Officeの場合はドキュメントの保存場所)
-    monitor_type: str     # モニタータイプ ('general', 'explorer', 'office')
+    monitor_type: str     # モニタータイプ ('general', 'explorer', 'office', 'idle' など)
     is_new_document: bool = False
     office_app_type: Optional[str] = None  # 'Word', 'Excel', 'PowerPoint'
+    # キャプチャ時刻（UNIX時間）。timestamp と同じ時刻を表す
+    captured_at: float = field(default_factory=time.time, compare=False)
+    # 使用区間の終了時刻（UNIX時間）。次の切り替えまでNone
+    ended_at: Optional[float] = field(default=None, compare=False)
+    # 非同期補完処理のFuture（補完不要または完了済みならNone/完了状態）
+    enrichment: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    # 文字列プールで共有するフィールド（1日の間に同じ値が繰り返し現れる）
+    INTERNED_FIELDS = (
+        'process_name', 'window_title', 'application_name', 'application_path',
+        'working_directory', 'monitor_type', 'office_app_type'
+    )
 
     @classmethod
     def create(cls, **kwargs):
-        # タイムスタンプが指定されていない場合は現在時刻を使用
+        # キャプチャ時刻が指定されていない場合は現在時刻を使用
+        if 'captured_at' not in kwargs:
+            kwargs['captured_at'] = time.time()
+        # タイムスタンプが指定されていない場合はキャプチャ時刻から作成
         if 'timestamp' not in kwargs:
-            kwargs['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return cls(**kwargs)
\ No newline at end of file
+            kwargs['timestamp'] = datetime.fromtimestamp(kwargs['captured_at']).strftime('%Y-%m-%d %H:%M:%S')
+        # 繰り返し現れる文字列は共有プールのオブジェクトを使う
+        pool = get_string_pool()
+        for name in cls.INTERNED_FIELDS:
+            if name in kwargs:
+                kwargs[name] = pool.intern(kwargs[name])
+        return cls(**kwargs)
+
+    @classmethod
+    def create_idle_marker(cls, idle_since: float) -> 'WindowInfo':
+        """離席の開始を示すレコード（時刻は最後の入力時刻。開いている区間より前なら Sessionizer が揃える）"""
+        return cls.create(
+            captured_at=idle_since,
+            process_name='',
+            window_title='<離席>',
+            process_id=0,
+            application_name='',
+            application_path='',
+            working_directory='',
+            monitor_type='idle'
+        )
+
+    @property
+    def start(self) -> str:
+        """区間の開始時刻（ミリ秒まで）"""
+        return datetime.fromtimestamp(self.captured_at).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+    @property
+    def end(self) -> str:
+        """区間の終了時刻（ミリ秒まで、未確定なら空文字）"""
+        if self.ended_at is None:
+            return ''
+        return datetime.fromtimestamp(self.ended_at).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+    @property
+    def duration_ms(self) -> Optional[int]:
+        """区間の継続時間（ミリ秒、未確定ならNone）"""
+        if self.ended_at is None:
+            return None
+        return int(round((self.ended_at - self.captured_at) * 1000))
+
+    def sync_enrichment(self) -> None:
+        """日付で分割した断片に、元のレコードの補完結果を反映する"""
+        if self.enrichment is None or not self.enrichment.done():
+            return
+        try:
+            source = self.enrichment.result()
+        except Exception:
+            return
+        if source is not None and source is not self:
+            self.working_directory = source.working_directory
+            self.is_new_document = source.is_new_document
+
+    def is_enrichment_pending(self) -> bool:
+        """補完処理が未完了かどうか"""
+        return self.enrichment is not None and not self.enrichment.done()
\ No newline at end of file
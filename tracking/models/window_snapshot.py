@@ -0,0 +1,22 @@
+# window_snapshot.py
+import time
+from dataclasses import dataclass, field
+
+@dataclass(frozen=True)
+class WindowSnapshot:
+    """1回の監視ティックで取得したフォアグラウンドウィンドウの情報
+
+    モニターの選択と情報抽出の両方でこのスナップショットを共有し、
+    Win32 API / psutil の呼び出しをティックごとに1回にまとめる。
+    """
+    hwnd: int
+    pid: int
+    class_name: str
+    title: str
+    process_name: str  # 実際のプロセス名 (大文字小文字は元のまま)
+    exe: str           # 実行ファイルの完全パス（取得できない場合は空文字）
+    captured_at: float = field(default_factory=time.time)
+
+    @property
+    def process_name_lower(self) -> str:
+        return self.process_name.lower()
\ No newline at end of file
@@ -1,12 +1,26 @@
 # base_monitor.py
-from typing import Optional, Dict, Any
+from typing import Optional, FrozenSet
+from ...models.window_info import WindowInfo
+from ...models.window_snapshot import WindowSnapshot
 
 class BaseWindowMonitor:
-    def __init__(self):
-        self.last_title = None
+    # WindowSelectorのディスパッチテーブルに登録される担当範囲
+    # claimed_*: 一致すればis_target_windowを呼ばずにこのモニターを選択
+    claimed_processes: FrozenSet[str] = frozenset()   # プロセス名（小文字）
+    claimed_classes: FrozenSet[str] = frozenset()     # ウィンドウクラス名
+    # 一致した場合にis_target_windowによるタイトル等の判定が必要なプロセス名（小文字）
+    conditional_processes: FrozenSet[str] = frozenset()
+    # すべてのウィンドウについてis_target_windowで判定する（タイトルのみで判定するモニター）
+    claims_by_title = False
+    # 時間のかかる情報をenrich()で後から補完するか
+    needs_enrichment = False
 
-    def get_active_window_info(self) -> Optional[Dict[str, Any]]:
+    def get_active_window_info(self, snapshot: WindowSnapshot) -> Optional[WindowInfo]:
         raise NotImplementedError("Subclasses must implement get_active_window_info()")
 
-    def is_target_window(self, window: int) -> bool:
-        raise NotImplementedError("Subclasses must implement is_target_window()")
\ No newline at end of file
+    def is_target_window(self, snapshot: WindowSnapshot) -> bool:
+        raise NotImplementedError("Subclasses must implement is_target_window()")
+
+    def enrich(self, info: WindowInfo, snapshot: WindowSnapshot) -> None:
+        """キャプチャ済みのWindowInfoに時間のかかる情報を補完する（ワーカースレッドで実行）"""
+        pass
\ No newline at end of file
@@ -0,0 +1,128 @@
+# browser_title.py
+"""ブラウザのウィンドウタイトルの解析と分類
+
+ブラウザはページタイトルの末尾に " - Google Chrome" のような固定の接尾辞を付ける。
+ページタイトル自体に " - " が含まれることは多いため、区切りを左から探すのではなく
+ブラウザごとの既知の接尾辞を右端から取り除く。
+"""
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+# タイトルの区切り文字（ブラウザやロケールによって異なる）
+TITLE_SEPARATORS = (' - ', ' — ', ' – ')
+
+# ブラウザ名 -> ウィンドウタイトルの接尾辞（長いものを先に並べる）
+BROWSER_TITLE_SUFFIXES: Dict[str, Tuple[str, ...]] = {
+    'Chrome': ('Google Chrome', 'Chrome'),
+    'Firefox': ('Mozilla Firefox', 'Firefox'),
+    # Edgeは "Microsoft" と "Edge" の間にゼロ幅スペースを入れることがある
+    'Edge': ('Microsoft\u200b Edge', 'Microsoft Edge', 'Edge'),
+    'Opera': ('Opera',),
+    'Brave': ('Brave',),
+    'Internet Explorer': ('Internet Explorer',),
+    'Safari': ('Safari',)
+}
+
+REDACTED_TITLE = '<除外ドメイン>'
+
+
+@dataclass(frozen=True)
+class BrowserTitle:
+    """ウィンドウタイトルの解析結果"""
+    page_title: str     # ブラウザの接尾辞を除いたページタイトル
+    browser_name: str   # タイトルに含まれていたブラウザ名（なければブラウザタイプ）
+    excluded: bool      # Browser.excluded_domains に該当するか
+
+
+def split_browser_suffix(window_title: str, browser_type: str) -> Tuple[str, str]:
+    """ウィンドウタイトルの右端からブラウザの接尾辞を取り除く
+
+    接尾辞の種類と区切り文字の数は固定なので、タイトルの長さに関係なく一定の手間で済む。
+    """
+    for suffix in BROWSER_TITLE_SUFFIXES.get(browser_type, ()):
+        if not window_title.endswith(suffix):
+            continue
+        head = window_title[:-len(suffix)]
+        for separator in TITLE_SEPARATORS:
+            if head.endswith(separator):
+                return head[:-len(separator)], suffix.replace('\u200b', '')
+        if not head:
+            # タイトルがブラウザ名だけ（ページなし）
+            return '', suffix.replace('\u200b', '')
+    return window_title, browser_type
+
+
+def excluded_domain_pattern(domains: Iterable[str]) -> "re.Pattern":
+    """除外ドメインのいずれかにラベルの境界で一致する正規表現
+
+    "ex.com" は "ex.com" と "mail.ex.com" に一致し、"apex.com" や "ex.community" には一致しない。
+    """
+    alternatives = '|'.join(re.escape(domain) for domain in domains)
+    return re.compile(rf'(?<![a-z0-9-])(?:{alternatives})(?![a-z0-9-]|\.[a-z0-9])')
+
+
+class BrowserTitleClassifier:
+    """ウィンドウタイトル -> (ページ, 除外判定) の分類結果を記憶する
+
+    同じタブに戻るたびに同じタイトルを解析しないよう、結果を容量付きで保持する。
+    """
+
+    def __init__(self, excluded_domains: Iterable[str] = (), capacity: int = 256):
+        """
+        Parameters:
+            excluded_domains (Iterable[str]): 記録から除外するドメイン
+            capacity (int): 記憶する分類結果の最大数
+        """
+        self.excluded_domains: List[str] = [
+            domain.strip().lower() for domain in excluded_domains if domain.strip()
+        ]
+        self._excluded_pattern = excluded_domain_pattern(self.excluded_domains) if self.excluded_domains else None
+        self.capacity = capacity
+        self._memo: "OrderedDict[Tuple[str, str], BrowserTitle]" = OrderedDict()
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.excluded = 0
+
+    def classify(self, window_title: str, browser_type: str) -> BrowserTitle:
+        key = (browser_type, window_title)
+        result = self._memo.get(key)
+        if result is not None:
+            self._memo.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        page_title, browser_name = split_browser_suffix(window_title, browser_type)
+        is_excluded = self._is_excluded(page_title)
+        if is_excluded:
+            self.excluded += 1
+        result = BrowserTitle(page_title, browser_name, is_excluded)
+
+        self._memo[key] = result
+        if len(self._memo) > self.capacity:
+            self._memo.popitem(last=False)
+        return result
+
+    def _is_excluded(self, page_title: str) -> bool:
+        """ページタイトルに除外ドメイン（またはそのサブドメイン）が含まれるか
+
+        ウィンドウタイトルからはURLを取得できないため、ページタイトルにドメインが
+        表示される場合（タイトルのないページ、サイト名がドメインのサイトなど）に限られる。
+        """
+        if self._excluded_pattern is None:
+            return False
+        return self._excluded_pattern.search(page_title.lower()) is not None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._memo),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'excluded': self.excluded
+        }
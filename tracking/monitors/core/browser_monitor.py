@@ -1,34 +1,27 @@
 # browser_monitor.py
-import win32gui
-import win32process
-import psutil
-import os
-import re
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Tuple
 from ..base.base_monitor import BaseWindowMonitor
+from ..browser_title import BrowserTitleClassifier, REDACTED_TITLE
+from ..process_names import BROWSER_PROCESSES
+from ...config import Config
 from ...models.window_info import WindowInfo
+from ...models.window_snapshot import WindowSnapshot
 
 class BrowserWindowMonitor(BaseWindowMonitor):
     """Webブラウザウィンドウ監視クラス"""
     
+    claimed_processes = frozenset(BROWSER_PROCESSES)
+
     def __init__(self):
         super().__init__()
         # 対応するWebブラウザのプロセス名とブラウザ名のマッピング
-        self.browser_processes = {
-            'chrome.exe': 'Chrome',
-            'firefox.exe': 'Firefox',
-            'msedge.exe': 'Edge',
-            'opera.exe': 'Opera',
-            'brave.exe': 'Brave',
-            'iexplore.exe': 'Internet Explorer',
-            'safari.exe': 'Safari'
-        }
-        # ブラウザのタイトルパターン (正規表現)
-        self.title_patterns = [
-            r'^(.+) - (.+)$',  # 例: "Google - Chrome"
-            r'^(.+) — (.+)$',  # 例: "Google — Firefox"
-            r'^(.+) – (.+)$',  # 例: "Google – Microsoft Edge"
-        ]
+        self.browser_processes = BROWSER_PROCESSES
+        # タイトルの分類結果は記憶しておき、同じタブに戻ったときは解析しない
+        config = Config()
+        self.title_classifier = BrowserTitleClassifier(
+            excluded_domains=config.get_value('Browser', 'excluded_domains').split(','),
+            capacity=int(config.get_value('General', 'cache_capacity'))
+        )
         # 「新しいタブ」を示すタイトル (各ブラウザで異なる)
         self.new_tab_titles = {
             'Chrome': ['New Tab', '新しいタブ'],
@@ -40,75 +33,57 @@ class BrowserWindowMonitor(BaseWindowMonitor):
             'Safari': ['Start Page', 'スタートページ']
         }
         
-    def is_target_window(self, window: int) -> bool:
+    def is_target_window(self, snapshot: WindowSnapshot) -> bool:
         """Webブラウザウィンドウかどうかを判定"""
-        try:
-            # ウィンドウのプロセスIDを取得
-            _, pid = win32process.GetWindowThreadProcessId(window)
-            process = psutil.Process(pid)
-            process_name = process.name().lower()
-            
-            # ブラウザプロセスリストに含まれるか確認
-            return process_name in self.browser_processes
-        except Exception as e:
-            print(f"Error in Browser is_target_window: {e}")
-            return False
-    
-    def get_active_window_info(self) -> Optional[WindowInfo]:
+        # ブラウザプロセスリストに含まれるか確認
+        return snapshot.process_name_lower in self.browser_processes
+
+    def get_active_window_info(self, snapshot: WindowSnapshot) -> Optional[WindowInfo]:
         """アクティブなブラウザウィンドウの情報を取得"""
         try:
-            window = win32gui.GetForegroundWindow()
-            if not self.is_target_window(window):
-                return None
-                
-            window_title = win32gui.GetWindowText(window)
-            if window_title == self.last_title:
+            if not self.is_target_window(snapshot):
                 return None
-                
-            # プロセス情報取得
-            _, pid = win32process.GetWindowThreadProcessId(window)
-            process = psutil.Process(pid)
-            process_name = process.name()
-            application_path = process.exe()
-            
+
+            window_title = snapshot.title
+
+            process_name = snapshot.process_name
+
             # ブラウザタイプを特定
-            browser_type = self.browser_processes.get(process_name, 'Unknown')
-            
-            # ページタイトルとURLを抽出 (タイトルから推定)
-            page_title, browser_name = self._parse_browser_title(window_title, browser_type)
-            
+            browser_type = self.browser_processes.get(snapshot.process_name_lower, 'Unknown')
+
+            # ページタイトルを抽出 (タイトルから推定)
+            classified = self.title_classifier.classify(window_title, browser_type)
+            page_title = classified.page_title
+
             # 新しいタブかどうかを判定
             is_new_tab = self._is_new_tab(page_title, browser_type)
-            
-            self.last_title = window_title
-            
+
+            # 除外ドメインのページはタイトルを記録しない
+            if classified.excluded:
+                page_title = REDACTED_TITLE
+                window_title = f"{REDACTED_TITLE} - {classified.browser_name}"
+
             return WindowInfo.create(
+                captured_at=snapshot.captured_at,
                 process_name=process_name,
                 window_title=window_title,
-                process_id=pid,
+                process_id=snapshot.pid,
                 application_name=process_name,
-                application_path=application_path,
+                application_path=snapshot.exe,
                 working_directory=page_title,  # URLの代わりにページタイトルを使用
                 monitor_type='browser',
                 is_new_document=is_new_tab,
                 office_app_type=browser_type  # ブラウザの種類
             )
-            
+
         except Exception as e:
             print(f"Error in Browser get_active_window_info: {e}")
             return None
-    
+
     def _parse_browser_title(self, window_title: str, browser_type: str) -> Tuple[str, str]:
         """ブラウザのウィンドウタイトルからページタイトルとブラウザ名を抽出"""
-        # 各パターンを試す
-        for pattern in self.title_patterns:
-            match = re.match(pattern, window_title)
-            if match:
-                # グループ1がページタイトル、グループ2がブラウザ名と仮定
-                return match.group(1), match.group(2)
-        
-        # パターンにマッチしない場合はそのままタイトルを返す
-        return window_title, browser_type
+        classified = self.title_classifier.classify(window_title, browser_type)
+        return classified.page_title, classified.browser_name
     
     def _is_new_tab(self, page_title: str, browser_type: str) -> bool:
         """新しいタブかどうかを判定"""
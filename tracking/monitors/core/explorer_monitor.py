@@ -1,122 +1,82 @@
 # explorer_monitor.py
-import win32com.client
-import win32gui
-import win32process
-import pythoncom
-import psutil
 import os
 from typing import Optional
 from ..base.base_monitor import BaseWindowMonitor
+from ..process_names import EXPLORER_CLASSES
+from ...config import Config
 from ...models.window_info import WindowInfo
+from ...models.window_snapshot import WindowSnapshot
+from ...utils.explorer_index import ExplorerFolderIndex
+from ...utils.process_cache import get_process_cache
 
 class ExplorerWindowMonitor(BaseWindowMonitor):
-    def __init__(self):
+    # Explorerの既知のクラス名はそのまま担当し、explorer.exeはタイトルで判定する
+    claimed_classes = EXPLORER_CLASSES
+    conditional_processes = frozenset({'explorer.exe'})
+    needs_enrichment = True
+
+    def __init__(self, folder_index: Optional[ExplorerFolderIndex] = None):
+        """
+        Parameters:
+            folder_index (ExplorerFolderIndex): hwnd -> フォルダの対応表（省略時はShell.Applicationから作成）
+        """
         super().__init__()
-        self._initialize_com()
+        # フォルダの対応表は専用スレッドで差分更新し、切り替え時は参照だけ行う
+        if folder_index is None:
+            config = Config()
+            folder_index = ExplorerFolderIndex(
+                refresh_interval=float(config.get_value('General', 'explorer_index_interval'))
+            )
+        self.folder_index = folder_index
+        self.folder_index.start()
         # Explorerの既知のクラス名リスト（拡張版）
-        self._explorer_classes = [
-            "CabinetWClass",  # 標準的なエクスプローラーウィンドウ
-            "ExploreWClass",  # 古いスタイルのエクスプローラー
-            "WorkerW",        # デスクトップ
-            "Progman",        # プログラムマネージャ（デスクトップ関連）
-            "ShellTabWindowClass"  # タブ付きエクスプローラー
-        ]
-
-    def _initialize_com(self):
-        try:
-            # まずCoInitializeを試す
-            try:
-                pythoncom.CoInitialize()
-            except:
-                # すでに初期化されている可能性があるため無視
-                pass
-            
-            # 複数の方法を試みる
-            try:
-                self.shell = win32com.client.Dispatch("Shell.Application")
-                print("COM object created via Dispatch successfully")
-            except Exception as dispatch_e:
-                print(f"Dispatch failed: {dispatch_e}")
-                try:
-                    # GetObjectも試してみる
-                    self.shell = win32com.client.GetObject("Shell.Application")
-                    print("COM object created via GetObject successfully")
-                except Exception as getobj_e:
-                    print(f"GetObject also failed: {getobj_e}")
-                    self.shell = None
-        except Exception as e:
-            print(f"COM initialization failed: {str(e)}")
-            self.shell = None
+        self._explorer_classes = EXPLORER_CLASSES
 
     def __del__(self):
         try:
-            pythoncom.CoUninitialize()
+            self.folder_index.stop()
         except:
             pass
 
-    def is_target_window(self, window: int) -> bool:
+    def is_target_window(self, snapshot: WindowSnapshot) -> bool:
         """対象のExplorerウィンドウかどうかを判定（改善版）"""
         try:
-            # クラス名による判定
-            class_name = win32gui.GetClassName(window)
-            
             # 既知のExplorerクラス名リストとのマッチング
-            if class_name in self._explorer_classes:
+            if snapshot.class_name in self._explorer_classes:
                 return True
-                
+
             # プロセス名による補助判定
-            _, pid = win32process.GetWindowThreadProcessId(window)
-            try:
-                process = psutil.Process(pid)
-                process_name = process.name().lower()
-                
-                # explorer.exeプロセスかつウィンドウタイトルがパスっぽい
-                if process_name == "explorer.exe":
-                    window_title = win32gui.GetWindowText(window)
-                    # 「エクスプローラー」という文字が含まれるか、パスのような形式か
-                    if " - エクスプローラー" in window_title or " - Explorer" in window_title or \
-                       ":\\" in window_title or "/" in window_title:
-                        return True
-            except Exception as proc_e:
-                print(f"Process check error: {proc_e}")
-                pass
-                
+            # explorer.exeプロセスかつウィンドウタイトルがパスっぽい
+            if snapshot.process_name_lower == "explorer.exe":
+                window_title = snapshot.title
+                # 「エクスプローラー」という文字が含まれるか、パスのような形式か
+                if " - エクスプローラー" in window_title or " - Explorer" in window_title or \
+                   ":\\" in window_title or "/" in window_title:
+                    return True
+
             return False
         except Exception as e:
             print(f"Error in Explorer is_target_window: {e}")
             return False
 
-    def get_active_window_info(self):
+    def get_active_window_info(self, snapshot: WindowSnapshot) -> Optional[WindowInfo]:
         """エクスプローラーのウィンドウ情報を取得（改善版）"""
         try:
-            window = win32gui.GetForegroundWindow()
-            if not self.is_target_window(window):
+            if not self.is_target_window(snapshot):
                 return None
 
-            window_title = win32gui.GetWindowText(window)
-            if window_title == self.last_title:
-                return None
-                
-            # COMオブジェクト経由でパス取得
-            current_directory = self._get_explorer_path(window)
-            
-            # COMでの取得に失敗した場合は代替手段を試す
-            if current_directory is None:
-                current_directory = self._get_explorer_path_alternative(window)
-                print(f"Using alternative path detection: {current_directory}")
-
-            pid = win32process.GetWindowThreadProcessId(window)[1]
+            window_title = snapshot.title
             explorer_path = os.path.join(os.environ['WINDIR'], 'explorer.exe')
 
-            self.last_title = window_title
-
+            # フォルダパスは enrich() で補完する
             return WindowInfo.create(
+                captured_at=snapshot.captured_at,
                 process_name='explorer.exe',
                 window_title=window_title,
-                process_id=pid,
+                process_id=snapshot.pid,
                 application_name='explorer.exe',
                 application_path=explorer_path,
-                working_directory=current_directory,  # 必ず何らかの値を設定
+                working_directory=f"explorer://{window_title}",
                 monitor_type='explorer'
             )
 
@@ -124,13 +84,11 @@ class ExplorerWindowMonitor(BaseWindowMonitor):
             print(f"Error in Explorer get_active_window_info: {e}")
             # 例外発生時も可能な限り情報を返す
             try:
-                window = win32gui.GetForegroundWindow()
-                window_title = win32gui.GetWindowText(window)
-                pid = win32process.GetWindowThreadProcessId(window)[1]
                 return WindowInfo.create(
+                    captured_at=snapshot.captured_at,
                     process_name='explorer.exe',
-                    window_title=window_title,
-                    process_id=pid,
+                    window_title=snapshot.title,
+                    process_id=snapshot.pid,
                     application_name='explorer.exe',
                     application_path=os.path.join(os.environ['WINDIR'], 'explorer.exe'),
                     working_directory="explorer://error-recovery",
@@ -140,36 +98,28 @@ class ExplorerWindowMonitor(BaseWindowMonitor):
                 print(f"Recovery attempt also failed: {recovery_e}")
                 return None
 
-    def _get_explorer_path(self, hwnd: int) -> Optional[str]:
-        """COMオブジェクト経由でExplorerのパスを取得（既存メソッド）"""
-        try:
-            if self.shell is None:
-                self._initialize_com()
-                if self.shell is None:
-                    print("COM object still null after re-initialization")
-                    return None
+    def enrich(self, info: WindowInfo, snapshot: WindowSnapshot) -> None:
+        """フォルダパスを補完（対応表にない場合は代替手段を試す）"""
+        current_directory = self._get_explorer_path(snapshot.hwnd, snapshot.title)
+        if current_directory is None:
+            current_directory = self._get_explorer_path_alternative(snapshot)
+            print(f"Using alternative path detection: {current_directory}")
+        if current_directory:
+            info.working_directory = current_directory
 
-            windows = self.shell.Windows()
-            hwnd_str = str(hwnd)
-            
-            for window in windows:
-                try:
-                    if str(window.HWND) == hwnd_str:
-                        return window.Document.Folder.Self.Path
-                except Exception as e:
-                    continue
-            
-            return None
+    def _get_explorer_path(self, hwnd: int, title: Optional[str] = None) -> Optional[str]:
+        """対応表からExplorerのパスを取得（未登録・古い場合のみ差分更新を待つ）"""
+        try:
+            return self.folder_index.resolve(hwnd, title)
         except Exception as e:
             print(f"Error in _get_explorer_path: {e}")
-            self.shell = None
             return None
-            
-    def _get_explorer_path_alternative(self, window: int) -> Optional[str]:
+
+    def _get_explorer_path_alternative(self, snapshot: WindowSnapshot) -> Optional[str]:
         """COMオブジェクト経由でのパス取得に失敗した場合の代替手段"""
         try:
             # 方法1: ウィンドウタイトルからパスを推測
-            window_title = win32gui.GetWindowText(window)
+            window_title = snapshot.title
             
             # 「エクスプローラー」という文字を取り除く（日本語UI対応）
             for suffix in [" - エクスプローラー", " - Explorer", " - File Explorer"]:
@@ -220,14 +170,9 @@ class ExplorerWindowMonitor(BaseWindowMonitor):
                     return location
             
             # 方法2: プロセスの作業ディレクトリを取得
-            _, pid = win32process.GetWindowThreadProcessId(window)
-            process = psutil.Process(pid)
-            try:
-                cwd = process.cwd()
-                if cwd and cwd != os.environ.get('WINDIR'):
-                    return cwd
-            except:
-                pass
+            cwd = get_process_cache().get_cwd(snapshot.pid)
+            if cwd and cwd != os.environ.get('WINDIR'):
+                return cwd
                 
             # 特別な表記を返す（パスが特定できないことを示す）
             return f"explorer://{window_title}"
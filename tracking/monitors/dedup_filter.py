@@ -0,0 +1,84 @@
+# dedup_filter.py
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Tuple
+from ..models.window_info import WindowInfo
+
+# 同じフォアグラウンド状態とみなす項目
+StateKey = Tuple[int, str, str, str]
+
+
+class DedupFilter:
+    """連続して同じフォアグラウンド状態が検出された場合だけを重複として除外する
+
+    直前に通した状態と同じ状態（プロセスID・プロセス名・タイトル・モニタータイプが同じ）が
+    window 秒以内に再び検出された場合だけを除外する。
+    A→B→A のように別の状態を挟んで戻った場合は新しい区間として通す。
+    window 秒を過ぎた同じ状態は通す（開いている区間が長くなりすぎないよう区切る）。
+    0 以下なら期限なし。
+
+    直近 capacity 件の状態を覚えておき、以前の状態への復帰を数える（統計情報用）。
+    """
+
+    def __init__(self, window: float = 300.0, capacity: int = 64):
+        """
+        Parameters:
+            window (float): 同じ状態を重複とみなす最大秒数（0以下で期限なし）
+            capacity (int): 覚えておく直近の状態の数
+        """
+        self.window = window
+        self.capacity = max(1, capacity)
+        self._last_key: Optional[StateKey] = None
+        self._last_accepted_at = 0.0
+        # 状態 -> 最後に通した時刻
+        self._recent: 'OrderedDict[StateKey, float]' = OrderedDict()
+
+        # 統計情報
+        self.seen = 0
+        self.suppressed = 0
+        self.accepted = 0
+        self.returns = 0
+        self.window_expired = 0
+
+    @staticmethod
+    def state_key(info: WindowInfo) -> StateKey:
+        return (info.process_id, info.process_name, info.window_title, info.monitor_type)
+
+    def accept(self, info: Optional[WindowInfo]) -> bool:
+        """info を記録すべきなら True、直前と同じ状態の重複なら False"""
+        if info is None:
+            return False
+        self.seen += 1
+        key = self.state_key(info)
+        now = info.captured_at
+
+        if key == self._last_key:
+            if self.window <= 0 or now - self._last_accepted_at < self.window:
+                self.suppressed += 1
+                return False
+            self.window_expired += 1
+        elif key in self._recent:
+            self.returns += 1
+
+        self._last_key = key
+        self._last_accepted_at = now
+        self._recent[key] = now
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.capacity:
+            self._recent.popitem(last=False)
+        self.accepted += 1
+        return True
+
+    def reset(self) -> None:
+        """直前の状態を忘れ、次の状態を必ず通す（離席からの復帰時など）"""
+        self._last_key = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'seen': self.seen,
+            'accepted': self.accepted,
+            'suppressed': self.suppressed,
+            'duplicate_rate': self.suppressed / self.seen if self.seen else 0.0,
+            'returns': self.returns,
+            'window_expired': self.window_expired,
+            'recent_states': len(self._recent)
+        }
@@ -0,0 +1,89 @@
+# enrichment_pool.py
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional, Any
+from .base.base_monitor import BaseWindowMonitor
+from ..models.window_info import WindowInfo
+from ..models.window_snapshot import WindowSnapshot
+from ..utils.string_pool import get_string_pool
+
+def _initialize_worker_thread() -> None:
+    """ワーカースレッドの初期化（COMを使うモニターのためにSTAを用意）"""
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+    except Exception as e:
+        logging.debug(f"CoInitialize failed in enrichment worker: {e}")
+
+
+class EnrichmentPool:
+    """キャプチャしたWindowInfoを後から補完するワーカープール
+
+    キャプチャスレッドは基本情報だけのWindowInfoをすぐに記録し、
+    作業ディレクトリなど時間のかかる情報はこのプールで補完する。
+    同じモニターの処理は常に同じワーカー（レーン）で実行するため、
+    モニターが保持するCOMオブジェクトはスレッドをまたがない。
+    """
+
+    def __init__(self, workers: int = 2):
+        self._lanes: List[ThreadPoolExecutor] = [
+            ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"enrichment-{i}",
+                initializer=_initialize_worker_thread
+            )
+            for i in range(max(1, workers))
+        ]
+        self._lane_by_monitor: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+        # 統計情報
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    def _lane_for(self, monitor: BaseWindowMonitor) -> ThreadPoolExecutor:
+        with self._lock:
+            key = id(monitor)
+            if key not in self._lane_by_monitor:
+                self._lane_by_monitor[key] = len(self._lane_by_monitor) % len(self._lanes)
+            return self._lanes[self._lane_by_monitor[key]]
+
+    def submit(self, monitor: BaseWindowMonitor, info: WindowInfo, snapshot: WindowSnapshot) -> Future:
+        """補完処理を予約し、WindowInfo.enrichment にFutureを設定する"""
+        self.submitted += 1
+        future = self._lane_for(monitor).submit(self._run, monitor, info, snapshot)
+        info.enrichment = future
+        return future
+
+    def _run(self, monitor: BaseWindowMonitor, info: WindowInfo, snapshot: WindowSnapshot) -> WindowInfo:
+        started = time.time()
+        try:
+            monitor.enrich(info, snapshot)
+            info.working_directory = get_string_pool().intern(info.working_directory)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Error enriching {monitor.__class__.__name__} record: {e}")
+        finally:
+            self.total_seconds += time.time() - started
+        return info
+
+    def shutdown(self, wait: bool = False) -> None:
+        for lane in self._lanes:
+            lane.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'pending': self.submitted - finished,
+            'average_seconds': self.total_seconds / finished if finished else 0.0
+        }
\ No newline at end of file
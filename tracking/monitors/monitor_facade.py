@@ -1,6 +1,9 @@
 # monitor_facade.py
-from typing import Optional
+from typing import Dict, Optional, Any
 from .window_selector import WindowSelector
+from .snapshot_provider import WindowSnapshotProvider, scripted_window_api
+from .enrichment_pool import EnrichmentPool
+from .dedup_filter import DedupFilter
 from .core.general_monitor import GeneralWindowMonitor
 from .core.explorer_monitor import ExplorerWindowMonitor
 from .core.pdf_monitor import PDFWindowMonitor
@@ -10,16 +13,43 @@ from .office.office_word_monitor import OfficeWordMonitor
 from .office.office_powerpoint_monitor import OfficePowerPointMonitor
 from ..models.window_info import WindowInfo
 from ..utils.cache_manager import CacheManager
+from ..config import Config
+from ..events.event_source import parse_event_script
 
 class WindowMonitorFacade:
-    def __init__(self):
-        self._selector = WindowSelector()
+    def __init__(self, config: Optional[Config] = None):
+        config = config or Config()
+        # モニターの優先順位は設定ファイルで変更できる
+        priority = [name.strip() for name in config.get_value('Monitors', 'priority').split(',') if name.strip()]
+        # 作業ディレクトリなどの補完はワーカープールで非同期に行う
+        self._enrichment_pool = EnrichmentPool(
+            workers=int(config.get_value('General', 'enrichment_workers'))
+        )
+        # 重複の除外はこの1か所で行う（直前と同じフォアグラウンド状態だけを除外）
+        self._dedup_filter = DedupFilter(
+            window=float(config.get_value('General', 'dedup_window')),
+            capacity=int(config.get_value('General', 'dedup_memory'))
+        )
+        self._selector = WindowSelector(
+            snapshot_provider=self._create_snapshot_provider(config),
+            priority=priority,
+            enrichment_pool=self._enrichment_pool,
+            dedup_filter=self._dedup_filter
+        )
         self._setup_monitors()
-        # 最後のアクティブウィンドウを記録
-        self._last_window = None
     
+    @staticmethod
+    def _create_snapshot_provider(config: Config) -> Optional[WindowSnapshotProvider]:
+        """スクリプトの再生時は、再生するウィンドウを返す模擬APIでスナップショットを作る"""
+        if config.get_value('General', 'event_source').strip().lower() != 'scripted':
+            return None
+        hwnds = [hwnd for _, hwnd in parse_event_script(config.get_value('General', 'event_script'))]
+        return WindowSnapshotProvider(
+            window_api=scripted_window_api(hwnds, config.get_value('General', 'scripted_windows'))
+        )
+
     def _setup_monitors(self) -> None:
-        # モニターの優先順位を設定: Explorer -> Excel -> Word -> PowerPoint -> Browser -> PDF -> General
+        # 登録順は問わない（優先順位は Monitors.priority で決まる）
         self._selector.register_monitor('explorer', ExplorerWindowMonitor())
         self._selector.register_monitor('excel', OfficeExcelMonitor())
         self._selector.register_monitor('word', OfficeWordMonitor())
@@ -28,20 +58,29 @@ class WindowMonitorFacade:
         self._selector.register_monitor('pdf', PDFWindowMonitor())
         self._selector.register_monitor('default', GeneralWindowMonitor())
     
-    def get_active_window_info(self) -> Optional[WindowInfo]:
-        info = self._selector.get_window_info()
-        
-        # 同じウィンドウが連続して検出された場合はスキップ
-        if self._last_window == info:
-            return None
-            
-        self._last_window = info
-        
+    def get_active_window_info(self, hwnd: Optional[int] = None,
+                               timestamp: Optional[float] = None) -> Optional[WindowInfo]:
+        """hwnd / timestamp はイベントで通知されたウィンドウと切り替え時刻（省略時は現在のフォアグラウンド）"""
+        # 直前と同じ状態の場合はセレクターがNoneを返す
+        info = self._selector.get_window_info(hwnd, timestamp)
         if info:
             print(f"Window Info: {info}")
         return info
     
+    def set_enrichment_paused(self, paused: bool) -> None:
+        """補完処理の停止・再開（離席中は停止する）"""
+        self._selector.enrichment_paused = paused
+
+    def reset(self) -> None:
+        """直前のウィンドウの記憶を消し、次の取得で必ず記録されるようにする"""
+        self._dedup_filter.reset()
+
+    def dedup_stats(self) -> Dict[str, Any]:
+        """重複除外の統計情報"""
+        return self._dedup_filter.stats()
+
     def __del__(self):
+        self._enrichment_pool.shutdown()
         for monitor in self._selector.monitors.values():
             if hasattr(monitor, '__del__'):
                 monitor.__del__()
\ No newline at end of file
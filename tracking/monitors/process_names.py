@@ -0,0 +1,41 @@
+# process_names.py
+"""モニター間で共有するプロセス名・ウィンドウクラスの定義
+
+プロセス名はすべて小文字で保持する（スナップショットの process_name_lower と比較する）。
+"""
+
+# 対応するWebブラウザのプロセス名とブラウザ名のマッピング
+BROWSER_PROCESSES = {
+    'chrome.exe': 'Chrome',
+    'firefox.exe': 'Firefox',
+    'msedge.exe': 'Edge',
+    'opera.exe': 'Opera',
+    'brave.exe': 'Brave',
+    'iexplore.exe': 'Internet Explorer',
+    'safari.exe': 'Safari'
+}
+
+# PDFを表示できるブラウザ（PDFモニターはタイトルで判定する）
+PDF_CAPABLE_BROWSERS = frozenset({'chrome.exe', 'msedge.exe', 'firefox.exe'})
+
+# 専用のPDFリーダー
+PDF_READER_PROCESSES = frozenset({
+    'acrobat.exe',         # Adobe Acrobat
+    'acrord32.exe',        # Adobe Reader
+    'sumatrapdf.exe',      # Sumatra PDF
+    'foxitpdfreader.exe',  # Foxit Reader
+    'pdfxedit.exe',        # PDF-XChange Editor
+    'evince.exe',          # Evince
+    'xpdf.exe',            # XPdf
+    'pdfcreator.exe',      # PDF Creator
+    'pdffactory.exe'       # PDF Factory
+})
+
+# Explorer関連のウィンドウクラス
+EXPLORER_CLASSES = frozenset({
+    "CabinetWClass",  # 標準的なエクスプローラーウィンドウ
+    "ExploreWClass",  # 古いスタイルのエクスプローラー
+    "WorkerW",        # デスクトップ
+    "Progman",        # プログラムマネージャ（デスクトップ関連）
+    "ShellTabWindowClass"  # タブ付きエクスプローラー
+})
\ No newline at end of file
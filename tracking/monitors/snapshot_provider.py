@@ -0,0 +1,160 @@
+# snapshot_provider.py
+import os
+import time
+import logging
+from typing import Optional, Dict, Iterable, Tuple
+from ..models.window_snapshot import WindowSnapshot
+from ..utils.process_cache import ProcessInfoCache, get_process_cache
+
+class WindowApi:
+    """スナップショットの作成に使うウィンドウ関連のAPI"""
+
+    def foreground_window(self) -> int:
+        raise NotImplementedError
+
+    def window_pid(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def class_name(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def window_text(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+
+class Win32WindowApi(WindowApi):
+    """pywin32 による実装"""
+
+    def foreground_window(self) -> int:
+        import win32gui
+        return win32gui.GetForegroundWindow()
+
+    def window_pid(self, hwnd: int) -> int:
+        import win32process
+        return win32process.GetWindowThreadProcessId(hwnd)[1]
+
+    def class_name(self, hwnd: int) -> str:
+        import win32gui
+        return win32gui.GetClassName(hwnd)
+
+    def window_text(self, hwnd: int) -> str:
+        import win32gui
+        return win32gui.GetWindowText(hwnd)
+
+
+class FakeWindowApi(WindowApi):
+    """テスト・ベンチマーク用のウィンドウAPI
+
+    windows に hwnd -> (pid, クラス名, タイトル) を登録し、foreground に
+    フォアグラウンドのハンドルを設定する。
+    """
+
+    def __init__(self, windows: Optional[Dict[int, Tuple[int, str, str]]] = None, foreground: int = 0):
+        self.windows: Dict[int, Tuple[int, str, str]] = dict(windows or {})
+        self.foreground = foreground
+
+    def foreground_window(self) -> int:
+        return self.foreground
+
+    def window_pid(self, hwnd: int) -> int:
+        return self.windows[hwnd][0]
+
+    def class_name(self, hwnd: int) -> str:
+        return self.windows[hwnd][1]
+
+    def window_text(self, hwnd: int) -> str:
+        return self.windows[hwnd][2]
+
+
+# スクリプトで再生するウィンドウのクラス名
+SCRIPTED_WINDOW_CLASS = 'ScriptedWindow'
+
+
+def scripted_window_api(hwnds: Iterable[int], titles: str = '') -> FakeWindowApi:
+    """スクリプトの切り替え先 hwnd を持つ FakeWindowApi を作成する（Windows以外での動作確認用）
+
+    titles は "hwnd=タイトル" のセミコロン区切り（省略したウィンドウは hwnd から名前を付ける）。
+    ウィンドウはすべてこのプロセスが所有していることにする。
+    """
+    named: Dict[int, str] = {}
+    for item in titles.split(';'):
+        if not item.strip():
+            continue
+        hwnd, separator, title = item.partition('=')
+        try:
+            if not separator:
+                raise ValueError
+            named[int(hwnd.strip(), 0)] = title.strip()
+        except ValueError:
+            raise ValueError(f"Invalid scripted_windows entry: {item!r} (expected hwnd=title)")
+    pid = os.getpid()
+    windows = {
+        hwnd: (pid, SCRIPTED_WINDOW_CLASS, named.get(hwnd, f"Scripted window 0x{hwnd:X}"))
+        for hwnd in list(hwnds) + list(named)
+    }
+    return FakeWindowApi(windows)
+
+
+class WindowSnapshotProvider:
+    """フォアグラウンドウィンドウのスナップショットを作成する
+
+    OS呼び出し回数を数えておき、1ティックあたりのコストを確認できるようにする。
+    """
+
+    def __init__(self, process_cache: Optional[ProcessInfoCache] = None,
+                 window_api: Optional[WindowApi] = None):
+        self._process_cache = process_cache or get_process_cache()
+        self._window_api = window_api or Win32WindowApi()
+        self.os_call_count = 0
+        self.snapshot_count = 0
+
+    def _count(self, n: int = 1) -> None:
+        self.os_call_count += n
+
+    def capture(self, hwnd: Optional[int] = None, captured_at: Optional[float] = None) -> Optional[WindowSnapshot]:
+        """スナップショットを作成
+
+        hwnd 省略時は現在のフォアグラウンドウィンドウ、captured_at 省略時は現在時刻を使う
+        （イベントで切り替えを検出した場合はイベントのハンドルと時刻を渡す）。
+        """
+        api = self._window_api
+        try:
+            captured_at = captured_at if captured_at is not None else time.time()
+            if hwnd is None:
+                self._count()
+                hwnd = api.foreground_window()
+            if not hwnd:
+                return None
+
+            self._count(3)
+            pid = api.window_pid(hwnd)
+            class_name = api.class_name(hwnd)
+            title = api.window_text(hwnd)
+
+            # プロセス名と実行ファイルは共有キャッシュから取得（ミス時と初めてのウィンドウでのみpsutilを呼ぶ）
+            syscalls_before = self._process_cache.syscalls
+            process_info = self._process_cache.get(pid, hwnd)
+            self._count(self._process_cache.syscalls - syscalls_before)
+
+            self.snapshot_count += 1
+            return WindowSnapshot(
+                hwnd=hwnd,
+                pid=pid,
+                class_name=class_name or '',
+                title=title or '',
+                process_name=process_info.name if process_info else '',
+                exe=process_info.exe if process_info else '',
+                captured_at=captured_at
+            )
+        except Exception as e:
+            logging.error(f"Error capturing window snapshot: {e}")
+            return None
+
+    def stats(self) -> Dict[str, float]:
+        """スナップショットあたりのOS呼び出し回数などの統計"""
+        per_snapshot = self.os_call_count / self.snapshot_count if self.snapshot_count else 0.0
+        return {
+            'snapshots': self.snapshot_count,
+            'os_calls': self.os_call_count,
+            'os_calls_per_snapshot': per_snapshot
+        }
\ No newline at end of file
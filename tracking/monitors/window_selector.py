@@ -1,14 +1,37 @@
 # window_selector.py
-from typing import Dict, Optional, List
-import win32gui
+from typing import Dict, Optional, List, Tuple
 import logging
 from .base.base_monitor import BaseWindowMonitor
+from .snapshot_provider import WindowSnapshotProvider
+from .enrichment_pool import EnrichmentPool
+from .dedup_filter import DedupFilter
 from ..models.window_info import WindowInfo
+from ..models.window_snapshot import WindowSnapshot
 
 class WindowSelector:
-    def __init__(self):
+    # 既定の優先順位: Explorer -> Excel -> Word -> PowerPoint -> Browser -> PDF -> その他
+    DEFAULT_PRIORITY = ['explorer', 'excel', 'word', 'powerpoint', 'browser', 'pdf', 'default']
+
+    def __init__(self, snapshot_provider: Optional[WindowSnapshotProvider] = None,
+                 priority: Optional[List[str]] = None,
+                 enrichment_pool: Optional[EnrichmentPool] = None,
+                 dedup_filter: Optional[DedupFilter] = None):
         self.monitors: Dict[str, BaseWindowMonitor] = {}
+        # ティックごとのスナップショット作成（全モニターで共有）
+        self.snapshot_provider = snapshot_provider or WindowSnapshotProvider()
+        # 時間のかかる情報を後から補完するワーカープール（Noneなら同期的に補完）
+        self.enrichment_pool = enrichment_pool
+        # 直前と同じフォアグラウンド状態を除外する（補完を始める前に判定する）
+        self.dedup_filter = dedup_filter
+        # 離席中は補完を行わない（COM呼び出しなどを止める）
+        self.enrichment_paused = False
+        # 優先順位（設定値。登録名のリスト）
+        self.priority: List[str] = list(priority or self.DEFAULT_PRIORITY)
         self.monitor_order: List[str] = []
+        # ディスパッチテーブル（キー -> (優先順位, 登録名, 追加判定が必要か) のリスト）
+        self._process_index: Dict[str, List[Tuple[int, str, bool]]] = {}
+        self._class_index: Dict[str, List[Tuple[int, str, bool]]] = {}
+        self._title_claimers: List[Tuple[int, str, bool]] = []
         # モニタータイプごとのエラー発生カウント
         self._error_count: Dict[str, int] = {}
         # エラーしきい値（この回数以上エラーが発生したモニターは一時的に無効に）
@@ -20,46 +43,43 @@ class WindowSelector:
     def register_monitor(self, window_class: str, monitor: BaseWindowMonitor) -> None:
         self.monitors[window_class] = monitor
         self._error_count[window_class] = 0
-        
-        # 優先順位に基づいてモニターを追加
-        # Explorer -> Excel -> Word -> PowerPoint -> Browser -> PDF -> その他
-        if window_class == 'explorer':
-            self._insert_at_position(window_class, 0)
-        elif window_class == 'excel': 
-            self._insert_after(window_class, 'explorer')
-        elif window_class == 'word':
-            self._insert_after(window_class, 'excel')
-        elif window_class == 'powerpoint':
-            self._insert_after(window_class, 'word')
-        elif window_class == 'browser':  # 新規追加：ブラウザモニターの優先順位設定
-            self._insert_after(window_class, 'powerpoint')
-        elif window_class == 'pdf':  # PDFの優先順位をブラウザの後に変更
-            self._insert_after(window_class, 'browser')
-        else:
-            self.monitor_order.append(window_class)
-
-    def _insert_at_position(self, window_class: str, position: int) -> None:
-        """特定の位置にモニタークラスを挿入"""
-        if window_class in self.monitor_order:
-            self.monitor_order.remove(window_class)
-        
-        # 位置が範囲外の場合は末尾に追加
-        if position >= len(self.monitor_order):
-            self.monitor_order.append(window_class)
-        else:
-            self.monitor_order.insert(position, window_class)
-
-    def _insert_after(self, window_class: str, after_class: str) -> None:
-        """特定のクラスの後にモニタークラスを挿入"""
-        if window_class in self.monitor_order:
-            self.monitor_order.remove(window_class)
-            
-        if after_class in self.monitor_order:
-            position = self.monitor_order.index(after_class) + 1
-            self._insert_at_position(window_class, position)
-        else:
-            # 指定されたクラスが存在しない場合は先頭に追加
-            self._insert_at_position(window_class, 0)
+        self._compile_dispatch_table()
+
+    def _rank(self, window_class: str) -> int:
+        """優先順位（設定にないモニターは登録順で末尾に並ぶ）"""
+        if window_class in self.priority:
+            return self.priority.index(window_class)
+        return len(self.priority) + list(self.monitors).index(window_class)
+
+    def _compile_dispatch_table(self) -> None:
+        """各モニターが宣言した担当範囲からディスパッチテーブルを作成"""
+        self.monitor_order = sorted(self.monitors, key=self._rank)
+        self._process_index = {}
+        self._class_index = {}
+        self._title_claimers = []
+
+        for window_class in self.monitor_order:
+            if window_class == 'default':
+                continue  # 一般モニターは最終手段として扱う
+            monitor = self.monitors[window_class]
+            rank = self._rank(window_class)
+            for name in monitor.claimed_processes:
+                self._process_index.setdefault(name.lower(), []).append((rank, window_class, False))
+            for name in monitor.conditional_processes:
+                self._process_index.setdefault(name.lower(), []).append((rank, window_class, True))
+            for class_name in monitor.claimed_classes:
+                self._class_index.setdefault(class_name, []).append((rank, window_class, False))
+            if monitor.claims_by_title:
+                self._title_claimers.append((rank, window_class, True))
+
+    def _candidates(self, snapshot: WindowSnapshot) -> List[Tuple[int, str, bool]]:
+        """スナップショットに該当する候補を優先順位順に返す"""
+        candidates = (
+            self._class_index.get(snapshot.class_name, []) +
+            self._process_index.get(snapshot.process_name_lower, []) +
+            self._title_claimers
+        )
+        return sorted(candidates)
 
     def _should_skip_monitor(self, monitor_class: str) -> bool:
         """エラーが多発しているモニターをスキップすべきかどうか判定"""
@@ -73,67 +93,86 @@ class WindowSelector:
             self._error_count = {key: 0 for key in self._error_count}
             self._last_error_reset = current_time
 
-    def get_appropriate_monitor(self, window_handle: int) -> Optional[BaseWindowMonitor]:
-        """適切なモニターを選択（改善版）"""
+    def get_appropriate_monitor(self, snapshot: WindowSnapshot) -> Optional[BaseWindowMonitor]:
+        """ディスパッチテーブルから適切なモニターを選択"""
         try:
             self._reset_error_counts_if_needed()
-            
-            # Explorer関連の特別処理（高優先度）
-            explorer_monitor = self.monitors.get('explorer')
-            if explorer_monitor and not self._should_skip_monitor('explorer'):
-                try:
-                    if explorer_monitor.is_target_window(window_handle):
-                        return explorer_monitor
-                except Exception as e:
-                    logging.error(f"Error in Explorer monitor check: {e}")
-                    self._error_count['explorer'] = self._error_count.get('explorer', 0) + 1
-            
-            # 他のモニターを優先順位に従って試す
-            for monitor_class in self.monitor_order:
-                if monitor_class == 'explorer':
-                    continue  # Explorerは上で既にチェック済み
-                    
+
+            for _, monitor_class, needs_check in self._candidates(snapshot):
                 if self._should_skip_monitor(monitor_class):
                     continue  # エラー多発モニターはスキップ
-                
+
                 monitor = self.monitors[monitor_class]
+                if not needs_check:
+                    return monitor
                 try:
-                    if monitor.is_target_window(window_handle):
+                    if monitor.is_target_window(snapshot):
                         return monitor
                 except Exception as e:
                     logging.error(f"Error checking {monitor_class} monitor: {e}")
                     self._error_count[monitor_class] = self._error_count.get(monitor_class, 0) + 1
-            
+
             # 最終手段として一般モニターを返す
             return self.monitors.get('default')
         except Exception as e:
             logging.error(f"Error in monitor selection: {str(e)}")
             return self.monitors.get('default')
 
-    def get_window_info(self) -> Optional[WindowInfo]:
-        """ウィンドウ情報を取得（改善版）"""
+    def get_window_info(self, hwnd: Optional[int] = None, timestamp: Optional[float] = None) -> Optional[WindowInfo]:
+        """ウィンドウ情報を取得（hwnd / timestamp はイベントで通知されたウィンドウと切り替え時刻）"""
         try:
-            active_window = win32gui.GetForegroundWindow()
-            monitor = self.get_appropriate_monitor(active_window)
+            # このティックのスナップショットを1回だけ作成し、選択と抽出で共有する
+            snapshot = self.snapshot_provider.capture(hwnd, timestamp)
+            if snapshot is None:
+                return None
+
+            monitor = self.get_appropriate_monitor(snapshot)
             if monitor:
                 try:
-                    info = monitor.get_active_window_info()
+                    info = monitor.get_active_window_info(snapshot)
+                    if not self._accept(info):
+                        return None
                     if info:
                         logging.debug(f"Selected monitor: {monitor.__class__.__name__}")
                         print(f"Selected monitor: {monitor.__class__.__name__}")
+                        if monitor.needs_enrichment and not self.enrichment_paused:
+                            self._enrich(monitor, info, snapshot)
                     return info
                 except Exception as e:
-                    monitor_class = monitor.__class__.__name__
+                    monitor_class = self._monitor_key(monitor)
                     logging.error(f"Error getting info from {monitor_class}: {e}")
                     self._error_count[monitor_class] = self._error_count.get(monitor_class, 0) + 1
-                    
+
                     # エラー発生時は一般モニターで代替
                     default_monitor = self.monitors.get('default')
                     if default_monitor and default_monitor != monitor:
                         try:
-                            return default_monitor.get_active_window_info()
+                            info = default_monitor.get_active_window_info(snapshot)
+                            return info if self._accept(info) else None
                         except:
                             pass
         except Exception as e:
             logging.error(f"Error in window selection: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+    def _accept(self, info: Optional[WindowInfo]) -> bool:
+        if info is None:
+            return True
+        return self.dedup_filter is None or self.dedup_filter.accept(info)
+
+    def _enrich(self, monitor: BaseWindowMonitor, info: WindowInfo, snapshot: WindowSnapshot) -> None:
+        """基本情報の記録後に、時間のかかる情報の補完を開始する"""
+        if self.enrichment_pool is not None:
+            self.enrichment_pool.submit(monitor, info, snapshot)
+            return
+        try:
+            monitor.enrich(info, snapshot)
+        except Exception as e:
+            logging.error(f"Error enriching record from {self._monitor_key(monitor)}: {e}")
+
+    def _monitor_key(self, monitor: BaseWindowMonitor) -> str:
+        """モニターインスタンスから登録名を取得"""
+        for key, registered in self.monitors.items():
+            if registered is monitor:
+                return key
+        return monitor.__class__.__name__
\ No newline at end of file
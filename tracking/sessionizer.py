@@ -0,0 +1,95 @@
+# sessionizer.py
+"""ウィンドウ切り替えイベントを使用区間（開始・終了・継続時間）に変換する
+
+切り替えのたびに直前の区間を閉じ、閉じた区間だけを書き込み側に渡す。
+日付をまたぐ区間は0時で分割し、それぞれの日のログに入るようにする。
+"""
+import dataclasses
+from datetime import datetime, timedelta
+from typing import List, Optional
+from .models.window_info import WindowInfo
+
+
+def _next_midnight(timestamp: float) -> float:
+    """timestamp の翌日0時（ローカル時刻、UNIX時間）"""
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class Sessionizer:
+    """ストリーミングで使用区間を作成する
+
+    push() に切り替え時点のレコードを順に渡すと、閉じた区間のリストを返す。
+    最後のレコードは次の切り替えか close() まで開いたままになる。
+    """
+
+    def __init__(self):
+        self.current: Optional[WindowInfo] = None
+
+        # 統計情報
+        self.intervals_closed = 0
+        self.day_splits = 0
+        self.clamped = 0
+
+    def push(self, record: WindowInfo) -> List[WindowInfo]:
+        """新しいレコードで直前の区間を閉じ、閉じた区間を返す
+
+        開いている区間より前の時刻のレコード（最後の入力時刻に遡る離席のマーカーなど）は
+        開始時刻を開いている区間の開始時刻に揃え、区間が重なったり順序が逆転したりしないようにする。
+        """
+        if self.current is not None and record.captured_at < self.current.captured_at:
+            record.captured_at = self.current.captured_at
+            record.timestamp = self.current.timestamp
+            self.clamped += 1
+        closed = self.close(record.captured_at)
+        self.current = record
+        return closed
+
+    def close(self, ended_at: float) -> List[WindowInfo]:
+        """開いている区間を ended_at で閉じる（終了時・日付変更時に使用）"""
+        if self.current is None:
+            return []
+        record, self.current = self.current, None
+        closed = self._split_at_midnight(record, max(ended_at, record.captured_at))
+        self.intervals_closed += len(closed)
+        return closed
+
+    def rollover(self, now: float) -> List[WindowInfo]:
+        """開いている区間が前日から続いていれば、前日分を閉じて返す
+
+        日付が変わった後に切り替えがなくても前日のログが完結するよう、
+        定期保存のたびに呼び出す。
+        """
+        if self.current is None:
+            return []
+        midnight = _next_midnight(self.current.captured_at)
+        if now < midnight:
+            return []
+        pieces = self._split_at_midnight(self.current, now)
+        # 最後の断片（今日の分）は開いたまま残す
+        self.current = dataclasses.replace(pieces[-1], ended_at=None)
+        closed = pieces[:-1]
+        self.intervals_closed += len(closed)
+        return closed
+
+    def _split_at_midnight(self, record: WindowInfo, ended_at: float) -> List[WindowInfo]:
+        pieces = []
+        start = record.captured_at
+        piece = record
+        while True:
+            midnight = _next_midnight(start)
+            if ended_at <= midnight:
+                piece.ended_at = ended_at
+                pieces.append(piece)
+                return pieces
+            piece.ended_at = midnight
+            pieces.append(piece)
+            self.day_splits += 1
+            # 補完中のレコードも分割後の断片で同じ結果を共有できるよう、Futureは引き継ぐ
+            piece = dataclasses.replace(
+                record,
+                captured_at=midnight,
+                timestamp=datetime.fromtimestamp(midnight).strftime('%Y-%m-%d %H:%M:%S'),
+                ended_at=None
+            )
+            start = midnight
@@ -0,0 +1,350 @@
+# background_writer.py
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Any, Set, Tuple
+from ..activity_log import record_to_row, row_to_record
+from ..models.window_info import WindowInfo
+
+# 退避ファイルの行に保存するジャーナルの通し番号
+SPILL_SEQ_KEY = '_seq'
+
+# 書き込みに失敗したときの再試行の間隔（秒、失敗が続くと最大まで倍にする）
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+
+
+class BackgroundWriter:
+    """レコードの永続化を専用スレッドで行うライター
+
+    キャプチャスレッドは put() でキューに入れるだけで、ディスクへの書き込みは
+    ライタースレッドがまとめて行う（グループコミット）。
+    batch_size 件溜まるか、最も古いレコードが max_batch_age 秒経つとコミットする。
+    補完処理中のレコードは補完が終わるか enrichment_timeout を過ぎるまで待つ
+    （順序を保つため、それ以降のレコードも待つ）。
+
+    キューが満杯のときの動作 (overflow_policy):
+        block       - 空きができるまで put() を待たせる
+        drop_oldest - 最も古いレコードを捨てる
+        spill       - 一時ファイルに退避し、キューが空いたら書き込む
+
+    書き込みに失敗したバッチ・退避ファイルは捨てずにキューの先頭として残し、間隔を空けて
+    再試行する（再試行が成功するまで後続のレコードは書き込まない）。
+    on_commit には、キューに入れた順で先頭から途切れずに書き込めた（または方針により
+    破棄した）最後の通し番号を渡す。書き込めていないレコードより先にチェックポイントが
+    進まないため、ジャーナルから回復できる。
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'spill')
+
+    def __init__(self, sink: Callable[[List[WindowInfo]], None],
+                 capacity: int = 500, batch_size: int = 50, max_batch_age: float = 3.0,
+                 overflow_policy: str = 'block', spill_path: Optional[str] = None,
+                 enrichment_timeout: float = 10.0,
+                 on_commit: Optional[Callable[[int], None]] = None):
+        """
+        Parameters:
+            sink (Callable): レコードのリストを書き込む関数（ライタースレッドから呼ばれる）
+            capacity (int): キューの最大件数
+            batch_size (int): この件数溜まったらコミットする
+            max_batch_age (float): 最も古いレコードがこの秒数経ったらコミットする
+            overflow_policy (str): キューが満杯のときの動作
+            spill_path (str): spill 方針で使う一時ファイル
+            enrichment_timeout (float): 補完を待つ最大秒数（キャプチャ時刻から）
+            on_commit (Callable): コミット後に、先頭から途切れずに確定した最後の通し番号を渡して呼ぶ関数
+        """
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if overflow_policy == 'spill' and not spill_path:
+            raise ValueError("spill_path is required for the spill policy")
+        self.sink = sink
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.max_batch_age = max_batch_age
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+        self.enrichment_timeout = enrichment_timeout
+        self.on_commit = on_commit
+
+        # (キューに入れた時刻, レコード, 通し番号)
+        self._queue: Deque[Tuple[float, WindowInfo, Optional[int]]] = deque()
+        self._condition = threading.Condition()
+        self._spilling = False
+        self._flush_requested = 0
+        self._flush_completed = 0
+        self._running = True
+        # 書き込めなかったバッチと退避ファイル（次の書き込みの前に再試行する）
+        self._retry_batch: List[Tuple[float, WindowInfo, Optional[int]]] = []
+        self._retry_draining: Optional[str] = None
+        self._retry_at = 0.0
+        self._retry_delay = RETRY_DELAY
+        # キューに入れた順の未確定の通し番号と、そのうち確定したもの
+        self._in_flight: Deque[int] = deque()
+        self._settled: Set[int] = set()
+
+        # 統計情報
+        self.enqueued = 0
+        self.committed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.blocked = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_commit_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, record: WindowInfo, seq: Optional[int] = None) -> None:
+        """レコードをキューに入れる（通常は待たずに戻る）
+
+        seq はジャーナルの通し番号で、コミット後に on_commit に渡される。
+        """
+        checkpoint = None
+        spilled = False
+        with self._condition:
+            if seq is not None:
+                self._in_flight.append(seq)
+            if self._spilling or len(self._queue) >= self.capacity:
+                if self.overflow_policy == 'block':
+                    self.blocked += 1
+                    while len(self._queue) >= self.capacity and self._running:
+                        self._condition.wait()
+                elif self.overflow_policy == 'drop_oldest':
+                    if len(self._queue) >= self.capacity:
+                        _, _, dropped_seq = self._queue.popleft()
+                        self.dropped += 1
+                        checkpoint = self._settle([dropped_seq])
+                else:
+                    # 退避中は順序を保つため、後続のレコードも退避する
+                    checkpoint = self._spill(record, seq)
+                    self._condition.notify_all()
+                    spilled = True
+            if not spilled:
+                self._queue.append((time.time(), record, seq))
+                self.enqueued += 1
+                if len(self._queue) >= self.batch_size:
+                    self._condition.notify_all()
+        self._notify_checkpoint(checkpoint)
+
+    def _spill(self, record: WindowInfo, seq: Optional[int]) -> Optional[int]:
+        record.sync_enrichment()
+        row = record_to_row(record)
+        row[SPILL_SEQ_KEY] = seq
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            self._spilling = True
+            self.spilled += 1
+            return None
+        except OSError as e:
+            self.dropped += 1
+            logging.error(f"Failed to spill record: {e}")
+            return self._settle([seq])
+
+    def _settle(self, seqs: Iterable[Optional[int]]) -> Optional[int]:
+        """書き込んだ（または破棄した）通し番号を記録する（ロック内で呼ぶ）
+
+        先頭から途切れずに確定した最後の通し番号が進んだ場合はそれを返す。
+        """
+        self._settled.update(seq for seq in seqs if seq is not None)
+        checkpoint = None
+        while self._in_flight and self._in_flight[0] in self._settled:
+            checkpoint = self._in_flight.popleft()
+            self._settled.discard(checkpoint)
+        return checkpoint
+
+    def _notify_checkpoint(self, checkpoint: Optional[int]) -> None:
+        if checkpoint is None or self.on_commit is None:
+            return
+        try:
+            self.on_commit(checkpoint)
+        except Exception as e:
+            logging.error(f"Error in commit callback: {e}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """キューとその時点の退避分をすべてコミットするまで待つ（補完は待たない）"""
+        with self._condition:
+            self._flush_requested += 1
+            ticket = self._flush_requested
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: self._flush_completed >= ticket or not self._thread.is_alive(),
+                timeout=timeout
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._retry_batch or self._retry_draining is not None:
+                        delay = self._retry_at - time.time()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(delay)
+                        continue
+                    if not self._running and not self._queue and not self._spilling:
+                        return
+                    force = self._flush_requested > self._flush_completed or not self._running
+                    ticket = self._flush_requested
+                    batch_ready = force or self._batch_due()
+                    if batch_ready or (self._spilling and not self._queue):
+                        break
+                    self._condition.wait(self._wait_timeout())
+
+                if self._retry_batch or self._retry_draining is not None:
+                    # 前回書き込めなかった分を、後続のレコードより先に書き込む
+                    batch, draining_path, force = self._retry_batch, self._retry_draining, False
+                    self._retry_batch, self._retry_draining = [], None
+                else:
+                    batch = self._take_ready(force)
+                    draining_path = None
+                    if self._spilling and not self._queue:
+                        draining_path = self._start_draining()
+                # 空きができたので待っている put() を起こす
+                self._condition.notify_all()
+
+            if batch and not self._commit(batch):
+                self._schedule_retry(batch, draining_path)
+                continue
+            if draining_path and not self._commit_spilled(draining_path):
+                self._schedule_retry([], draining_path)
+                continue
+            self._retry_delay = RETRY_DELAY
+
+            if force:
+                with self._condition:
+                    self._flush_completed = max(self._flush_completed, ticket)
+                    self._condition.notify_all()
+
+    def _batch_due(self) -> bool:
+        if not self._queue:
+            return False
+        if len(self._queue) >= self.batch_size:
+            return self._head_ready()
+        return time.time() - self._queue[0][0] >= self.max_batch_age and self._head_ready()
+
+    def _head_ready(self) -> bool:
+        record = self._queue[0][1]
+        return not record.is_enrichment_pending() or \
+            time.time() - record.captured_at >= self.enrichment_timeout
+
+    def _wait_timeout(self) -> float:
+        if not self._queue:
+            return self.max_batch_age
+        age = time.time() - self._queue[0][0]
+        return max(0.05, min(self.max_batch_age - age, 0.5) if age < self.max_batch_age else 0.25)
+
+    def _take_ready(self, force: bool) -> List[Tuple[float, WindowInfo, Optional[int]]]:
+        """先頭から連続して書き込めるレコードを取り出す（補完中のレコードで止まる）"""
+        batch = []
+        now = time.time()
+        while self._queue:
+            record = self._queue[0][1]
+            if not force and record.is_enrichment_pending() and \
+                    now - record.captured_at < self.enrichment_timeout:
+                break
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _schedule_retry(self, batch: List[Tuple[float, WindowInfo, Optional[int]]],
+                        draining_path: Optional[str]) -> None:
+        with self._condition:
+            self._retry_batch = batch
+            self._retry_draining = draining_path
+            self._retry_at = time.time() + self._retry_delay
+            self._retry_delay = min(self._retry_delay * 2, MAX_RETRY_DELAY)
+            self.retries += 1
+
+    def _commit(self, batch: List[Tuple[float, WindowInfo, Optional[int]]]) -> bool:
+        """batch を書き込み、成功したかを返す"""
+        started = time.time()
+        records = [record for _, record, _ in batch]
+        try:
+            self.sink(records)
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"Error committing {len(records)} records: {e}")
+            return False
+        finished = time.time()
+        self.batches += 1
+        self.committed += len(records)
+        self.total_commit_seconds += finished - started
+        for queued_at, _, _ in batch:
+            latency = finished - queued_at
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        with self._condition:
+            checkpoint = self._settle(seq for _, _, seq in batch)
+        self._notify_checkpoint(checkpoint)
+        return True
+
+    def _start_draining(self) -> Optional[str]:
+        """退避ファイルを書き込み用に切り離す（ロック内で呼ぶ）"""
+        self._spilling = False
+        draining_path = f"{self.spill_path}.draining"
+        try:
+            os.replace(self.spill_path, draining_path)
+            return draining_path
+        except OSError as e:
+            logging.error(f"Failed to take spill file: {e}")
+            return None
+
+    def _commit_spilled(self, path: str) -> bool:
+        """退避ファイルを書き込み、成功したら削除する（失敗したらファイルを残して False を返す）"""
+        records = []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        record = row_to_record(row)
+                    except ValueError:
+                        continue
+                    if record is not None:
+                        records.append((time.time(), record, row.get(SPILL_SEQ_KEY)))
+        except OSError as e:
+            logging.error(f"Failed to read spill file: {e}")
+            return False
+        if records and not self._commit(records):
+            return False
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """残りのレコードをすべて書き込んでからスレッドを止める"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+
+    @property
+    def queue_depth(self) -> int:
+        """書き込み待ちのレコード数（再試行待ちのバッチを含む）"""
+        return len(self._queue) + len(self._retry_batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue_depth,
+            'capacity': self.capacity,
+            'enqueued': self.enqueued,
+            'committed': self.committed,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'blocked': self.blocked,
+            'errors': self.errors,
+            'retries': self.retries,
+            'average_commit_latency': self.total_latency / self.committed if self.committed else 0.0,
+            'max_commit_latency': self.max_latency,
+            'average_commit_seconds': self.total_commit_seconds / self.batches if self.batches else 0.0
+        }
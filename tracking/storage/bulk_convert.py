@@ -0,0 +1,254 @@
+# bulk_convert.py
+import os
+import json
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Any, TextIO, Tuple
+from ..activity_log import (
+    FIELDNAMES, LEGACY_FIELDNAMES, detect_encoding, detect_schema, read_header,
+    iter_rows, row_to_record, convert_log_file, converted_path
+)
+from .columnar import csv_to_columnar, converted_columnar_path
+
+MANIFEST_FILENAME = 'bulk_convert_manifest.jsonl'
+
+# 変換先の形式
+TARGETS = ('intervals', 'columnar')
+
+LOG_PATTERNS = ('*_activity_log.csv', '*_activity_log.csv.gz')
+
+
+def find_logs(source_dir: str) -> List[str]:
+    """source_dir のログファイル（同じ日の .csv と .csv.gz があれば .csv のみ）"""
+    files: Dict[str, str] = {}
+    for pattern in reversed(LOG_PATTERNS):
+        for path in glob.glob(os.path.join(source_dir, pattern)):
+            # 圧縮前のCSVがあればそちらを優先する（後から見つかったもので上書き）
+            files[path[:-3] if path.endswith('.gz') else path] = path
+    # 大きいファイルから処理すると、最後に1つだけ残って待つ時間が短くなる
+    return sorted(files.values(), key=lambda path: (-os.path.getsize(path), path))
+
+
+def output_path_for(source_path: str, target: str, output_dir: Optional[str] = None) -> str:
+    if target == 'columnar':
+        return converted_columnar_path(source_path, output_dir)
+    return converted_path(source_path, output_dir)
+
+
+def describe_log(path: str) -> Dict[str, Any]:
+    """ログファイルの文字コードと形式（列の構成）を判定する"""
+    encoding = detect_encoding(path)
+    header = read_header(path)
+    schema = detect_schema(header)
+    expected = FIELDNAMES if schema == 'intervals' else LEGACY_FIELDNAMES
+    return {
+        'encoding': encoding,
+        'schema': schema,
+        # 書き込んだバージョンによって欠けている列・余分な列
+        'missing_columns': [name for name in expected if name not in header],
+        'extra_columns': [name for name in header if name not in FIELDNAMES]
+    }
+
+
+def validate_log(path: str) -> Dict[str, Any]:
+    """ログファイルの行を1行ずつ読み、読めない行・時刻の逆転を数える"""
+    rows = 0
+    bad_rows = 0
+    out_of_order = 0
+    last_start = None
+    for row in iter_rows(path):
+        rows += 1
+        record = row_to_record(row)
+        if record is None:
+            bad_rows += 1
+            continue
+        if last_start is not None and record.captured_at < last_start:
+            out_of_order += 1
+        last_start = record.captured_at
+    return {'rows': rows, 'bad_rows': bad_rows, 'out_of_order': out_of_order}
+
+
+def process_log(source_path: str, target: str, output_dir: Optional[str], validate_only: bool) -> Dict[str, Any]:
+    """1ファイルを判定し、検証または変換する（ワーカープロセスで実行）
+
+    例外は呼び出し元に投げず、結果の status / error に記録する。
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {'source': source_path, 'status': 'ok'}
+    try:
+        result.update(describe_log(source_path))
+        if result['schema'] == 'unknown':
+            raise ValueError(f"Unrecognized header: {read_header(source_path)}")
+        if validate_only:
+            result.update(validate_log(source_path))
+            if result['bad_rows']:
+                result['status'] = 'invalid'
+        else:
+            output_path = output_path_for(source_path, target, output_dir)
+            if os.path.abspath(output_path) == os.path.abspath(source_path):
+                raise ValueError(f"Output would overwrite the source: {output_path}")
+            if target == 'columnar':
+                result['rows'] = csv_to_columnar(source_path, output_path)
+            else:
+                result['rows'] = convert_log_file(source_path, output_path)
+            result['output'] = output_path
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+class BulkConverter:
+    """ログフォルダのログを1ファイル1タスクとしてプロセスプールで変換・検証する
+
+    処理が終わったファイルは manifest（1行1ファイルのJSON）に追記する。
+    中断した後に同じ条件で実行すると、manifest に成功として記録されていて
+    大きさ・更新時刻が変わっていないファイルは処理しない。
+    各ファイルは1行（列指向ログはブロック）ずつ読み書きするため、
+    ファイルの大きさによらずワーカー1つあたりのメモリ使用量は一定に収まる。
+    """
+
+    def __init__(self, source_dir: str, target: str = 'intervals', output_dir: Optional[str] = None,
+                 validate_only: bool = False, workers: int = 0,
+                 manifest_path: Optional[str] = None, resume: bool = True):
+        """
+        Parameters:
+            source_dir (str): ログフォルダ
+            target (str): 変換先の形式 (intervals / columnar)
+            output_dir (str): 変換後のファイルの保存先（省略時は元のファイルの隣）
+            validate_only (bool): 変換せずに検証だけを行う
+            workers (int): ワーカープロセス数（0以下でCPU数）
+            manifest_path (str): manifest のパス（省略時は保存先の bulk_convert_manifest.jsonl）
+            resume (bool): manifest に記録済みのファイルを処理しない
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target: {target}")
+        self.source_dir = source_dir
+        self.target = target
+        self.output_dir = output_dir
+        self.validate_only = validate_only
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.manifest_path = manifest_path or os.path.join(output_dir or source_dir, MANIFEST_FILENAME)
+        self.resume = resume
+
+        # 統計情報
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.rows = 0
+
+    @property
+    def mode(self) -> str:
+        return 'validate' if self.validate_only else self.target
+
+    @staticmethod
+    def _fingerprint(path: str) -> Tuple[int, float]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """元のファイル -> 最後に記録された結果（この mode のもの）"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 書き込み途中で中断した最後の行
+                        continue
+                    if entry.get('mode') == self.mode and 'source' in entry:
+                        entries[os.path.abspath(entry['source'])] = entry
+        except OSError:
+            pass
+        return entries
+
+    def _is_done(self, path: str, entry: Optional[Dict[str, Any]]) -> bool:
+        if entry is None or entry.get('status') != 'ok':
+            return False
+        size, mtime = self._fingerprint(path)
+        if entry.get('size') != size or entry.get('mtime') != mtime:
+            return False
+        return self.validate_only or os.path.exists(entry.get('output') or '')
+
+    def pending(self) -> List[str]:
+        """処理するファイル（manifest で完了済みのものを除く）"""
+        files = find_logs(self.source_dir)
+        if not self.resume:
+            return files
+        done = self._load_manifest()
+        pending = [path for path in files if not self._is_done(path, done.get(os.path.abspath(path)))]
+        self.skipped = len(files) - len(pending)
+        return pending
+
+    def run(self, on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """すべてのファイルを処理し、結果のリストを返す（on_result は終わったファイルごとに呼ぶ）"""
+        files = self.pending()
+        if not files:
+            return []
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+
+        self._terminate_partial_line()
+        results = []
+        with open(self.manifest_path, 'a', encoding='utf-8') as manifest, \
+                ProcessPoolExecutor(max_workers=min(self.workers, len(files))) as executor:
+            futures = {
+                executor.submit(process_log, path, self.target, self.output_dir, self.validate_only): path
+                for path in files
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # ワーカープロセス自体が異常終了した場合
+                    result = {'source': path, 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+                self._record(manifest, path, result)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        return results
+
+    def _terminate_partial_line(self) -> None:
+        """中断で書きかけになった最後の行を改行で閉じる（続けて追記した行まで読めなくならないように）"""
+        try:
+            with open(self.manifest_path, 'rb+') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        except OSError:
+            pass
+
+    def _record(self, manifest: TextIO, path: str, result: Dict[str, Any]) -> None:
+        try:
+            result['size'], result['mtime'] = self._fingerprint(path)
+        except OSError:
+            pass
+        result['mode'] = self.mode
+        result['finished_at'] = time.time()
+        manifest.write(json.dumps(result, ensure_ascii=False) + '\n')
+        # 中断しても終わったファイルを処理し直さないよう、1件ごとに書き出す
+        manifest.flush()
+
+        self.processed += 1
+        self.rows += result.get('rows', 0)
+        if result['status'] != 'ok':
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'rows': self.rows,
+            'manifest': self.manifest_path
+        }
@@ -0,0 +1,501 @@
+# columnar.py
+"""列指向のバイナリログ形式（*_activity_log.tacl）
+
+ファイルは先頭のマジックの後にブロックが続く。ブロックはグループコミット1回分の
+行を列ごとに zlib で圧縮して持ち、列ごとに読み飛ばせる（必要な列だけ展開できる）。
+
+    ファイル:   MAGIC ブロック*
+    ブロック:   BLOCK_HEADER(マジック, 行数, 列数, 以降のバイト数) 列ディレクトリ 列データ
+    列ディレクトリ: 列ごとに (列ID, 圧縮後のバイト数)
+
+文字列の列はファイル単位の辞書のIDで持つ。辞書は追記できるよう、各ブロックが
+そのブロックで新たに登録した文字列（DICTIONARY 列）を持ち、読み込み側が順に積み上げる。
+数値の列は型付きの配列で、開始時刻はミリ秒の差分で持つ。
+"""
+import os
+import sys
+import time
+import zlib
+import struct
+import logging
+import threading
+from array import array
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Any
+from ..activity_log import sanitize_text, iter_intervals, write_records
+from ..models.window_info import WindowInfo
+
+MAGIC = b'TACL\x00\x01\r\n'
+BLOCK_MAGIC = b'BLK1'
+# ブロックマジック, 行数, 列数, 以降（列ディレクトリ+列データ）のバイト数
+BLOCK_HEADER = struct.Struct('<4sIHI')
+COLUMN_ENTRY = struct.Struct('<BI')
+
+FILE_SUFFIX = '_activity_log.tacl'
+
+# 列ID
+DICTIONARY = 0
+START = 1
+DURATION = 2
+PROCESS_ID = 3
+IS_NEW_DOCUMENT = 4
+
+# 辞書で持つ文字列の列（WindowInfoのフィールド名 -> 列ID）
+STRING_COLUMNS = {
+    'process_name': 5,
+    'window_title': 6,
+    'application_name': 7,
+    'application_path': 8,
+    'working_directory': 9,
+    'monitor_type': 10,
+    'office_app_type': 11
+}
+
+# 読み込み時に指定できる列名
+COLUMNS = ('start', 'duration_ms', 'process_id', 'is_new_document') + tuple(STRING_COLUMNS)
+
+_NUMERIC_COLUMNS = {
+    'start': (START, 'q'),
+    'duration_ms': (DURATION, 'q'),
+    'process_id': (PROCESS_ID, 'I'),
+    'is_new_document': (IS_NEW_DOCUMENT, 'B')
+}
+
+_SANITIZED_COLUMNS = ('window_title', 'application_path', 'working_directory')
+
+# 継続時間が未確定の区間
+NO_DURATION = -1
+
+
+def _to_bytes(values: array) -> bytes:
+    # ファイル上はリトルエンディアン
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _encode_strings(strings: List[str]) -> bytes:
+    encoded = [s.encode('utf-8') for s in strings]
+    lengths = array('I', (len(b) for b in encoded))
+    return struct.pack('<I', len(encoded)) + _to_bytes(lengths) + b''.join(encoded)
+
+
+def _decode_strings(data: bytes) -> List[str]:
+    count = struct.unpack_from('<I', data)[0]
+    lengths = _from_bytes('I', data[4:4 + count * 4])
+    strings = []
+    offset = 4 + count * 4
+    for length in lengths:
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return strings
+
+
+class ColumnarLogWriter:
+    """日ごとの列指向ログに追記するライター
+
+    AppendOnlyCsvWriter と同じ append(date, records) で書き込める。
+    append() 1回が1ブロックになるため、グループコミットで件数をまとめるほど圧縮が効く。
+    """
+
+    def __init__(self, logs_dir: str, fsync_policy: str = 'interval',
+                 fsync_interval: float = 10.0, compression_level: int = 6):
+        """
+        Parameters:
+            logs_dir (str): ログディレクトリ
+            fsync_policy (str): fsync の方針 (always / interval / never)
+            fsync_interval (float): interval 方針での fsync の最小間隔（秒）
+            compression_level (int): zlib の圧縮レベル（0で無圧縮）
+        """
+        if fsync_policy not in ('always', 'interval', 'never'):
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.logs_dir = logs_dir
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.compression_level = compression_level
+
+        self._lock = threading.Lock()
+        self._handle: Optional[BinaryIO] = None
+        self._path: Optional[str] = None
+        # 開いているファイルの辞書（文字列 -> ID）
+        self._dictionary: Dict[str, int] = {}
+        self._last_fsync = 0.0
+
+        # 統計情報
+        self.appends = 0
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.repairs = 0
+        self.total_seconds = 0.0
+
+    @staticmethod
+    def log_filename(date: str) -> str:
+        return f"{date}{FILE_SUFFIX}"
+
+    def path_for(self, date: str) -> str:
+        return os.path.join(self.logs_dir, self.log_filename(date))
+
+    @property
+    def current_path(self) -> Optional[str]:
+        """書き込み中のファイル（開いていなければNone）"""
+        return self._path
+
+    def append(self, date: str, records: List[WindowInfo]) -> Optional[int]:
+        """date (YYYYMMDD) のログに records を1ブロックとして追記し、ファイルの末尾の位置を返す"""
+        if not records:
+            return None
+        started = time.perf_counter()
+        with self._lock:
+            handle = self._handle_for(self.path_for(date))
+            data = encode_block(records, self._dictionary, self.compression_level)
+            try:
+                handle.write(data)
+                handle.flush()
+            except Exception:
+                # 辞書とファイルの内容がずれるため、次回はファイルから読み直す
+                self._close_handle()
+                raise
+            self._sync_if_due(handle)
+            end_offset = handle.tell()
+            self.appends += 1
+            self.rows_written += len(records)
+            self.bytes_written += len(data)
+        self.total_seconds += time.perf_counter() - started
+        return end_offset
+
+    def file_size(self, date: str) -> Optional[int]:
+        """date (YYYYMMDD) のログの大きさ（ファイルがなければNone）"""
+        try:
+            return os.path.getsize(self.path_for(date))
+        except OSError:
+            return None
+
+    def iter_day(self, date: str) -> Iterator[WindowInfo]:
+        """date (YYYYMMDD) のログのレコードを順に返す"""
+        path = self.path_for(date)
+        if os.path.exists(path):
+            yield from iter_records(path)
+
+    def _handle_for(self, path: str) -> BinaryIO:
+        if self._path == path and self._handle is not None:
+            return self._handle
+
+        self._close_handle()
+        self._dictionary = {}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # 既存のファイルの辞書を復元し、途中で切れたブロックがあれば切り詰める
+            valid_size, strings = scan_dictionary(path)
+            if valid_size < os.path.getsize(path):
+                with open(path, 'rb+') as f:
+                    f.truncate(valid_size)
+                self.repairs += 1
+                logging.warning(f"Truncated partial block at end of {path}")
+            self._dictionary = {s: i for i, s in enumerate(strings)}
+
+        handle = open(path, 'ab')
+        if handle.tell() == 0:
+            handle.write(MAGIC)
+            handle.flush()
+        self._handle = handle
+        self._path = path
+        return handle
+
+    def _sync_if_due(self, handle: BinaryIO) -> None:
+        if self.fsync_policy == 'never':
+            return
+        now = time.monotonic()
+        if self.fsync_policy == 'interval' and now - self._last_fsync < self.fsync_interval:
+            return
+        os.fsync(handle.fileno())
+        self._last_fsync = now
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+                self._last_fsync = time.monotonic()
+
+    def tail_record(self, date: str) -> Optional[WindowInfo]:
+        """date (YYYYMMDD) のログの最後の行"""
+        path = self.path_for(date)
+        if not os.path.exists(path):
+            return None
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+        record = None
+        for record in iter_records(path):
+            pass
+        return record
+
+    def count(self, date: str) -> int:
+        """date (YYYYMMDD) の行数（ブロックヘッダーだけを読む）"""
+        path = self.path_for(date)
+        if not os.path.exists(path):
+            return 0
+        return sum(rows for rows, _ in iter_block_headers(path))
+
+    def _close_handle(self) -> None:
+        if self._handle is None:
+            return
+        try:
+            self._handle.flush()
+            if self.fsync_policy != 'never':
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+        except Exception as e:
+            logging.error(f"Error closing log file {self._path}: {e}")
+        self._handle = None
+        self._path = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_handle()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self._path,
+            'appends': self.appends,
+            'rows_written': self.rows_written,
+            'bytes_written': self.bytes_written,
+            'dictionary_size': len(self._dictionary),
+            'repairs': self.repairs,
+            'average_append_seconds': self.total_seconds / self.appends if self.appends else 0.0
+        }
+
+
+def encode_block(records: List[WindowInfo], dictionary: Dict[str, int], compression_level: int = 6) -> bytes:
+    """records を1ブロックに符号化する（新しい文字列は dictionary に登録する）"""
+    new_strings: List[str] = []
+
+    def string_id(value: Optional[str]) -> int:
+        value = value or ''
+        index = dictionary.get(value)
+        if index is None:
+            index = len(dictionary)
+            dictionary[value] = index
+            new_strings.append(value)
+        return index
+
+    starts = array('q')
+    durations = array('q')
+    process_ids = array('I')
+    new_documents = array('B')
+    strings = {name: array('I') for name in STRING_COLUMNS}
+    previous = 0
+    for record in records:
+        start_ms = int(round(record.captured_at * 1000))
+        starts.append(start_ms - previous)
+        previous = start_ms
+        duration_ms = record.duration_ms
+        durations.append(NO_DURATION if duration_ms is None else duration_ms)
+        process_ids.append(max(0, record.process_id or 0) & 0xFFFFFFFF)
+        new_documents.append(1 if record.is_new_document else 0)
+        for name, values in strings.items():
+            value = getattr(record, name)
+            if name in _SANITIZED_COLUMNS:
+                value = sanitize_text(value)
+            values.append(string_id(value))
+
+    # 開始時刻は差分、それ以外は値そのもの
+    columns = [
+        (START, _to_bytes(starts)),
+        (DURATION, _to_bytes(durations)),
+        (PROCESS_ID, _to_bytes(process_ids)),
+        (IS_NEW_DOCUMENT, _to_bytes(new_documents))
+    ]
+    columns.extend((STRING_COLUMNS[name], _to_bytes(values)) for name, values in strings.items())
+    # 辞書は最初に置く（文字列の列を読むときに必要）
+    columns.insert(0, (DICTIONARY, _encode_strings(new_strings)))
+
+    compressed = [(column_id, zlib.compress(data, compression_level)) for column_id, data in columns]
+    directory = b''.join(COLUMN_ENTRY.pack(column_id, len(data)) for column_id, data in compressed)
+    body = directory + b''.join(data for _, data in compressed)
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, len(records), len(compressed), len(body)) + body
+
+
+def _iter_blocks(f: BinaryIO) -> Iterator[tuple]:
+    """(行数, 列数, ブロック本体の開始位置, 本体のバイト数) を順に返す（壊れたブロックで止まる）"""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columnar activity log")
+    file_size = os.fstat(f.fileno()).st_size
+    while True:
+        header = f.read(BLOCK_HEADER.size)
+        if len(header) < BLOCK_HEADER.size:
+            return
+        magic, rows, column_count, body_size = BLOCK_HEADER.unpack(header)
+        body_start = f.tell()
+        if magic != BLOCK_MAGIC or body_start + body_size > file_size:
+            return
+        yield rows, column_count, body_start, body_size
+        f.seek(body_start + body_size)
+
+
+def iter_block_headers(path: str) -> Iterator[tuple]:
+    """ブロックごとの (行数, 本体のバイト数) を返す"""
+    with open(path, 'rb') as f:
+        for rows, _, _, body_size in _iter_blocks(f):
+            yield rows, body_size
+
+
+def scan_dictionary(path: str) -> tuple:
+    """(正常なブロックの末尾位置, 辞書の文字列リスト) を返す"""
+    strings: List[str] = []
+    with open(path, 'rb') as f:
+        valid_size = len(MAGIC)
+        for _, column_count, body_start, body_size in _iter_blocks(f):
+            columns = _read_directory(f, column_count)
+            if DICTIONARY in columns:
+                offset, size = columns[DICTIONARY]
+                f.seek(offset)
+                strings.extend(_decode_strings(zlib.decompress(f.read(size))))
+            valid_size = body_start + body_size
+    return valid_size, strings
+
+
+def _read_directory(f: BinaryIO, column_count: int) -> Dict[int, tuple]:
+    """列ディレクトリを読み、列ID -> (ファイル上の位置, バイト数) を返す"""
+    entries = [COLUMN_ENTRY.unpack(f.read(COLUMN_ENTRY.size)) for _ in range(column_count)]
+    offset = f.tell()
+    columns = {}
+    for column_id, size in entries:
+        columns[column_id] = (offset, size)
+        offset += size
+    return columns
+
+
+def iter_column_blocks(path: str, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, list]]:
+    """ブロックごとに、指定した列だけを展開して {列名: 値のリスト} を返す
+
+    指定しなかった列は展開しない。start はUNIX時間（秒）、duration_ms は未確定ならNone。
+    """
+    wanted = list(columns) if columns is not None else list(COLUMNS)
+    for name in wanted:
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown column: {name}")
+    needs_strings = any(name in STRING_COLUMNS for name in wanted)
+    dictionary: List[str] = []
+
+    with open(path, 'rb') as f:
+        for rows, column_count, _, _ in _iter_blocks(f):
+            locations = _read_directory(f, column_count)
+
+            def read_column(column_id: int) -> bytes:
+                offset, size = locations[column_id]
+                f.seek(offset)
+                return zlib.decompress(f.read(size))
+
+            if needs_strings and DICTIONARY in locations:
+                dictionary.extend(_decode_strings(read_column(DICTIONARY)))
+
+            block: Dict[str, list] = {}
+            for name in wanted:
+                if name in _NUMERIC_COLUMNS:
+                    column_id, typecode = _NUMERIC_COLUMNS[name]
+                    values = _from_bytes(typecode, read_column(column_id))
+                    if name == 'start':
+                        total = 0
+                        starts = []
+                        for delta in values:
+                            total += delta
+                            starts.append(total / 1000)
+                        block[name] = starts
+                    elif name == 'duration_ms':
+                        block[name] = [None if v == NO_DURATION else v for v in values]
+                    elif name == 'is_new_document':
+                        block[name] = [bool(v) for v in values]
+                    else:
+                        block[name] = values.tolist()
+                else:
+                    ids = _from_bytes('I', read_column(STRING_COLUMNS[name]))
+                    block[name] = [dictionary[i] for i in ids]
+            yield block
+
+
+def iter_rows(path: str, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """指定した列だけを持つ行を順に返す"""
+    for block in iter_column_blocks(path, columns):
+        names = list(block)
+        for values in zip(*(block[name] for name in names)):
+            yield dict(zip(names, values))
+
+
+def iter_records(path: str) -> Iterator[WindowInfo]:
+    """列指向ログの行をWindowInfoとして返す"""
+    for row in iter_rows(path):
+        start = row['start']
+        duration_ms = row['duration_ms']
+        yield WindowInfo.create(
+            captured_at=start,
+            ended_at=None if duration_ms is None else start + duration_ms / 1000,
+            timestamp=datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S'),
+            process_name=row['process_name'],
+            window_title=row['window_title'],
+            process_id=row['process_id'],
+            application_name=row['application_name'],
+            application_path=row['application_path'],
+            working_directory=row['working_directory'],
+            monitor_type=row['monitor_type'],
+            is_new_document=row['is_new_document'],
+            office_app_type=row['office_app_type'] or None
+        )
+
+
+def is_columnar_log(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def csv_to_columnar(source_path: str, output_path: str, block_rows: int = 4096,
+                    compression_level: int = 6) -> int:
+    """CSVログ（旧形式・区間形式）を列指向ログに変換し、行数を返す（ブロック単位で読み書きする）"""
+    dictionary: Dict[str, int] = {}
+    temp_path = f"{output_path}.tmp"
+    count = 0
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        block: List[WindowInfo] = []
+        for record in iter_intervals(source_path):
+            block.append(record)
+            if len(block) >= block_rows:
+                f.write(encode_block(block, dictionary, compression_level))
+                count += len(block)
+                block = []
+        if block:
+            f.write(encode_block(block, dictionary, compression_level))
+            count += len(block)
+    os.replace(temp_path, output_path)
+    return count
+
+
+def columnar_to_csv(source_path: str, output_path: str) -> int:
+    """列指向ログをCSVログ（区間形式）に変換し、行数を返す"""
+    temp_path = f"{output_path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    count = write_records(temp_path, iter_records(source_path))
+    os.replace(temp_path, output_path)
+    return count
+
+
+def converted_columnar_path(source_path: str, output_dir: Optional[str] = None) -> str:
+    """変換後のファイル名（*_activity_log.csv <-> *_activity_log.tacl）"""
+    directory, filename = os.path.split(source_path)
+    if filename.endswith('.gz'):
+        filename = filename[:-3]
+    stem, extension = os.path.splitext(filename)
+    name = stem + ('.csv' if extension == '.tacl' else '.tacl')
+    return os.path.join(output_dir or directory, name)
@@ -0,0 +1,270 @@
+# csv_writer.py
+import io
+import os
+import csv
+import time
+import logging
+import threading
+from typing import BinaryIO, Dict, Iterator, List, Optional, Any
+from ..activity_log import (
+    ENCODINGS, FIELDNAMES, record_to_row, row_to_record, read_header, iter_rows,
+    is_legacy_log, convert_log_file
+)
+from ..models.window_info import WindowInfo
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+class AppendOnlyCsvWriter:
+    """日ごとのアクティビティログに追記するライター
+
+    ログファイルのハンドルを開いたまま保持し、保存のたびに新しい行だけを追記する
+    （保存1回あたりのコストはファイルの大きさに依存しない）。
+    1回の保存で書く行はまとめて1回の write で書き込み、途中で異常終了して
+    行の途中までしか書かれていない場合は、次に開くときに最後の改行まで切り詰める。
+
+    fsync_policy:
+        always   - 保存のたびに fsync する
+        interval - 前回の fsync から fsync_interval 秒以上経っていれば fsync する
+        never    - fsync しない（OSに任せる）
+    """
+
+    FSYNC_POLICIES = ('always', 'interval', 'never')
+
+    def __init__(self, logs_dir: str, fsync_policy: str = 'interval',
+                 fsync_interval: float = 10.0, buffer_size: int = 65536):
+        """
+        Parameters:
+            logs_dir (str): ログディレクトリ
+            fsync_policy (str): fsync の方針 (always / interval / never)
+            fsync_interval (float): interval 方針での fsync の最小間隔（秒）
+            buffer_size (int): 書き込みバッファの大きさ（バイト）
+        """
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.logs_dir = logs_dir
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.buffer_size = buffer_size
+
+        self._lock = threading.Lock()
+        self._handle: Optional[BinaryIO] = None
+        self._path: Optional[str] = None
+        self._last_fsync = 0.0
+
+        # 統計情報
+        self.appends = 0
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.repairs = 0
+        self.total_seconds = 0.0
+
+    @staticmethod
+    def log_filename(date: str) -> str:
+        return f"{date}_activity_log.csv"
+
+    def path_for(self, date: str) -> str:
+        return os.path.join(self.logs_dir, self.log_filename(date))
+
+    @property
+    def current_path(self) -> Optional[str]:
+        """書き込み中のファイル（開いていなければNone）"""
+        return self._path
+
+    def append(self, date: str, records: List[WindowInfo]) -> Optional[int]:
+        """date (YYYYMMDD) のログに records を追記し、書き込み後のファイルの末尾の位置を返す"""
+        if not records:
+            return None
+        started = time.perf_counter()
+        data = self._encode(records)
+        with self._lock:
+            handle = self._handle_for(self.path_for(date))
+            handle.write(data)
+            handle.flush()
+            self._sync_if_due(handle)
+            end_offset = handle.tell()
+            self.appends += 1
+            self.rows_written += len(records)
+            self.bytes_written += len(data)
+        self.total_seconds += time.perf_counter() - started
+        return end_offset
+
+    def file_size(self, date: str) -> Optional[int]:
+        """date (YYYYMMDD) のログの大きさ（ファイルがなければNone）"""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+        try:
+            return os.path.getsize(self.path_for(date))
+        except OSError:
+            return None
+
+    def iter_day(self, date: str) -> Iterator[WindowInfo]:
+        """date (YYYYMMDD) のログのレコードを順に返す（圧縮済みのログも読む）"""
+        path = self.path_for(date)
+        if not os.path.exists(path):
+            path = f"{path}.gz"
+            if not os.path.exists(path):
+                return
+        for row in iter_rows(path):
+            record = row_to_record(row)
+            if record is not None:
+                yield record
+
+    def _encode(self, records: List[WindowInfo]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+        for record in records:
+            writer.writerow(record_to_row(record))
+        return buffer.getvalue().encode('utf-8')
+
+    def _handle_for(self, path: str) -> BinaryIO:
+        if self._path == path and self._handle is not None:
+            return self._handle
+
+        # 日付が変わったら前日のファイルを閉じる
+        self._close_handle()
+
+        if os.path.exists(path):
+            # 旧形式（区間の列なし）のファイルは先に区間形式に変換する
+            if is_legacy_log(path):
+                convert_log_file(path, path)
+            self._repair_partial_line(path)
+
+        handle = open(path, 'ab', buffering=self.buffer_size)
+        if handle.tell() == 0:
+            header = io.StringIO()
+            csv.DictWriter(header, fieldnames=FIELDNAMES).writeheader()
+            handle.write(UTF8_BOM + header.getvalue().encode('utf-8'))
+            handle.flush()
+        self._handle = handle
+        self._path = path
+        return handle
+
+    def _repair_partial_line(self, path: str) -> None:
+        """最後の行が途中で切れていれば、最後の改行まで切り詰める"""
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # 末尾から改行を探す（行は長くないので最後のブロックだけ読む）
+            position = size
+            while position > 0:
+                block_start = max(0, position - 4096)
+                f.seek(block_start)
+                block = f.read(position - block_start)
+                newline = block.rfind(b'\n')
+                if newline >= 0:
+                    f.truncate(block_start + newline + 1)
+                    break
+                position = block_start
+            else:
+                f.truncate(0)
+            self.repairs += 1
+            logging.warning(f"Truncated partial line at end of {path}")
+
+    def _sync_if_due(self, handle: BinaryIO) -> None:
+        if self.fsync_policy == 'never':
+            return
+        now = time.monotonic()
+        if self.fsync_policy == 'interval' and now - self._last_fsync < self.fsync_interval:
+            return
+        os.fsync(handle.fileno())
+        self._last_fsync = now
+        self.fsyncs += 1
+
+    def tail_record(self, date: str) -> Optional[WindowInfo]:
+        """date (YYYYMMDD) のログの最後の行（ジャーナルの回復時に重複を避けるために使う）"""
+        path = self.path_for(date)
+        if not os.path.exists(path):
+            # 保守処理で圧縮済みの場合
+            compressed_path = f"{path}.gz"
+            if not os.path.exists(compressed_path):
+                return None
+            last_row = None
+            for last_row in iter_rows(compressed_path):
+                pass
+            return row_to_record(last_row) if last_row else None
+
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+        header = read_header(path)
+        line = self._read_last_line(path)
+        if not header or line is None:
+            return None
+        for encoding in ENCODINGS:
+            try:
+                values = next(csv.reader([line.decode(encoding)]), [])
+            except UnicodeDecodeError:
+                continue
+            if values == header:
+                return None
+            return row_to_record(dict(zip(header, values)))
+        return None
+
+    @staticmethod
+    def _read_last_line(path: str) -> Optional[bytes]:
+        """最後の完全な行を返す（途中で切れた行は無視し、ファイル全体は読まない）"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0:
+                block_start = max(0, position - 4096)
+                f.seek(block_start)
+                data = f.read(position - block_start) + data
+                position = block_start
+                last_newline = data.rfind(b'\n')
+                if last_newline < 0:
+                    continue
+                complete = data[:last_newline]
+                previous_newline = complete.rfind(b'\n')
+                if previous_newline >= 0 or position == 0:
+                    line = complete[previous_newline + 1:].rstrip(b'\r')
+                    if line.startswith(UTF8_BOM):
+                        line = line[len(UTF8_BOM):]
+                    return line or None
+        return None
+
+    def sync(self) -> None:
+        """方針に関係なく、書き込み済みの内容をディスクに反映する"""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+                self._last_fsync = time.monotonic()
+                self.fsyncs += 1
+
+    def _close_handle(self) -> None:
+        if self._handle is None:
+            return
+        try:
+            self._handle.flush()
+            if self.fsync_policy != 'never':
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+        except Exception as e:
+            logging.error(f"Error closing log file {self._path}: {e}")
+        self._handle = None
+        self._path = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_handle()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self._path,
+            'appends': self.appends,
+            'rows_written': self.rows_written,
+            'bytes_written': self.bytes_written,
+            'fsyncs': self.fsyncs,
+            'repairs': self.repairs,
+            'average_append_seconds': self.total_seconds / self.appends if self.appends else 0.0
+        }
@@ -0,0 +1,181 @@
+# daily_stats.py
+import os
+import json
+import glob
+import time
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Any
+from ..activity_log import iter_rows, row_to_record, sanitize_text
+from ..models.window_info import WindowInfo
+
+STATS_SUFFIX = '_activity_stats.json'
+
+
+def stats_path(logs_dir: str, date: str) -> str:
+    return os.path.join(logs_dir, f"{date}{STATS_SUFFIX}")
+
+
+def empty_stats(date: str) -> Dict[str, Any]:
+    return {
+        'date': date,
+        'record_count': 0,
+        # モニタータイプ -> 区間数
+        'monitor_types': {},
+        # モニタータイプ -> 合計時間（ミリ秒）
+        'durations_ms': {},
+        'last_record': None,
+        # ログファイルの書き込み済みの末尾（ファイルに保存しない形式ではNone）
+        'byte_offset': None,
+        'updated_at': None
+    }
+
+
+def merge_records(stats: Dict[str, Any], records: Iterable[WindowInfo]) -> None:
+    """stats に records の件数・時間を加える"""
+    last = None
+    for record in records:
+        stats['record_count'] += 1
+        monitor_type = record.monitor_type or ''
+        stats['monitor_types'][monitor_type] = stats['monitor_types'].get(monitor_type, 0) + 1
+        duration_ms = record.duration_ms
+        if duration_ms is not None:
+            stats['durations_ms'][monitor_type] = stats['durations_ms'].get(monitor_type, 0) + duration_ms
+        last = record
+    if last is not None:
+        stats['last_record'] = {
+            'start': last.start,
+            'end': last.end,
+            'process_name': last.process_name,
+            'window_title': sanitize_text(last.window_title),
+            'monitor_type': last.monitor_type
+        }
+
+
+class DailyStatsIndex:
+    """日ごとの統計情報（件数・モニタータイプ別の件数と時間・最後のレコード）のサイドカー
+
+    ログへの書き込みのたびに update() で更新し、<日付>_activity_stats.json に
+    一時ファイルからの置き換えで書き込む（読み込み側が書きかけのファイルを見ることはない）。
+    GUIなどはログを読み直さずに get() で統計情報を取得できる。
+    """
+
+    def __init__(self, logs_dir: str):
+        """
+        Parameters:
+            logs_dir (str): ログディレクトリ
+        """
+        self.logs_dir = logs_dir
+        self._lock = threading.Lock()
+        # 日付 -> 統計情報（読み込み済み・更新済みのもの）
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+        # 統計情報
+        self.updates = 0
+        self.rebuilds = 0
+
+    def get(self, date: str) -> Dict[str, Any]:
+        """date (YYYYMMDD) の統計情報（なければ空の統計情報）"""
+        with self._lock:
+            return dict(self._load(date))
+
+    def _load(self, date: str) -> Dict[str, Any]:
+        stats = self._cache.get(date)
+        if stats is not None:
+            return stats
+        stats = load_stats(self.logs_dir, date) or empty_stats(date)
+        # 前日以前の分は必要なときに読み直す
+        self._cache = {d: s for d, s in self._cache.items() if d >= date}
+        self._cache[date] = stats
+        return stats
+
+    def update(self, date: str, records: List[WindowInfo], byte_offset: Optional[int]) -> None:
+        """ログに追記した records を反映してサイドカーを書き込む"""
+        with self._lock:
+            stats = self._load(date)
+            merge_records(stats, records)
+            stats['byte_offset'] = byte_offset
+            stats['updated_at'] = time.time()
+            self._write(stats)
+            self.updates += 1
+
+    def is_stale(self, date: str, byte_offset: Optional[int], record_count: Optional[int] = None) -> bool:
+        """サイドカーがログと一致していないか（前回の書き込みとサイドカーの更新の間で終了した場合など）"""
+        with self._lock:
+            stats = self._load(date)
+        if byte_offset is not None:
+            return stats['byte_offset'] != byte_offset
+        if record_count is not None:
+            return stats['record_count'] != record_count
+        return False
+
+    def rebuild(self, date: str, records: Iterable[WindowInfo], byte_offset: Optional[int]) -> Dict[str, Any]:
+        """ログのレコードから統計情報を作り直す"""
+        stats = empty_stats(date)
+        merge_records(stats, records)
+        stats['byte_offset'] = byte_offset
+        stats['updated_at'] = time.time()
+        with self._lock:
+            self._cache[date] = stats
+            self._write(stats)
+            self.rebuilds += 1
+        return dict(stats)
+
+    def _write(self, stats: Dict[str, Any]) -> None:
+        path = stats_path(self.logs_dir, stats['date'])
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.error(f"Failed to write stats {path}: {e}")
+
+
+def load_stats(logs_dir: str, date: str) -> Optional[Dict[str, Any]]:
+    """サイドカーを読み込む（なければ、または壊れていればNone）"""
+    try:
+        with open(stats_path(logs_dir, date), 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return None
+    merged = empty_stats(date)
+    merged.update(stats)
+    return merged
+
+
+def log_files_by_date(logs_dir: str) -> Dict[str, str]:
+    """日付 -> その日のログファイル（CSV・圧縮済みCSV・列指向ログ）"""
+    files: Dict[str, str] = {}
+    for pattern in ('*_activity_log.csv.gz', '*_activity_log.tacl', '*_activity_log.csv'):
+        for path in sorted(glob.glob(os.path.join(logs_dir, pattern))):
+            date = os.path.basename(path)[:8]
+            if date.isdigit():
+                # 圧縮前のCSVがあればそちらを優先する（後から見つかったもので上書き）
+                files[date] = path
+    return files
+
+
+def iter_log_records(path: str) -> Iterator[WindowInfo]:
+    """ログファイルのレコードを順に返す（形式はファイル名で判定）"""
+    if path.endswith('.tacl'):
+        from .columnar import iter_records
+        yield from iter_records(path)
+        return
+    for row in iter_rows(path):
+        record = row_to_record(row)
+        if record is not None:
+            yield record
+
+
+def rebuild_log_stats(logs_dir: str, dates: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """ログフォルダのファイルから日ごとの統計情報を作り直す"""
+    index = DailyStatsIndex(logs_dir)
+    results = []
+    for date, path in sorted(log_files_by_date(logs_dir).items()):
+        if dates and date not in dates:
+            continue
+        # 圧縮済みのファイルには追記しないため、末尾の位置は記録しない
+        byte_offset = None if path.endswith('.gz') else os.path.getsize(path)
+        results.append(index.rebuild(date, iter_log_records(path), byte_offset))
+    return results
@@ -0,0 +1,211 @@
+# journal.py
+import os
+import json
+import time
+import logging
+import threading
+from typing import BinaryIO, Dict, List, Optional, Any, Tuple
+from ..activity_log import record_to_row, row_to_record
+from ..models.window_info import WindowInfo
+
+
+class WriteAheadJournal:
+    """書き込みキューに入れたレコードを先に記録しておく追記専用のジャーナル
+
+    キューに入れたレコードはライタースレッドがログに書き込むまでメモリにしかないため、
+    異常終了や電源断で失われないよう、1件ずつ通し番号を付けて1行のJSONとして追記する。
+    ログへの書き込みが終わるたびに checkpoint() でコミット済みの通し番号を記録し、
+    すべてコミット済みになればジャーナルを空にする。
+    起動時に pending() でコミットされていないレコードを取り出してログに書き戻す。
+
+    fsync_policy:
+        always   - 1件ごとに fsync する
+        interval - 前回の fsync から fsync_interval 秒以上経っていれば fsync する
+        never    - fsync しない（OSに任せる。プロセスの異常終了には耐えるが電源断には耐えない）
+    """
+
+    FSYNC_POLICIES = ('always', 'interval', 'never')
+
+    # コミット済みの行だけを含むジャーナルがこの大きさを超えたら詰め直す
+    COMPACT_SIZE = 1024 * 1024
+
+    def __init__(self, path: str, fsync_policy: str = 'interval', fsync_interval: float = 1.0):
+        """
+        Parameters:
+            path (str): ジャーナルファイルのパス
+            fsync_policy (str): fsync の方針 (always / interval / never)
+            fsync_interval (float): interval 方針での fsync の最小間隔（秒）
+        """
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._handle: Optional[BinaryIO] = None
+        self._last_fsync = 0.0
+        # 既存のジャーナルの続きから番号を振る（回復前に新しい行が混ざっても区別できるように）
+        self._next_seq = self._scan_last_seq() + 1
+        self._committed_seq = 0
+
+        # 統計情報
+        self.appended = 0
+        self.checkpoints = 0
+        self.truncations = 0
+        self.compactions = 0
+        self.fsyncs = 0
+
+    def _scan_last_seq(self) -> int:
+        entries, checkpoint = self._read()
+        last = max((seq for seq, _ in entries), default=0)
+        return max(last, checkpoint)
+
+    def _open(self) -> BinaryIO:
+        if self._handle is None:
+            self._handle = open(self.path, 'ab')
+        return self._handle
+
+    def append(self, record: WindowInfo) -> int:
+        """レコードを追記し、通し番号を返す"""
+        entry = {
+            'seq': 0,
+            'captured_at': record.captured_at,
+            'ended_at': record.ended_at,
+            'row': record_to_row(record)
+        }
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            entry['seq'] = seq
+            handle = self._open()
+            handle.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+            handle.flush()
+            self._sync_if_due(handle)
+            self.appended += 1
+        return seq
+
+    def _sync_if_due(self, handle: BinaryIO) -> None:
+        if self.fsync_policy == 'never':
+            return
+        now = time.monotonic()
+        if self.fsync_policy == 'interval' and now - self._last_fsync < self.fsync_interval:
+            return
+        os.fsync(handle.fileno())
+        self._last_fsync = now
+        self.fsyncs += 1
+
+    def checkpoint(self, seq: int) -> None:
+        """seq までのレコードがログに書き込まれたことを記録する"""
+        with self._lock:
+            if seq <= self._committed_seq:
+                return
+            self._committed_seq = seq
+            self.checkpoints += 1
+            handle = self._open()
+            if seq >= self._next_seq - 1:
+                # すべてコミット済みなので空にする（番号は続きから振る）
+                handle.truncate(0)
+                handle.seek(0)
+                handle.write(json.dumps({'checkpoint': seq}).encode('utf-8') + b'\n')
+                handle.flush()
+                self.truncations += 1
+                return
+            handle.write(json.dumps({'checkpoint': seq}).encode('utf-8') + b'\n')
+            handle.flush()
+            if handle.tell() > self.COMPACT_SIZE:
+                self._compact()
+
+    def _compact(self) -> None:
+        """コミットされていない行だけを残してジャーナルを書き直す（ロック内で呼ぶ）"""
+        entries, checkpoint = self._read_raw()
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps({'checkpoint': checkpoint}).encode('utf-8') + b'\n')
+            for seq, line in entries:
+                if seq > checkpoint:
+                    f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._handle.close()
+        self._handle = None
+        os.replace(temp_path, self.path)
+        self.compactions += 1
+
+    def _read_raw(self) -> Tuple[List[Tuple[int, bytes]], int]:
+        """(通し番号, 行) のリストと最後のチェックポイントを返す（壊れた行は無視）"""
+        entries = []
+        checkpoint = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # 書き込み途中で終了した最後の行
+                        break
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    if 'checkpoint' in data:
+                        checkpoint = max(checkpoint, int(data['checkpoint']))
+                    elif 'seq' in data:
+                        entries.append((int(data['seq']), line))
+        except OSError:
+            pass
+        return entries, checkpoint
+
+    def _read(self) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        entries, checkpoint = self._read_raw()
+        return [(seq, json.loads(line)) for seq, line in entries], checkpoint
+
+    def pending(self) -> List[WindowInfo]:
+        """最後のチェックポイントより後の（ログに書き込まれていない可能性がある）レコード"""
+        with self._lock:
+            entries, checkpoint = self._read()
+        records = []
+        for seq, data in entries:
+            if seq <= checkpoint:
+                continue
+            record = row_to_record(data.get('row') or {})
+            if record is None:
+                continue
+            # CSVの時刻はミリ秒で丸められているため、元の値を使う
+            record.captured_at = data.get('captured_at', record.captured_at)
+            record.ended_at = data.get('ended_at', record.ended_at)
+            records.append(record)
+        return records
+
+    def reset(self) -> None:
+        """回復が終わったジャーナルを空にする"""
+        with self._lock:
+            handle = self._open()
+            handle.truncate(0)
+            handle.seek(0)
+            self._committed_seq = self._next_seq - 1
+            handle.write(json.dumps({'checkpoint': self._committed_seq}).encode('utf-8') + b'\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                try:
+                    self._handle.flush()
+                    if self.fsync_policy != 'never':
+                        os.fsync(self._handle.fileno())
+                    self._handle.close()
+                except Exception as e:
+                    logging.error(f"Error closing journal {self.path}: {e}")
+                self._handle = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'appended': self.appended,
+            'next_seq': self._next_seq,
+            'committed_seq': self._committed_seq,
+            'checkpoints': self.checkpoints,
+            'truncations': self.truncations,
+            'compactions': self.compactions,
+            'fsyncs': self.fsyncs
+        }
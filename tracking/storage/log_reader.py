@@ -0,0 +1,373 @@
+# log_reader.py
+import io
+import os
+import csv
+import json
+import mmap
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+from ..activity_log import ENCODINGS, row_to_record, iter_rows
+from ..models.window_info import WindowInfo
+from .csv_writer import UTF8_BOM
+
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 2
+
+# 区間の列が末尾にある形式（現在の形式）
+INTERVAL_COLUMNS = ['start', 'end', 'duration_ms']
+
+# 索引が壊れていないかを確かめるため、索引済みの末尾の何バイトを覚えておくか
+FINGERPRINT_SIZE = 64
+
+
+def index_path(log_path: str) -> str:
+    """ログファイルの索引のパス（*_activity_log.csv -> *_activity_log.csv.idx）"""
+    return f"{log_path}{INDEX_SUFFIX}"
+
+
+def overlaps(line_start: float, line_finish: Optional[float], start: float, end: float) -> bool:
+    """区間が start 以上 end 未満の時間と重なるか（終了時刻のない区間は開始時刻で判定する）"""
+    if line_start >= end:
+        return False
+    if line_finish is None or line_finish == line_start:
+        return line_start >= start
+    return line_finish > start
+
+
+def read_range(path: str, start: float, end: float) -> List[WindowInfo]:
+    """path のログのうち start 以上 end 未満の時間と重なるレコード
+
+    CSVはメモリマップと索引で読む。保守処理で圧縮された *.gz は索引を作れないため、
+    先頭から1行ずつ読んで絞り込む。
+    """
+    if not path.endswith('.gz'):
+        return MappedLogReader(path).read_range(start, end)
+    records = []
+    for row in iter_rows(path):
+        record = row_to_record(row)
+        if record is not None and overlaps(record.captured_at, record.ended_at, start, end):
+            records.append(record)
+    return records
+
+
+class MappedLogReader:
+    """日ごとのCSVログをメモリマップして、時間範囲のレコードを読むリーダー
+
+    every 件ごと、または前の索引点から interval 秒以上経った行ごとに
+    (行の先頭の位置, 開始時刻, それより前の行の最大の終了時刻, 次の索引点までの最小の開始時刻)
+    を索引点として記録し、<ログ>.idx に保存する。read_range() は索引を二分探索して範囲の手前の行から
+    読み始め、範囲の終わりより後に始まる行しかない区切りは読み飛ばすため、ファイルの先頭から読み直さない。
+    ファイルが大きくなっていれば、前回索引を作った位置から続きだけを索引に加える。
+    ファイルが短くなった、または索引済みの末尾の内容が変わった場合は索引を作り直す。
+
+    行が開始時刻の順に並んでいなくても（回復で書き戻した行など）結果は変わらない。
+    書き込み中のファイルの切り詰め（途中まで書かれた行の修復）を妨げないよう、
+    メモリマップは呼び出しのたびに開いて閉じる。
+    """
+
+    def __init__(self, path: str, every: int = 1000, interval: float = 60.0, persist: bool = True):
+        """
+        Parameters:
+            path (str): ログファイル（*_activity_log.csv）
+            every (int): 索引点を置く行数の間隔
+            interval (float): 索引点を置く時刻の間隔（秒）
+            persist (bool): 索引をファイルに保存するか
+        """
+        if path.endswith('.gz'):
+            raise ValueError(f"Compressed logs cannot be memory-mapped: {path}")
+        self.path = path
+        self.index_path = index_path(path)
+        self.every = max(1, every)
+        self.interval = interval
+        self.persist = persist
+        self._lock = threading.Lock()
+        # 'YYYY-MM-DD HH' -> その時刻のエポック秒
+        self._hour_cache: Dict[bytes, float] = {}
+
+        # 統計情報
+        self.index_loads = 0
+        self.rebuilds = 0
+        self.bytes_indexed = 0
+        self.bytes_scanned = 0
+        self.queries = 0
+
+        self._reset()
+        if persist:
+            self._load_index()
+
+    def _reset(self) -> None:
+        self._header: List[str] = []
+        self._header_end = 0
+        self._indexed_offset = 0
+        self._records = 0
+        # [行の先頭の位置, 開始時刻, それより前の行の最大の終了時刻, 次の索引点までの最小の開始時刻]
+        self._entries: List[List[float]] = []
+        self._since_entry = 0
+        self._last_entry_time: Optional[float] = None
+        self._max_end = float('-inf')
+        self._fingerprint = b''
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (data.get('version') != INDEX_VERSION or data.get('every') != self.every
+                or data.get('interval') != self.interval):
+            return
+        try:
+            self._header = list(data['header'])
+            self._header_end = int(data['header_end'])
+            self._indexed_offset = int(data['indexed_offset'])
+            self._records = int(data['records'])
+            self._entries = [list(entry) for entry in data['entries']]
+            self._since_entry = int(data['since_entry'])
+            self._last_entry_time = data['last_entry_time']
+            max_end = data['max_end']
+            self._max_end = float('-inf') if max_end is None else float(max_end)
+            self._fingerprint = bytes.fromhex(data['fingerprint'])
+        except (KeyError, TypeError, ValueError):
+            self._reset()
+            return
+        self.index_loads += 1
+
+    def _save_index(self) -> None:
+        data = {
+            'version': INDEX_VERSION,
+            'every': self.every,
+            'interval': self.interval,
+            'header': self._header,
+            'header_end': self._header_end,
+            'indexed_offset': self._indexed_offset,
+            'records': self._records,
+            'since_entry': self._since_entry,
+            'last_entry_time': self._last_entry_time,
+            'max_end': None if self._max_end == float('-inf') else self._max_end,
+            'fingerprint': self._fingerprint.hex(),
+            'entries': self._entries
+        }
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logging.error(f"Failed to write log index {self.index_path}: {e}")
+
+    def _map(self) -> Optional[Tuple[Any, mmap.mmap]]:
+        """ログファイルを開いてメモリマップする（空またはファイルがなければNone）"""
+        try:
+            handle = open(self.path, 'rb')
+        except OSError:
+            return None
+        try:
+            if os.fstat(handle.fileno()).st_size == 0:
+                handle.close()
+                return None
+            return handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            handle.close()
+            return None
+
+    def refresh(self) -> int:
+        """索引を作った位置より後に追記された行を索引に加え、加えた行数を返す"""
+        with self._lock:
+            mapped = self._map()
+            if mapped is None:
+                if self._indexed_offset:
+                    self._reset()
+                return 0
+            handle, view = mapped
+            try:
+                return self._extend(view)
+            finally:
+                view.close()
+                handle.close()
+
+    def _extend(self, view: mmap.mmap) -> int:
+        size = len(view)
+        if self._indexed_offset and (size < self._indexed_offset or not self._matches_fingerprint(view)):
+            # 切り詰められた・置き換えられたファイル
+            self._reset()
+            self.rebuilds += 1
+        if not self._header:
+            if not self._read_header(view):
+                return 0
+        # 最後の改行までを索引にする（書き込み途中の行は次回に回す）
+        end = view.rfind(b'\n', self._indexed_offset, size) + 1
+        if end <= self._indexed_offset:
+            return 0
+
+        added = 0
+        parse = self._line_times
+        position = self._indexed_offset
+        while position < end:
+            line_end = view.find(b'\n', position, end) + 1
+            times = parse(view[position:line_end])
+            if times is not None:
+                start, finish = times
+                if finish is None:
+                    finish = start
+                if (self._last_entry_time is None or self._since_entry >= self.every
+                        or start - self._last_entry_time >= self.interval):
+                    # 最初の索引点より前に行はないため、その行の開始時刻を使う
+                    max_end = self._max_end if self._entries else start
+                    self._entries.append([position, start, max_end, start])
+                    self._since_entry = 0
+                    self._last_entry_time = start
+                elif start < self._entries[-1][3]:
+                    self._entries[-1][3] = start
+                if finish > self._max_end:
+                    self._max_end = finish
+                self._since_entry += 1
+                self._records += 1
+                added += 1
+            position = line_end
+
+        self.bytes_indexed += end - self._indexed_offset
+        self._indexed_offset = end
+        self._fingerprint = view[max(self._header_end, end - FINGERPRINT_SIZE):end]
+        if self.persist:
+            self._save_index()
+        return added
+
+    def _matches_fingerprint(self, view: mmap.mmap) -> bool:
+        end = self._indexed_offset
+        return view[end - len(self._fingerprint):end] == self._fingerprint
+
+    def _read_header(self, view: mmap.mmap) -> bool:
+        header_end = view.find(b'\n') + 1
+        if header_end <= 0:
+            return False
+        line = view[:header_end]
+        if line.startswith(UTF8_BOM):
+            line = line[len(UTF8_BOM):]
+        self._header = next(csv.reader([line.decode('ascii', errors='replace')]), [])
+        self._header_end = header_end
+        self._indexed_offset = header_end
+        self._fingerprint = b''
+        return bool(self._header)
+
+    def _line_times(self, line: bytes) -> Optional[Tuple[float, Optional[float]]]:
+        """行の (開始時刻, 終了時刻) を返す（終了時刻がなければNone）
+
+        現在の形式では区間の列が末尾にあり、カンマを含まないため、後ろから3列だけを切り出す。
+        """
+        line = line.rstrip(b'\r\n')
+        if not line:
+            return None
+        if self._header[-3:] == INTERVAL_COLUMNS:
+            fields = line.rsplit(b',', 3)
+            if len(fields) == 4 and fields[1]:
+                start = self._parse_time(fields[1])
+                if start is not None:
+                    if fields[3]:
+                        try:
+                            return start, start + int(fields[3]) / 1000
+                        except ValueError:
+                            pass
+                    return start, self._parse_time(fields[2]) if fields[2] else None
+        elif self._header[:1] == ['timestamp'] and 'start' not in self._header:
+            # 旧形式（切り替え時刻だけを先頭の列に持つ）
+            start = self._parse_time(line.split(b',', 1)[0])
+            if start is not None:
+                return start, None
+        record = self._parse_line(line)
+        if record is None:
+            return None
+        return record.captured_at, record.ended_at
+
+    def _parse_time(self, value: bytes) -> Optional[float]:
+        """'YYYY-MM-DD HH:MM:SS[.fff]' をエポック秒にする（時単位でキャッシュ）"""
+        if len(value) >= 19 and value[13:14] == b':' and value[16:17] == b':':
+            hour = value[:13]
+            base = self._hour_cache.get(hour)
+            if base is None:
+                try:
+                    base = datetime.strptime(hour.decode('ascii'), '%Y-%m-%d %H').timestamp()
+                except (UnicodeDecodeError, ValueError):
+                    return None
+                self._hour_cache[hour] = base
+            # datetime.timestamp() と同じ値になるよう、秒までとマイクロ秒を分けて足す
+            seconds, _, fraction = value[17:].partition(b'.')
+            try:
+                return (base + int(value[14:16]) * 60 + int(seconds)
+                        + (int(fraction[:6].ljust(6, b'0')) / 1e6 if fraction else 0))
+            except ValueError:
+                return None
+        # それ以外の書式は行全体を解析する
+        return None
+
+    def _parse_line(self, line: bytes, times: Optional[Tuple[float, Optional[float]]] = None) -> Optional[WindowInfo]:
+        for encoding in ENCODINGS:
+            try:
+                text = line.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+            values = next(csv.reader(io.StringIO(text)), None)
+            if not values:
+                return None
+            return row_to_record(dict(zip(self._header, values)), times)
+        return None
+
+    def read_range(self, start: float, end: float) -> List[WindowInfo]:
+        """start 以上 end 未満の時間と重なるレコード（エポック秒で指定）
+
+        終了時刻のないレコードは開始時刻が範囲内にあるものを返す。
+        """
+        with self._lock:
+            self.queries += 1
+            mapped = self._map()
+            if mapped is None:
+                return []
+            handle, view = mapped
+            try:
+                self._extend(view)
+                return self._scan(view, start, end)
+            finally:
+                view.close()
+                handle.close()
+
+    def _scan(self, view: mmap.mmap, start: float, end: float) -> List[WindowInfo]:
+        entries = self._entries
+        # それより前の行がすべて start より前に終わっている最後の索引点から読む
+        keys = [entry[2] for entry in entries]
+        first = max(bisect_left(keys, start) - 1, 0)
+
+        records = []
+        for i in range(first, len(entries)):
+            # 区切りの中の行がすべて end 以降に始まるなら読まない
+            if entries[i][3] >= end:
+                continue
+            position = int(entries[i][0])
+            limit = int(entries[i + 1][0]) if i + 1 < len(entries) else self._indexed_offset
+            self.bytes_scanned += limit - position
+            while position < limit:
+                line_end = view.find(b'\n', position, limit) + 1
+                line = view[position:line_end]
+                position = line_end
+                times = self._line_times(line)
+                if times is None or not overlaps(times[0], times[1], start, end):
+                    continue
+                # 索引のために解析した時刻をそのまま使う
+                record = self._parse_line(line.rstrip(b'\r\n'), times)
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'records': self._records,
+            'index_entries': len(self._entries),
+            'indexed_offset': self._indexed_offset,
+            'index_loads': self.index_loads,
+            'rebuilds': self.rebuilds,
+            'bytes_indexed': self.bytes_indexed,
+            'bytes_scanned': self.bytes_scanned,
+            'queries': self.queries
+        }
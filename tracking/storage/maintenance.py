@@ -0,0 +1,322 @@
+# maintenance.py
+import os
+import re
+import gzip
+import time
+import shutil
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Any
+from .log_reader import INDEX_SUFFIX
+
+# ログディレクトリ内の日ごとのファイル（YYYYMMDD_...）
+DAILY_FILE_PATTERN = re.compile(r'^(\d{8})_')
+# 圧縮の対象（CSVログ。列指向ログはすでに圧縮されている）
+COMPRESSIBLE_SUFFIXES = ('_activity_log.csv',)
+
+CHUNK_SIZE = 256 * 1024
+
+# 未保存のレコードを含む一時ファイル（書き込みキューの退避ファイルとジャーナル）
+PROTECTED_TEMP_PREFIXES = ('activity_spill', 'activity_journal')
+
+
+def _lower_thread_priority() -> None:
+    """呼び出したスレッドの優先度を下げる（失敗しても続行する）"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            THREAD_PRIORITY_LOWEST = -2
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_LOWEST)
+        elif hasattr(os, 'setpriority') and hasattr(threading, 'get_native_id'):
+            # Linuxではスレッドごとに nice 値を設定できる
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception as e:
+        logging.debug(f"Could not lower maintenance thread priority: {e}")
+
+
+class LogMaintenance:
+    """ログフォルダの保守を行うバックグラウンドジョブ
+
+    interval 秒ごとに次の処理を行う。
+        - 前日以前のCSVログを gzip で圧縮する（*.csv -> *.csv.gz）
+        - 保持期間（retention_days）を過ぎた日ごとのファイルを削除する
+          （archive_dir が指定されていればそこへ移動する）
+        - store（SQLiteのストア）が指定されていれば、保持期間を過ぎた日の区間を削除する
+          （archive_dir が指定されていれば日ごとのCSVに書き出してから削除する）。
+          WALは毎回切り詰め、vacuum_interval 秒ごとに VACUUM で空き領域を返す
+        - temp フォルダの古い一時ファイルと、書き込み途中で残った *.tmp を削除する
+
+    キャプチャを遅らせないよう、優先度を下げたスレッドで slice_seconds ごとに
+    pause_seconds 休みながら少しずつ処理する。
+    """
+
+    def __init__(self, logs_dir: str, temp_dir: str, retention_days: int = 30,
+                 archive_dir: Optional[str] = None, compress: bool = True,
+                 interval: float = 3600.0, temp_max_age: float = 86400.0,
+                 slice_seconds: float = 0.05, pause_seconds: float = 0.2,
+                 compress_delay: float = 3600.0, is_active: Optional[Callable[[str], bool]] = None,
+                 store: Optional[Any] = None, vacuum_interval: float = 7 * 86400.0):
+        """
+        Parameters:
+            logs_dir (str): ログディレクトリ
+            temp_dir (str): 一時ディレクトリ
+            retention_days (int): ログの保持日数（0で無期限）
+            archive_dir (str): 保持期間を過ぎたファイルの移動先（Noneなら削除）
+            compress (bool): 前日以前のCSVログを圧縮するか
+            interval (float): 保守処理の間隔（秒）
+            temp_max_age (float): この秒数より古い一時ファイルを削除する
+            slice_seconds (float): 続けて処理する最大時間（秒）
+            pause_seconds (float): 1回の処理の後に休む時間（秒）
+            compress_delay (float): 最後の書き込みからこの秒数経つまで圧縮しない
+            is_active (Callable): 書き込み中のファイルかどうかを判定する関数
+            store (SqliteActivityStore): 保持期間を適用するデータベース（ファイル単位でないストア）
+            vacuum_interval (float): store を VACUUM する間隔（秒）
+        """
+        self.logs_dir = logs_dir
+        self.temp_dir = temp_dir
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+        self.compress = compress
+        self.interval = interval
+        self.temp_max_age = temp_max_age
+        self.slice_seconds = slice_seconds
+        self.pause_seconds = pause_seconds
+        self.compress_delay = compress_delay
+        self.is_active = is_active or (lambda path: False)
+        self.store = store
+        self.vacuum_interval = vacuum_interval
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._slice_started = 0.0
+        self._last_vacuum = time.monotonic()
+
+        # 統計情報
+        self.runs = 0
+        self.compressed = 0
+        self.bytes_saved = 0
+        self.deleted = 0
+        self.archived = 0
+        self.temp_removed = 0
+        self.rows_deleted = 0
+        self.vacuums = 0
+        self.last_run: Optional[float] = None
+        self.last_duration = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="log-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        _lower_thread_priority()
+        # 起動直後のキャプチャと重ならないよう、少し待ってから始める
+        if self._stop_event.wait(min(60.0, self.interval)):
+            return
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Log maintenance failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self, today: Optional[date] = None) -> None:
+        """保守処理を1回行う"""
+        started = time.time()
+        self._slice_started = time.monotonic()
+        today = today or date.today()
+        self._enforce_retention(today)
+        if self.store is not None:
+            self._maintain_store(today)
+        if self.compress:
+            self._compress_closed_logs(today)
+        self._remove_stale_temp_files(started)
+        self.runs += 1
+        self.last_run = started
+        self.last_duration = time.time() - started
+
+    def _yield(self) -> bool:
+        """処理時間が slice_seconds を超えていれば休む（停止要求があれば False）"""
+        if time.monotonic() - self._slice_started >= self.slice_seconds:
+            if self._stop_event.wait(self.pause_seconds):
+                return False
+            self._slice_started = time.monotonic()
+        return not self._stop_event.is_set()
+
+    def _daily_files(self):
+        """(ファイルの日付, ファイル名) を順に返す"""
+        try:
+            names = sorted(os.listdir(self.logs_dir))
+        except OSError:
+            return
+        for name in names:
+            match = DAILY_FILE_PATTERN.match(name)
+            if not match:
+                continue
+            try:
+                file_date = datetime.strptime(match.group(1), '%Y%m%d').date()
+            except ValueError:
+                continue
+            yield file_date, name
+
+    def _enforce_retention(self, today: date) -> None:
+        if self.retention_days <= 0:
+            return
+        cutoff = today - timedelta(days=self.retention_days)
+        for file_date, name in list(self._daily_files()):
+            if file_date >= cutoff:
+                continue
+            if not self._yield():
+                return
+            path = os.path.join(self.logs_dir, name)
+            if self.is_active(path):
+                continue
+            try:
+                if self.archive_dir:
+                    os.makedirs(self.archive_dir, exist_ok=True)
+                    shutil.move(path, os.path.join(self.archive_dir, name))
+                    self.archived += 1
+                else:
+                    os.remove(path)
+                    self.deleted += 1
+            except OSError as e:
+                logging.error(f"Failed to expire {path}: {e}")
+
+    def _maintain_store(self, today: date) -> None:
+        if self.retention_days > 0:
+            cutoff = (today - timedelta(days=self.retention_days)).strftime('%Y%m%d')
+            for day in self.store.dates():
+                if day >= cutoff:
+                    break
+                if not self._yield():
+                    return
+                try:
+                    if self.archive_dir:
+                        os.makedirs(self.archive_dir, exist_ok=True)
+                        self.store.export_csv(day, os.path.join(self.archive_dir, f"{day}_activity_log.csv"))
+                        self.archived += 1
+                    self.rows_deleted += self.store.delete_day(day)
+                except Exception as e:
+                    logging.error(f"Failed to expire {day} from {self.store.db_path}: {e}")
+                    return
+        vacuum = time.monotonic() - self._last_vacuum >= self.vacuum_interval
+        try:
+            self.store.compact(vacuum=vacuum)
+        except Exception as e:
+            logging.error(f"Failed to compact {self.store.db_path}: {e}")
+            return
+        if vacuum:
+            self._last_vacuum = time.monotonic()
+            self.vacuums += 1
+
+    def _compress_closed_logs(self, today: date) -> None:
+        for file_date, name in list(self._daily_files()):
+            # 当日のログはまだ書き込み中
+            if file_date >= today or not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            path = os.path.join(self.logs_dir, name)
+            if self.is_active(path) or self._recently_modified(path):
+                continue
+            if not self._yield():
+                return
+            self._compress_file(path)
+
+    def _recently_modified(self, path: str) -> bool:
+        """日付の変わり目に前日分が書き込まれている途中の可能性があるファイル"""
+        try:
+            return time.time() - os.path.getmtime(path) < self.compress_delay
+        except OSError:
+            return True
+
+    def _compress_file(self, path: str) -> bool:
+        """path を path.gz に少しずつ圧縮し、元のファイルを削除する"""
+        output_path = f"{path}.gz"
+        temp_path = f"{output_path}.tmp"
+        if os.path.exists(output_path):
+            # 圧縮済みの後に同じ日のCSVが作られた場合は上書きせず、手作業での確認に任せる
+            logging.warning(f"Skipping compression of {path}: {output_path} already exists")
+            return False
+        try:
+            original_size = os.path.getsize(path)
+            stat = os.stat(path)
+            with open(path, 'rb') as source, open(temp_path, 'wb') as raw:
+                with gzip.GzipFile(filename=os.path.basename(path), mode='wb',
+                                   fileobj=raw, mtime=int(stat.st_mtime)) as target:
+                    while True:
+                        chunk = source.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        if not self._yield():
+                            break
+            if self._stop_event.is_set():
+                os.remove(temp_path)
+                return False
+            # 圧縮中に追記されていれば、次回に回す
+            if os.path.getsize(path) != original_size:
+                os.remove(temp_path)
+                return False
+            os.utime(temp_path, (stat.st_atime, stat.st_mtime))
+            os.replace(temp_path, output_path)
+            os.remove(path)
+            # 圧縮したログはメモリマップで読まないため、索引も不要になる
+            if os.path.exists(f"{path}{INDEX_SUFFIX}"):
+                os.remove(f"{path}{INDEX_SUFFIX}")
+            self.compressed += 1
+            self.bytes_saved += original_size - os.path.getsize(output_path)
+            return True
+        except OSError as e:
+            logging.error(f"Failed to compress {path}: {e}")
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+
+    def _remove_stale_temp_files(self, now: float) -> None:
+        candidates = []
+        try:
+            candidates.extend(os.path.join(self.temp_dir, name) for name in os.listdir(self.temp_dir)
+                              if not name.startswith(PROTECTED_TEMP_PREFIXES))
+        except OSError:
+            pass
+        try:
+            # 書き込み途中で残った一時ファイル
+            candidates.extend(os.path.join(self.logs_dir, name) for name in os.listdir(self.logs_dir)
+                              if name.endswith('.tmp'))
+        except OSError:
+            pass
+        for path in candidates:
+            if not self._yield():
+                return
+            try:
+                if not os.path.isfile(path) or now - os.path.getmtime(path) < self.temp_max_age:
+                    continue
+                os.remove(path)
+                self.temp_removed += 1
+            except OSError as e:
+                logging.error(f"Failed to remove {path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'runs': self.runs,
+            'compressed': self.compressed,
+            'bytes_saved': self.bytes_saved,
+            'deleted': self.deleted,
+            'archived': self.archived,
+            'temp_removed': self.temp_removed,
+            'rows_deleted': self.rows_deleted,
+            'vacuums': self.vacuums,
+            'last_run': self.last_run,
+            'last_duration': self.last_duration
+        }
@@ -0,0 +1,346 @@
+# sqlite_store.py
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Any, Sequence
+from ..activity_log import sanitize_text, read_intervals, write_records
+from ..models.window_info import WindowInfo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS strings (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    id INTEGER PRIMARY KEY,
+    start REAL NOT NULL,
+    end REAL,
+    duration_ms INTEGER,
+    timestamp TEXT NOT NULL,
+    process_id INTEGER NOT NULL,
+    process_name_id INTEGER NOT NULL REFERENCES strings(id),
+    window_title_id INTEGER NOT NULL REFERENCES strings(id),
+    application_name_id INTEGER NOT NULL REFERENCES strings(id),
+    application_path_id INTEGER NOT NULL REFERENCES strings(id),
+    working_directory_id INTEGER NOT NULL REFERENCES strings(id),
+    monitor_type_id INTEGER NOT NULL REFERENCES strings(id),
+    is_new_document INTEGER NOT NULL,
+    office_app_type TEXT
+);
+CREATE INDEX IF NOT EXISTS intervals_start ON intervals(start);
+CREATE INDEX IF NOT EXISTS intervals_process ON intervals(process_name_id, start);
+CREATE INDEX IF NOT EXISTS intervals_monitor_type ON intervals(monitor_type_id, start);
+-- 同じ区間を二重に取り込まないための一意制約（CSVの再取り込み時など）
+CREATE UNIQUE INDEX IF NOT EXISTS intervals_identity ON intervals(start, process_id, window_title_id);
+CREATE VIEW IF NOT EXISTS activity AS
+    SELECT i.id, i.start, i.end, i.duration_ms, i.timestamp, i.process_id,
+           pn.value AS process_name, wt.value AS window_title,
+           an.value AS application_name, ap.value AS application_path,
+           wd.value AS working_directory, mt.value AS monitor_type,
+           i.is_new_document, i.office_app_type
+    FROM intervals i
+    JOIN strings pn ON pn.id = i.process_name_id
+    JOIN strings wt ON wt.id = i.window_title_id
+    JOIN strings an ON an.id = i.application_name_id
+    JOIN strings ap ON ap.id = i.application_path_id
+    JOIN strings wd ON wd.id = i.working_directory_id
+    JOIN strings mt ON mt.id = i.monitor_type_id;
+"""
+
+# 文字列テーブルに格納する列（繰り返し現れる値）
+STRING_COLUMNS = (
+    'process_name',
+    'window_title',
+    'application_name',
+    'application_path',
+    'working_directory',
+    'monitor_type'
+)
+
+# fsync の方針に対応する synchronous の設定
+SYNCHRONOUS_MODES = {
+    'always': 'FULL',
+    'interval': 'NORMAL',
+    'never': 'OFF'
+}
+
+
+def default_sqlite_path(logs_dir: str) -> str:
+    """既定のデータベースファイルのパス（ログディレクトリ内）"""
+    return os.path.join(logs_dir, 'activity.db')
+
+
+def _day_range(date: str) -> Sequence[float]:
+    """YYYYMMDD の日の開始・終了（UNIX時間）"""
+    day = datetime.strptime(date, '%Y%m%d')
+    return day.timestamp(), (day + timedelta(days=1)).timestamp()
+
+
+class SqliteActivityStore:
+    """アクティビティログを SQLite に保存するストア
+
+    WALモードで開き、保存のたびに executemany で1トランザクションにまとめて挿入する。
+    プロセス名・タイトルなど繰り返し現れる文字列は strings テーブルに1回だけ格納し、
+    区間の行からはIDで参照する（activity ビューで結合した形で参照できる）。
+    AppendOnlyCsvWriter と同じ append(date, records) で書き込める。
+    文字列のIDは最近使ったものから string_cache_capacity 件までメモリに保持する。
+    """
+
+    def __init__(self, db_path: str, fsync_policy: str = 'interval', string_cache_capacity: int = 10000):
+        """
+        Parameters:
+            db_path (str): データベースファイルのパス
+            fsync_policy (str): fsync の方針 (always / interval / never)
+            string_cache_capacity (int): メモリに保持する文字列IDの最大数
+        """
+        if fsync_policy not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # ライタースレッドとGUI・コマンドから使うため、スレッドをまたいで共有する
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(f'PRAGMA synchronous={SYNCHRONOUS_MODES[fsync_policy]}')
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+        # 文字列 -> ID のキャッシュ（コミット済みのIDのみ。古いものから捨てる）
+        self.string_cache_capacity = max(1, string_cache_capacity)
+        self._string_ids: "OrderedDict[str, int]" = OrderedDict()
+
+        # 統計情報
+        self.appends = 0
+        self.rows_written = 0
+        self.duplicates = 0
+        self.total_seconds = 0.0
+
+    def path_for(self, date: str) -> str:
+        return self.db_path
+
+    @property
+    def current_path(self) -> Optional[str]:
+        return self.db_path
+
+    def append(self, date: str, records: List[WindowInfo]) -> Optional[int]:
+        """レコードを挿入する（date は CSV ライターとの互換性のためのもの。ファイルの位置はないのでNone）"""
+        self.insert_new(records)
+        return None
+
+    def file_size(self, date: str) -> Optional[int]:
+        return None
+
+    def iter_day(self, date: str) -> Iterator[WindowInfo]:
+        """date (YYYYMMDD) の区間を開始時刻順に返す"""
+        return self.iter_records(*_day_range(date))
+
+    def insert(self, records: List[WindowInfo]) -> int:
+        """レコードを1トランザクションで挿入し、挿入した件数を返す（既存の区間は無視）"""
+        return len(self.insert_new(records))
+
+    def insert_new(self, records: List[WindowInfo]) -> List[WindowInfo]:
+        """レコードを1トランザクションで挿入し、実際に挿入したもの（既存の区間と重複しないもの）を返す"""
+        if not records:
+            return []
+        started = time.perf_counter()
+        with self._lock:
+            with self._connection:
+                ids = self._resolve_strings(records)
+                # 既存の区間の一意キーを先に読み、挿入する行だけを1回の executemany で書き込む
+                existing = set(self._connection.execute(
+                    'SELECT start, process_id, window_title_id FROM intervals WHERE start >= ? AND start <= ?',
+                    (min(record.captured_at for record in records), max(record.captured_at for record in records))
+                ).fetchall())
+                inserted: List[WindowInfo] = []
+                rows = []
+                for record in records:
+                    row = self._to_row(record, ids)
+                    identity = (row[0], row[4], row[6])
+                    if identity in existing:
+                        continue
+                    existing.add(identity)
+                    inserted.append(record)
+                    rows.append(row)
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO intervals (start, end, duration_ms, timestamp, process_id, '
+                    'process_name_id, window_title_id, application_name_id, application_path_id, '
+                    'working_directory_id, monitor_type_id, is_new_document, office_app_type) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+            # コミットできたIDだけをキャッシュに入れる（ロールバックされたIDを残さない）
+            self._cache_string_ids(ids)
+        self.appends += 1
+        self.rows_written += len(inserted)
+        self.duplicates += len(records) - len(inserted)
+        self.total_seconds += time.perf_counter() - started
+        return inserted
+
+    def _resolve_strings(self, records: List[WindowInfo]) -> Dict[str, int]:
+        """レコードに含まれる文字列のIDを取得する（未登録の文字列は登録する。キャッシュは更新しない）"""
+        ids: Dict[str, int] = {}
+        missing = set()
+        for record in records:
+            for column in STRING_COLUMNS:
+                value = self._string_value(record, column)
+                if value in ids:
+                    continue
+                string_id = self._string_ids.get(value)
+                if string_id is None:
+                    missing.add(value)
+                else:
+                    self._string_ids.move_to_end(value)
+                    ids[value] = string_id
+        if missing:
+            values = [(value,) for value in missing]
+            self._connection.executemany('INSERT OR IGNORE INTO strings (value) VALUES (?)', values)
+            for value in missing:
+                row = self._connection.execute('SELECT id FROM strings WHERE value = ?', (value,)).fetchone()
+                ids[value] = row[0]
+        return ids
+
+    def _cache_string_ids(self, ids: Dict[str, int]) -> None:
+        for value, string_id in ids.items():
+            self._string_ids[value] = string_id
+            self._string_ids.move_to_end(value)
+        while len(self._string_ids) > self.string_cache_capacity:
+            self._string_ids.popitem(last=False)
+
+    @staticmethod
+    def _string_value(record: WindowInfo, column: str) -> str:
+        value = getattr(record, column) or ''
+        if column in ('window_title', 'application_path', 'working_directory'):
+            return sanitize_text(value)
+        return value
+
+    def _to_row(self, record: WindowInfo, ids: Dict[str, int]) -> tuple:
+        return (
+            record.captured_at,
+            record.ended_at,
+            record.duration_ms,
+            record.timestamp,
+            record.process_id,
+            *(ids[self._string_value(record, column)] for column in STRING_COLUMNS),
+            1 if record.is_new_document else 0,
+            record.office_app_type
+        )
+
+    def iter_records(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[WindowInfo]:
+        """開始時刻が [start, end) の区間を開始時刻順に返す"""
+        return self._iter_where(
+            'start >= ? AND start < ? ORDER BY start',
+            (start if start is not None else float('-inf'), end if end is not None else float('inf'))
+        )
+
+    def _iter_where(self, condition: str, parameters: tuple) -> Iterator[WindowInfo]:
+        query = 'SELECT start, end, timestamp, process_id, process_name, window_title, application_name, ' \
+                'application_path, working_directory, monitor_type, is_new_document, office_app_type ' \
+                f'FROM activity WHERE {condition}'
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        for row in rows:
+            yield WindowInfo.create(
+                captured_at=row[0],
+                ended_at=row[1],
+                timestamp=row[2],
+                process_id=row[3],
+                process_name=row[4],
+                window_title=row[5],
+                application_name=row[6],
+                application_path=row[7],
+                working_directory=row[8],
+                monitor_type=row[9],
+                is_new_document=bool(row[10]),
+                office_app_type=row[11]
+            )
+
+    def tail_record(self, date: str) -> Optional[WindowInfo]:
+        """date (YYYYMMDD) に最後に挿入した区間"""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT MAX(id) FROM intervals WHERE start >= ? AND start < ?', _day_range(date)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        for record in self._iter_where('id = ?', (row[0],)):
+            return record
+        return None
+
+    def dates(self) -> List[str]:
+        """区間が存在する日付 (YYYYMMDD) の一覧"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT strftime('%Y%m%d', start, 'unixepoch', 'localtime') FROM intervals ORDER BY 1"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, date: str) -> int:
+        """date (YYYYMMDD) の区間数"""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM intervals WHERE start >= ? AND start < ?', _day_range(date)
+            ).fetchone()[0]
+
+    def export_csv(self, date: str, output_path: str) -> int:
+        """date (YYYYMMDD) の区間をCSV（*_activity_log.csv と同じ形式）に書き出す"""
+        records = list(self.iter_records(*_day_range(date)))
+        temp_path = f"{output_path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        write_records(temp_path, records)
+        os.replace(temp_path, output_path)
+        return len(records)
+
+    def import_csv(self, source_path: str) -> int:
+        """CSVログ（旧形式・区間形式）を取り込み、追加した区間数を返す"""
+        return self.insert(read_intervals(source_path))
+
+    def delete_day(self, date: str) -> int:
+        """date (YYYYMMDD) の区間を削除し、削除した件数を返す（どの区間からも参照されない文字列も消す）"""
+        with self._lock:
+            with self._connection:
+                deleted = self._connection.execute(
+                    'DELETE FROM intervals WHERE start >= ? AND start < ?', _day_range(date)
+                ).rowcount
+                if deleted:
+                    self._connection.execute(
+                        'DELETE FROM strings WHERE id NOT IN ('
+                        + ' UNION '.join(f'SELECT {column}_id FROM intervals' for column in STRING_COLUMNS)
+                        + ')'
+                    )
+            if deleted:
+                # 消した文字列のIDが再利用されることがあるため、キャッシュを作り直す
+                self._string_ids.clear()
+        return deleted
+
+    def compact(self, vacuum: bool = False) -> None:
+        """WALをデータベースファイルに書き戻して切り詰める（vacuum なら空き領域も返す）"""
+        with self._lock:
+            if vacuum:
+                self._connection.execute('VACUUM')
+            self._connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def sync(self) -> None:
+        """WALの内容をデータベースファイルに反映する"""
+        with self._lock:
+            self._connection.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.db_path,
+            'appends': self.appends,
+            'rows_written': self.rows_written,
+            'duplicates': self.duplicates,
+            'strings_cached': len(self._string_ids),
+            'string_cache_capacity': self.string_cache_capacity,
+            'average_append_seconds': self.total_seconds / self.appends if self.appends else 0.0
+        }
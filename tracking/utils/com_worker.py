@@ -0,0 +1,272 @@
+# com_worker.py
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional, Dict, TypeVar
+from .office_attach import RunningObjectRegistry, StandInRegistry, Win32RunningObjectRegistry
+
+T = TypeVar('T')
+
+
+class ComCallTimeout(Exception):
+    """COM呼び出しが期限内に完了しなかった"""
+    pass
+
+
+class ComProvider:
+    """COMオブジェクトの取得方法（テスト時はFakeComProviderに差し替える）
+
+    オブジェクトは実行中のインスタンスへの接続でのみ取得し、
+    新しいインスタンスを起動することはない。
+    """
+
+    def __init__(self, registry: Optional[RunningObjectRegistry] = None):
+        self.registry = registry
+
+    def initialize(self) -> None:
+        """ワーカースレッドの開始時に呼ばれる（STAの初期化）"""
+        pass
+
+    def uninitialize(self) -> None:
+        """ワーカースレッドの終了時に呼ばれる"""
+        pass
+
+    def get_object(self, app_name: str, pid: int) -> Optional[Any]:
+        """pid が所有する実行中のApplicationオブジェクトを取得（なければNone）"""
+        if self.registry is None:
+            return None
+        return self.registry.find_application(app_name, pid)
+
+    def release_object(self, app_name: str, com_object: Any) -> None:
+        pass
+
+
+class Win32ComProvider(ComProvider):
+    """pywin32によるCOMオブジェクトの取得"""
+
+    def __init__(self, registry: Optional[RunningObjectRegistry] = None):
+        super().__init__(registry or Win32RunningObjectRegistry())
+
+    def initialize(self) -> None:
+        import pythoncom
+        pythoncom.CoInitialize()
+
+    def uninitialize(self) -> None:
+        import pythoncom
+        pythoncom.CoUninitialize()
+
+
+class FakeComProvider(ComProvider):
+    """テスト用のCOMプロバイダー
+
+    StandInRegistry に (アプリ名, PID) ごとのオブジェクトを登録しておく。
+    delay を設定するとオブジェクト取得に時間がかかる状況（ハングしたOffice）を再現できる。
+    """
+
+    def __init__(self, registry: Optional[StandInRegistry] = None, delay: float = 0.0):
+        super().__init__(registry or StandInRegistry())
+        self.delay = delay
+        self.created = 0
+        self.released = 0
+        self.initialized_threads = set()
+
+    def initialize(self) -> None:
+        self.initialized_threads.add(threading.get_ident())
+
+    def get_object(self, app_name: str, pid: int) -> Optional[Any]:
+        if self.delay:
+            time.sleep(self.delay)
+        com_object = super().get_object(app_name, pid)
+        if com_object is not None:
+            self.created += 1
+        return com_object
+
+    def release_object(self, app_name: str, com_object: Any) -> None:
+        self.released += 1
+
+
+class ComWorker:
+    """1つのOfficeアプリケーション用のCOMワーカースレッド
+
+    専用スレッドでSTAを保持し、PIDごとに接続したオブジェクトを再利用する。
+    呼び出しはキューで受け付け、呼び出しごとの期限を過ぎると ComCallTimeout を送出する。
+    ハングしたアプリケーションがあってもブロックされるのはこのワーカーだけで、
+    処理中の呼び出しが期限を過ぎている間は新しい呼び出しを即座に失敗させる。
+    一定時間使われなければ自分のタイマーでオブジェクトを解放する。
+    """
+
+    def __init__(self, app_name: str, provider: Optional[ComProvider] = None,
+                 idle_timeout: float = 30.0, call_timeout: float = 3.0):
+        """
+        Parameters:
+            app_name (str): COMオブジェクト名 ('Excel.Application' など)
+            provider (ComProvider): COMオブジェクトの取得方法
+            idle_timeout (float): この秒数使われなければオブジェクトを解放
+            call_timeout (float): 呼び出しごとの既定の期限（秒）
+        """
+        self.app_name = app_name
+        self.provider = provider or Win32ComProvider()
+        self.idle_timeout = idle_timeout
+        self.call_timeout = call_timeout
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._running = False
+        # PID -> 接続済みのApplicationオブジェクト
+        self._objects: Dict[int, Any] = {}
+        self._last_access: Dict[int, float] = {}
+        self._busy_since: Optional[float] = None
+        self._busy_deadline: Optional[float] = None
+
+        # 統計情報
+        self.calls = 0
+        self.timeouts = 0
+        self.objects_created = 0
+        self.objects_released = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name=f"com-{self.app_name}", daemon=True
+            )
+            self._thread.start()
+
+    def call(self, func: Callable[[Any], T], pid: int, timeout: Optional[float] = None) -> T:
+        """pid が所有するインスタンスを引数に func をワーカースレッドで実行し、結果を返す
+
+        期限内に終わらなければ ComCallTimeout、実行中のインスタンスが
+        見つからなければ RuntimeError、func の例外はそのまま送出する。
+        """
+        timeout = self.call_timeout if timeout is None else timeout
+        now = time.time()
+
+        # 前の呼び出しが期限を過ぎても終わっていない（アプリがハングしている）
+        # ワーカーが途中で書き換えるため、開始時刻と期限は組でまとめて読む
+        with self._lock:
+            busy_since, busy_deadline = self._busy_since, self._busy_deadline
+        if busy_deadline is not None and now > busy_deadline:
+            self.timeouts += 1
+            raise ComCallTimeout(f"{self.app_name} worker is blocked since {busy_since:.0f}")
+
+        self._ensure_started()
+        self.calls += 1
+        deadline = now + timeout
+        future: Future = Future()
+        self._queue.put((func, pid, deadline, future))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            future.cancel()
+            raise ComCallTimeout(f"{self.app_name} call timed out after {timeout:.1f}s")
+
+    def _run(self) -> None:
+        try:
+            self.provider.initialize()
+        except Exception as e:
+            logging.error(f"COM initialization failed for {self.app_name}: {e}")
+
+        try:
+            while self._running:
+                try:
+                    item = self._queue.get(timeout=self._idle_wait())
+                except queue.Empty:
+                    self._release_if_idle()
+                    continue
+
+                if item is None:
+                    break
+                func, pid, deadline, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue  # 呼び出し側がすでに諦めた
+                if time.time() > deadline:
+                    future.set_exception(ComCallTimeout(f"{self.app_name} call expired in queue"))
+                    continue
+
+                with self._lock:
+                    self._busy_since = time.time()
+                    self._busy_deadline = deadline
+                try:
+                    com_object = self._get_object(pid)
+                    if com_object is None:
+                        raise RuntimeError(f"No running {self.app_name} instance for pid {pid}")
+                    future.set_result(func(com_object))
+                except Exception as e:
+                    # 失敗したオブジェクトは切断されている可能性があるので接続し直す
+                    self._drop_object(pid)
+                    future.set_exception(e)
+                finally:
+                    with self._lock:
+                        self._busy_since = None
+                        self._busy_deadline = None
+                    self._last_access[pid] = time.time()
+                    # 他のPIDへの呼び出しが続いていても、使われなくなったオブジェクトは解放する
+                    self._release_if_idle()
+        finally:
+            for pid in list(self._objects):
+                self._drop_object(pid)
+            try:
+                self.provider.uninitialize()
+            except Exception as e:
+                logging.debug(f"COM uninitialize failed for {self.app_name}: {e}")
+
+    def _get_object(self, pid: int) -> Optional[Any]:
+        """PIDに対応する接続を取得（初回のみレジストリを検索）"""
+        com_object = self._objects.get(pid)
+        if com_object is None:
+            com_object = self.provider.get_object(self.app_name, pid)
+            if com_object is not None:
+                self._objects[pid] = com_object
+                self.objects_created += 1
+        return com_object
+
+    def _idle_wait(self) -> Optional[float]:
+        """最も長く使われていないオブジェクトを解放するまでの秒数（オブジェクトがなければNone）"""
+        if not self._objects:
+            return None
+        oldest = min(self._last_access.get(pid, 0.0) for pid in self._objects)
+        return max(0.0, oldest + self.idle_timeout - time.time())
+
+    def _release_if_idle(self) -> None:
+        """一定時間アクセスがなければCOMオブジェクトを解放"""
+        now = time.time()
+        for pid in list(self._objects):
+            if now - self._last_access.get(pid, 0.0) >= self.idle_timeout:
+                self._drop_object(pid)
+                logging.debug(f"Released idle COM object for {self.app_name} (pid {pid})")
+
+    def _drop_object(self, pid: int) -> None:
+        com_object = self._objects.pop(pid, None)
+        self._last_access.pop(pid, None)
+        if com_object is None:
+            return
+        try:
+            self.provider.release_object(self.app_name, com_object)
+        except Exception as e:
+            logging.error(f"Error releasing COM object: {e}")
+        self.objects_released += 1
+
+    def has_object(self, pid: int) -> bool:
+        return pid in self._objects
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'objects_created': self.objects_created,
+            'objects_released': self.objects_released,
+            'bound_pids': len(self._objects),
+            'busy': self._busy_since is not None
+        }
\ No newline at end of file
@@ -0,0 +1,275 @@
+# document_index.py
+import os
+import re
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+class DocumentLocationIndex:
+    """ファイル名 -> フルパスの対応表（Officeの代替パス解決用）
+
+    検索ルート以下のファイルと、Officeの最近使ったファイル（MRU）から
+    ファイル名の対応表を作成しておき、タイトルからの解決は辞書の参照だけで行う。
+    更新は専用スレッドで行い、前回から更新時刻が変わったディレクトリだけを再走査する。
+    見つからなかった名前は negative_ttl 秒の間は再度の更新依頼を行わない。
+    """
+
+    # Officeの最近使ったファイル（HKCU\Software\Microsoft\Office\<ver>\<app>\User MRU\<id>\File MRU）
+    MRU_APPS = ('Excel', 'Word', 'PowerPoint')
+    MRU_VALUE_PATTERN = re.compile(r'\*(?P<path>.+)$')
+
+    def __init__(self, roots: Optional[List[str]] = None, max_depth: int = 2,
+                 capacity: int = 20000, refresh_interval: float = 300.0,
+                 negative_ttl: float = 60.0, extensions: Optional[Iterable[str]] = None):
+        """
+        Parameters:
+            roots (List[str]): 検索ルート（~ は展開される）
+            max_depth (int): 検索ルートから潜るディレクトリの深さ
+            capacity (int): 対応表に保持する最大ファイル数
+            refresh_interval (float): 差分更新の間隔（秒）
+            negative_ttl (float): 見つからなかった名前を記憶する秒数
+            extensions (Iterable[str]): 対象にする拡張子（Noneならすべて）
+        """
+        self.roots = [os.path.expanduser(root) for root in (roots or [])]
+        self.max_depth = max_depth
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+        self.extensions = frozenset(ext.lower() for ext in extensions) if extensions else None
+
+        # ファイル名（小文字） -> フルパス（MRUは検索ルートより優先）
+        self._by_name: Dict[str, str] = {}
+        self._recent: Dict[str, str] = {}
+        # ディレクトリ -> (更新時刻, 直下の対象ファイル名, 直下のサブディレクトリ)
+        self._dirs: Dict[str, Tuple[float, List[str], List[str]]] = {}
+        self._negative: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.refreshes = 0
+        self.dirs_scanned = 0
+        self.dirs_skipped = 0
+
+    def configure(self, roots: List[str], max_depth: int, capacity: int,
+                  refresh_interval: float, extensions: Optional[Iterable[str]] = None) -> None:
+        """設定値を反映（次回の更新から有効）"""
+        with self._lock:
+            self.roots = [os.path.expanduser(root) for root in roots]
+            self.max_depth = max_depth
+            self.capacity = capacity
+            self.refresh_interval = refresh_interval
+            if extensions is not None:
+                self.extensions = frozenset(ext.lower() for ext in extensions)
+            self._dirs.clear()
+        self._wakeup.set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="document-index", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def lookup(self, name: str, extensions: Iterable[str] = ()) -> Optional[str]:
+        """ファイル名からフルパスを返す（ディスクにはアクセスしない）
+
+        name に拡張子がなければ extensions の各拡張子を付けて探す。
+        見つからなければ更新を依頼し、その名前を一定時間記憶する。
+        """
+        self.start()
+        key = name.strip().lower()
+        if not key:
+            return None
+
+        candidates = [key]
+        if not any(key.endswith(ext.lower()) for ext in extensions):
+            candidates = [key + ext.lower() for ext in extensions] or candidates
+
+        now = time.time()
+        with self._lock:
+            for candidate in candidates:
+                path = self._recent.get(candidate) or self._by_name.get(candidate)
+                if path:
+                    self.hits += 1
+                    return path
+
+            missed_at = self._negative.get(key)
+            if missed_at is not None and now - missed_at < self.negative_ttl:
+                self.negative_hits += 1
+                return None
+            self.misses += 1
+            self._negative[key] = now
+            if len(self._negative) > self.capacity:
+                self._negative.clear()
+
+        # 新しく作成・保存されたファイルの可能性があるので差分更新を依頼
+        self._wakeup.set()
+        return None
+
+    def _run(self) -> None:
+        while self._running:
+            self._wakeup.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f"Document index refresh failed: {e}")
+            self._wakeup.wait(self.refresh_interval)
+
+    def refresh(self) -> None:
+        """MRUと検索ルートを読み込み、変化したディレクトリだけ再走査する"""
+        recent = self._load_recent_files()
+
+        with self._lock:
+            roots = list(self.roots)
+            known_dirs = dict(self._dirs)
+
+        dirs: Dict[str, Tuple[float, List[str], List[str]]] = {}
+        total = 0
+        for root in roots:
+            pending = [(root, 0)]
+            while pending and total < self.capacity:
+                directory, depth = pending.pop()
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+
+                known = known_dirs.get(directory)
+                if known is not None and known[0] == mtime:
+                    # 直下のエントリが変わっていないディレクトリは再利用
+                    self.dirs_skipped += 1
+                    _, files, subdirs = known
+                else:
+                    self.dirs_scanned += 1
+                    files, subdirs = [], []
+                    try:
+                        with os.scandir(directory) as entries:
+                            for entry in entries:
+                                try:
+                                    if entry.is_dir(follow_symlinks=False):
+                                        if not entry.name.startswith('.'):
+                                            subdirs.append(entry.path)
+                                    elif self._is_target(entry.name):
+                                        files.append(entry.name)
+                                except OSError:
+                                    continue
+                    except OSError:
+                        continue
+
+                dirs[directory] = (mtime, files, subdirs)
+                total += len(files)
+                if depth < self.max_depth:
+                    pending.extend((subdir, depth + 1) for subdir in subdirs)
+
+        by_name: Dict[str, str] = {}
+        for directory, (_, files, _) in dirs.items():
+            for file_name in files:
+                # 同名ファイルは最初に見つかったものを使う（MRUがあればそちらが優先）
+                by_name.setdefault(file_name.lower(), os.path.join(directory, file_name))
+
+        with self._lock:
+            self._dirs = dirs
+            self._by_name = by_name
+            self._recent = recent
+            self.refreshes += 1
+
+    def _is_target(self, file_name: str) -> bool:
+        if file_name.startswith('~$'):
+            # Officeの一時ファイル
+            return False
+        if self.extensions is None:
+            return True
+        return os.path.splitext(file_name)[1].lower() in self.extensions
+
+    def _load_recent_files(self) -> Dict[str, str]:
+        """Officeの最近使ったファイル一覧を読み込む（Windows以外では空）"""
+        try:
+            import winreg
+        except ImportError:
+            return {}
+
+        recent: Dict[str, str] = {}
+        base = r"Software\Microsoft\Office"
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, base) as office_key:
+                versions = self._subkeys(winreg, office_key)
+        except OSError:
+            return {}
+
+        for version in versions:
+            for app in self.MRU_APPS:
+                user_mru = f"{base}\\{version}\\{app}\\User MRU"
+                try:
+                    with winreg.OpenKey(winreg.HKEY_CURRENT_USER, user_mru) as mru_key:
+                        identities = self._subkeys(winreg, mru_key)
+                except OSError:
+                    continue
+                for identity in identities:
+                    try:
+                        with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                                            f"{user_mru}\\{identity}\\File MRU") as files_key:
+                            index = 0
+                            while True:
+                                try:
+                                    _, value, _ = winreg.EnumValue(files_key, index)
+                                except OSError:
+                                    break
+                                index += 1
+                                match = self.MRU_VALUE_PATTERN.search(str(value))
+                                if match:
+                                    path = match.group('path')
+                                    recent.setdefault(os.path.basename(path).lower(), path)
+                    except OSError:
+                        continue
+        return recent
+
+    @staticmethod
+    def _subkeys(winreg: Any, key: Any) -> List[str]:
+        names = []
+        index = 0
+        while True:
+            try:
+                names.append(winreg.EnumKey(key, index))
+            except OSError:
+                return names
+            index += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'files': len(self._by_name),
+            'recent_files': len(self._recent),
+            'directories': len(self._dirs),
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'refreshes': self.refreshes,
+            'dirs_scanned': self.dirs_scanned,
+            'dirs_skipped': self.dirs_skipped
+        }
+
+
+# Officeモニターで共有するインスタンス
+_shared_document_index = DocumentLocationIndex(
+    roots=['~/Documents', '~/Desktop', '~/Downloads'],
+    extensions=['.xlsx', '.xls', '.xlsm', '.xlsb', '.csv',
+                '.docx', '.doc', '.docm', '.rtf',
+                '.pptx', '.ppt', '.pptm', '.pdf']
+)
+
+def get_document_index() -> DocumentLocationIndex:
+    """共有ドキュメント位置インデックスを取得"""
+    return _shared_document_index
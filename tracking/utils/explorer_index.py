@@ -0,0 +1,299 @@
+# explorer_index.py
+"""Explorerウィンドウ (hwnd) と表示中のフォルダの対応表
+
+Shell.Windows() を切り替えのたびに走査すると、ウィンドウ・タブの数だけ
+プロセス間のCOM呼び出しが発生する。ここでは専用スレッドが定期的に差分を取り、
+切り替え時の検索は辞書の参照だけで済むようにする。
+"""
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+
+@dataclass
+class FolderEntry:
+    """対応表の1エントリ"""
+    hwnd: int
+    location_url: str   # 変化の検出に使う（取得が安価）
+    path: str           # Document.Folder.Self.Path（変化したときだけ取得）
+    name: str           # LocationName（ウィンドウタイトルとの照合に使う）
+    updated_at: float
+
+
+class ShellWindowSource:
+    """Shellウィンドウの列挙方法（テスト時はFakeShellWindowSourceに差し替える）"""
+
+    def initialize(self) -> None:
+        """インデックススレッドの開始時に呼ばれる"""
+        pass
+
+    def uninitialize(self) -> None:
+        """インデックススレッドの終了時に呼ばれる"""
+        pass
+
+    def windows(self) -> List[Any]:
+        raise NotImplementedError("Subclasses must implement windows()")
+
+    def hwnd(self, window: Any) -> int:
+        return int(window.HWND)
+
+    def location_url(self, window: Any) -> str:
+        return window.LocationURL or ''
+
+    def location_name(self, window: Any) -> str:
+        return window.LocationName or ''
+
+    def folder_path(self, window: Any) -> str:
+        return window.Document.Folder.Self.Path
+
+
+class Win32ShellWindowSource(ShellWindowSource):
+    """Shell.Application によるExplorerウィンドウの列挙"""
+
+    def __init__(self):
+        self._shell = None
+
+    def initialize(self) -> None:
+        import pythoncom
+        pythoncom.CoInitialize()
+
+    def uninitialize(self) -> None:
+        import pythoncom
+        self._shell = None
+        pythoncom.CoUninitialize()
+
+    def windows(self) -> List[Any]:
+        import win32com.client
+        if self._shell is None:
+            # Shell.Applicationはexplorer.exeが提供するため新しいプロセスは起動しない
+            self._shell = win32com.client.Dispatch("Shell.Application")
+        try:
+            return list(self._shell.Windows())
+        except Exception:
+            self._shell = None
+            raise
+
+
+class FakeShellWindowSource(ShellWindowSource):
+    """テスト用のShellウィンドウ一覧
+
+    windows には hwnd, url, name, path 属性を持つオブジェクトを渡す。
+    属性の参照回数を数え、COM呼び出し回数の代わりにする。
+    """
+
+    def __init__(self, windows: Optional[List[Any]] = None):
+        self.entries: List[Any] = list(windows or [])
+        self.calls = 0
+
+    def windows(self) -> List[Any]:
+        self.calls += 1
+        return list(self.entries)
+
+    def hwnd(self, window: Any) -> int:
+        self.calls += 1
+        return window.hwnd
+
+    def location_url(self, window: Any) -> str:
+        self.calls += 1
+        return window.url
+
+    def location_name(self, window: Any) -> str:
+        self.calls += 1
+        return window.name
+
+    def folder_path(self, window: Any) -> str:
+        self.calls += 1
+        return window.path
+
+
+class ExplorerFolderIndex:
+    """hwnd -> 表示中フォルダの対応表を差分更新で保持する
+
+    専用スレッドが refresh_interval ごとに全ウィンドウの hwnd と LocationURL だけを読み、
+    新しいウィンドウやURLが変わったウィンドウについてのみフォルダパスを取得する。
+    閉じられたウィンドウは対応表から削除する。
+    タブ付きExplorerでは複数のタブが同じ hwnd を持つため、hwnd ごとにエントリの
+    リストを保持し、ウィンドウタイトルと一致するものを返す。
+    """
+
+    def __init__(self, source: Optional[ShellWindowSource] = None, refresh_interval: float = 2.0):
+        """
+        Parameters:
+            source (ShellWindowSource): Shellウィンドウの列挙方法（省略時はpywin32）
+            refresh_interval (float): 差分更新の間隔（秒）
+        """
+        self.source = source or Win32ShellWindowSource()
+        self.refresh_interval = refresh_interval
+        self._entries: Dict[int, List[FolderEntry]] = {}
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.refreshes = 0
+        self.paths_resolved = 0
+        self.windows_removed = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="explorer-index", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def lookup(self, hwnd: int, title: Optional[str] = None) -> Optional[str]:
+        """hwnd が表示しているフォルダを返す（対応表の参照のみ）
+
+        title を渡すと、記録済みのフォルダ名がタイトルと一致しない場合は
+        古いエントリとみなして None を返す。
+        """
+        with self._lock:
+            entries = self._entries.get(hwnd)
+            if not entries:
+                self.misses += 1
+                return None
+            entry = self._select(entries, title)
+            if entry is None:
+                self.stale += 1
+                return None
+            self.hits += 1
+            return entry.path
+
+    def resolve(self, hwnd: int, title: Optional[str] = None, timeout: float = 1.0) -> Optional[str]:
+        """対応表を参照し、なければ即座に差分更新を依頼して最大 timeout 秒待つ"""
+        path = self.lookup(hwnd, title)
+        if path is not None:
+            return path
+
+        self.start()
+        deadline = time.time() + timeout
+        with self._lock:
+            generation = self._generation
+        self._wakeup.set()
+        with self._lock:
+            while self._generation == generation:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._refreshed.wait(remaining)
+            entry = self._select(self._entries.get(hwnd, []), title)
+            return entry.path if entry is not None else None
+
+    @classmethod
+    def _select(cls, entries: List[FolderEntry], title: Optional[str]) -> Optional[FolderEntry]:
+        """hwnd のエントリ（タブ）のうちタイトルと一致するものを選ぶ"""
+        if not entries:
+            return None
+        if title is None:
+            return entries[0]
+        for entry in entries:
+            if cls._matches_title(entry, title):
+                return entry
+        return None
+
+    @staticmethod
+    def _matches_title(entry: FolderEntry, title: str) -> bool:
+        """ウィンドウタイトルが記録済みのフォルダを指しているか"""
+        if not entry.name and not entry.path:
+            return True
+        return bool((entry.name and entry.name in title) or (entry.path and entry.path in title))
+
+    def _run(self) -> None:
+        try:
+            self.source.initialize()
+        except Exception as e:
+            logging.error(f"Explorer index initialization failed: {e}")
+
+        try:
+            while self._running:
+                # 更新中に届いた依頼は次の wait で即座に処理される
+                self._wakeup.clear()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.debug(f"Explorer index refresh failed: {e}")
+                self._wakeup.wait(self.refresh_interval)
+        finally:
+            try:
+                self.source.uninitialize()
+            except Exception as e:
+                logging.debug(f"Explorer index uninitialize failed: {e}")
+
+    def refresh(self) -> None:
+        """Shellウィンドウを列挙して対応表を差分更新（インデックススレッドから呼ぶ）"""
+        with self._lock:
+            known = {
+                (entry.hwnd, entry.location_url): entry
+                for entries in self._entries.values() for entry in entries
+            }
+
+        current: Dict[int, List[FolderEntry]] = {}
+        now = time.time()
+        for window in self.source.windows():
+            try:
+                hwnd = self.source.hwnd(window)
+                url = self.source.location_url(window)
+                entry = known.get((hwnd, url))
+                if entry is None:
+                    entry = FolderEntry(
+                        hwnd=hwnd,
+                        location_url=url,
+                        path=self._path_from_url(url) or self.source.folder_path(window),
+                        name=self.source.location_name(window),
+                        updated_at=now
+                    )
+                    self.paths_resolved += 1
+                current.setdefault(hwnd, []).append(entry)
+            except Exception:
+                # 列挙中に閉じられたウィンドウなど
+                continue
+
+        with self._lock:
+            self.windows_removed += len({hwnd for hwnd, _ in known} - set(current))
+            self._entries = current
+            self.refreshes += 1
+            self._generation += 1
+            self._refreshed.notify_all()
+
+    @staticmethod
+    def _path_from_url(url: str) -> Optional[str]:
+        """file:/// 形式のURLからパスを求める（特殊フォルダはNone）"""
+        if not url.lower().startswith('file:'):
+            return None
+        parsed = urlparse(url)
+        path = unquote(parsed.path)
+        if parsed.netloc:
+            # UNCパス (file://server/share)
+            return '\\\\' + parsed.netloc + path.replace('/', '\\')
+        if len(path) >= 3 and path[0] == '/' and path[2] == ':':
+            path = path[1:]
+        return path.replace('/', '\\')
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.stale
+        return {
+            'windows': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'refreshes': self.refreshes,
+            'paths_resolved': self.paths_resolved,
+            'windows_removed': self.windows_removed
+        }
@@ -0,0 +1,156 @@
+# office_attach.py
+"""実行中のOfficeインスタンスへの接続（attachのみ）
+
+Dispatch() はインスタンスが登録されていないと新しいOfficeを起動してしまい、
+複数起動している場合はどのインスタンスに繋がるかも決まらない。
+ここではフォアグラウンドウィンドウのPIDが所有するインスタンスだけを探し、
+見つからなければ None を返す（新しいインスタンスは決して作らない）。
+"""
+import logging
+from typing import Any, Dict, Optional, Tuple, List
+
+
+class RunningObjectRegistry:
+    """実行中のアプリケーションオブジェクトを探すレジストリ"""
+
+    def find_application(self, app_name: str, pid: int) -> Optional[Any]:
+        """app_name のうち pid が所有するApplicationオブジェクトを返す"""
+        raise NotImplementedError("Subclasses must implement find_application()")
+
+
+class StandInRegistry(RunningObjectRegistry):
+    """テスト用のレジストリ（Officeなしで動作確認するための代用品）"""
+
+    def __init__(self, instances: Optional[Dict[Tuple[str, int], Any]] = None):
+        self.instances: Dict[Tuple[str, int], Any] = dict(instances or {})
+        self.lookups = 0
+
+    def register(self, app_name: str, pid: int, application: Any) -> None:
+        self.instances[(app_name, pid)] = application
+
+    def unregister(self, app_name: str, pid: int) -> None:
+        self.instances.pop((app_name, pid), None)
+
+    def find_application(self, app_name: str, pid: int) -> Optional[Any]:
+        self.lookups += 1
+        return self.instances.get((app_name, pid))
+
+
+class Win32RunningObjectRegistry(RunningObjectRegistry):
+    """Windows上の実行中インスタンスを探す
+
+    1. PIDのドキュメントウィンドウからネイティブオブジェクトモデルを取得
+       (WM_GETOBJECT / OBJID_NATIVEOM)
+    2. 見つからなければRunning Object Tableを走査し、所有PIDが一致するものを選ぶ
+    """
+
+    WM_GETOBJECT = 0x003D
+    OBJID_NATIVEOM = 0xFFFFFFF0
+
+    # ネイティブオブジェクトモデルを公開するドキュメントウィンドウのクラス名
+    DOCUMENT_WINDOW_CLASSES = {
+        'Excel.Application': ['EXCEL7'],
+        'Word.Application': ['_WwG'],
+        'PowerPoint.Application': ['mdiClass', 'paneClassDC']
+    }
+
+    def find_application(self, app_name: str, pid: int) -> Optional[Any]:
+        application = self._from_native_object_model(app_name, pid)
+        if application is None:
+            application = self._from_running_object_table(pid)
+        return application
+
+    def _top_level_windows(self, pid: int) -> List[int]:
+        import win32gui
+        import win32process
+
+        windows = []
+
+        def collect(hwnd, _):
+            if win32process.GetWindowThreadProcessId(hwnd)[1] == pid:
+                windows.append(hwnd)
+            return True
+
+        win32gui.EnumWindows(collect, None)
+        return windows
+
+    def _find_child(self, parent: int, class_names: List[str]) -> Optional[int]:
+        import win32gui
+
+        found = []
+
+        def collect(hwnd, _):
+            if win32gui.GetClassName(hwnd) in class_names:
+                found.append(hwnd)
+                return False
+            return True
+
+        try:
+            win32gui.EnumChildWindows(parent, collect, None)
+        except Exception:
+            # コールバックでFalseを返すと列挙中断のため例外になる場合がある
+            pass
+        return found[0] if found else None
+
+    def _from_native_object_model(self, app_name: str, pid: int) -> Optional[Any]:
+        import win32con
+        import win32gui
+        import pythoncom
+        import win32com.client
+
+        class_names = self.DOCUMENT_WINDOW_CLASSES.get(app_name, [])
+        if not class_names:
+            return None
+
+        for top_level in self._top_level_windows(pid):
+            child = self._find_child(top_level, class_names)
+            if child is None:
+                continue
+            try:
+                _, lresult = win32gui.SendMessageTimeout(
+                    child, self.WM_GETOBJECT, 0, self.OBJID_NATIVEOM,
+                    win32con.SMTO_ABORTIFHUNG, 1000
+                )
+                if not lresult:
+                    continue
+                native = pythoncom.ObjectFromLresult(lresult, pythoncom.IID_IDispatch, 0)
+                return win32com.client.Dispatch(native).Application
+            except Exception as e:
+                logging.debug(f"Native object model lookup failed for {app_name} pid {pid}: {e}")
+        return None
+
+    def _from_running_object_table(self, pid: int) -> Optional[Any]:
+        import pythoncom
+        import win32com.client
+
+        try:
+            rot = pythoncom.GetRunningObjectTable()
+        except Exception as e:
+            logging.debug(f"Running Object Table unavailable: {e}")
+            return None
+
+        for moniker in rot.EnumRunning():
+            try:
+                unknown = rot.GetObject(moniker)
+                document = win32com.client.Dispatch(unknown.QueryInterface(pythoncom.IID_IDispatch))
+                application = document.Application
+                if self._application_pid(application) == pid:
+                    return application
+            except Exception:
+                continue
+        return None
+
+    def _application_pid(self, application: Any) -> Optional[int]:
+        """Applicationオブジェクトのメインウィンドウから所有PIDを求める"""
+        import win32process
+
+        for getter in (lambda: application.Hwnd,
+                       lambda: application.HWND,
+                       lambda: application.ActiveWindow.Hwnd):
+            try:
+                hwnd = int(getter())
+                if hwnd:
+                    return win32process.GetWindowThreadProcessId(hwnd)[1]
+            except Exception:
+                continue
+        return None
\ No newline at end of file
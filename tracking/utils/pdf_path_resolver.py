@@ -0,0 +1,163 @@
+# pdf_path_resolver.py
+import os
+import re
+import logging
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple, Any, Iterable
+from .document_index import get_document_index
+from .process_cache import get_process_cache
+
+class PdfPathResolver:
+    """PDFウィンドウのファイルパスを (pid, タイトル) 単位で解決・記憶する
+
+    解決処理は専用のワーカースレッドで実行し、呼び出し側は期限までしか待たない。
+    期限を過ぎた処理もそのまま続行し、結果は次回以降のためにメモに残す。
+    解決できなかった結果は negative_ttl 秒だけ記憶し、その後は解決し直す
+    （ドキュメントのインデックスの初回の走査が終わる前に探したPDFも後で見つかるように）。
+    コマンドラインや開いているファイルの調査は専用のPDFリーダーに限定し、
+    ハンドルを大量に持つブラウザでは行わない。
+    """
+
+    # 一般的なパターン: "ファイル名.pdf - リーダー名" または "リーダー名 - ファイル名.pdf"
+    TITLE_PATTERNS = (
+        re.compile(r'(.*\.pdf)[\s]*[-–—]', re.IGNORECASE),  # ファイル名.pdf - リーダー名
+        re.compile(r'[-–—][\s]*(.*\.pdf)', re.IGNORECASE),  # リーダー名 - ファイル名.pdf
+        re.compile(r'(.*\.pdf)', re.IGNORECASE)             # 単にファイル名.pdf
+    )
+
+    def __init__(self, reader_processes: Iterable[str], capacity: int = 256,
+                 negative_ttl: Optional[float] = None):
+        """
+        Parameters:
+            reader_processes (Iterable[str]): コマンドライン等を調べてよいプロセス名（小文字）
+            capacity (int): 記憶する (pid, タイトル) の最大数
+            negative_ttl (float): 解決できなかった結果を記憶する秒数（省略時はインデックスと同じ）
+        """
+        self.reader_processes = frozenset(reader_processes)
+        self.capacity = capacity
+        self.negative_ttl = negative_ttl
+        # (pid, タイトル) -> (パス, 記憶した時刻)
+        self._memo: "OrderedDict[Tuple[int, str], Tuple[Optional[str], float]]" = OrderedDict()
+        self._pending: Dict[Tuple[int, str], Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-resolver")
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.expired = 0
+
+    def _negative_ttl(self) -> float:
+        if self.negative_ttl is not None:
+            return self.negative_ttl
+        return get_document_index().negative_ttl
+
+    def resolve(self, pid: int, title: str, process_name: str, timeout: float) -> Optional[str]:
+        """PDFのパスを返す（期限内に解決できなければNone）"""
+        key = (pid, title)
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                path, stored_at = entry
+                if path is not None or time.monotonic() - stored_at < self._negative_ttl():
+                    self._memo.move_to_end(key)
+                    self.hits += 1
+                    return path
+                # 期限切れの「見つからなかった」結果は解決し直す
+                del self._memo[key]
+                self.expired += 1
+            self.misses += 1
+            # 同じウィンドウの解決がすでに進行中ならそれを待つ
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._resolve_and_store, key, process_name)
+                self._pending[key] = future
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            logging.debug(f"PDF path resolution timed out for pid {pid}")
+            return None
+
+    def _resolve_and_store(self, key: Tuple[int, str], process_name: str) -> Optional[str]:
+        pid, title = key
+        path = None
+        try:
+            path = self._extract_pdf_path(pid, title, process_name)
+        except Exception as e:
+            logging.debug(f"PDF path resolution failed for pid {pid}: {e}")
+        with self._lock:
+            self._pending.pop(key, None)
+            self._memo[key] = (path, time.monotonic())
+            while len(self._memo) > self.capacity:
+                self._memo.popitem(last=False)
+        return path
+
+    def _extract_pdf_path(self, pid: int, title: str, process_name: str) -> Optional[str]:
+        """PDFのファイルパスを抽出する試み
+
+        1. ウィンドウタイトルのファイル名をインデックスとリーダーの作業ディレクトリで探す
+        2. プロセスのコマンドライン引数（PDFリーダーのみ）
+        3. 開いているファイルの検査（PDFリーダーのみ）
+        """
+        is_reader = process_name in self.reader_processes
+
+        # 方法1: タイトルから抽出
+        for pattern in self.TITLE_PATTERNS:
+            match = pattern.search(title)
+            if not match:
+                continue
+            pdf_name = match.group(1).strip()
+            path = get_document_index().lookup(os.path.basename(pdf_name), ['.pdf'])
+            if path:
+                return path
+            # ファイル名だけの場合はリーダーの作業ディレクトリから探す
+            if is_reader:
+                cwd = get_process_cache().get_cwd(pid)
+                if cwd:
+                    potential_path = os.path.join(cwd, pdf_name)
+                    if os.path.exists(potential_path):
+                        return potential_path
+
+        if not is_reader:
+            return None
+
+        process = get_process_cache().get_handle(pid)
+        if process is None:
+            return None
+
+        # 方法2: コマンドライン引数から抽出
+        try:
+            for arg in process.cmdline():
+                if arg.lower().endswith('.pdf') and os.path.exists(arg):
+                    return arg
+        except Exception:
+            pass
+
+        # 方法3: 開いているファイルを調査
+        try:
+            for file in process.open_files():
+                if file.path.lower().endswith('.pdf'):
+                    return file.path
+        except Exception:
+            pass
+
+        return None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'memo_size': len(self._memo),
+            'pending': len(self._pending),
+            'hits': self.hits,
+            'misses': self.misses,
+            'timeouts': self.timeouts,
+            'expired': self.expired
+        }
@@ -0,0 +1,259 @@
+# process_cache.py
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Set, Tuple, Any
+import psutil
+
+@dataclass
+class ProcessInfo:
+    """キャッシュされるプロセス情報"""
+    pid: int
+    create_time: float
+    name: str
+    exe: str
+    cwd: Optional[str] = None  # 必要になったときに取得
+    handle: Optional[psutil.Process] = field(default=None, repr=False, compare=False)
+    # このプロセスのものと確認済みのウィンドウハンドル
+    hwnds: Set[int] = field(default_factory=set, repr=False, compare=False)
+
+    @property
+    def key(self) -> Tuple[int, float]:
+        return (self.pid, self.create_time)
+
+
+class ProcessInfoCache:
+    """全モニターで共有するプロセス情報キャッシュ
+
+    エントリは (pid, create_time) をキーに保持するため、PIDが再利用された
+    場合は一括更新時に別プロセスとして検出される。一括更新までの間も、
+    まだ確認していないウィンドウのPIDとして参照されたときは create_time を
+    1回だけ取得して比べる（同じウィンドウの参照ではOSを呼ばない）。
+    容量を超えると最も長く参照されていないエントリから削除する（LRU）。
+    """
+
+    SWEEP_ATTRS = ['pid', 'name', 'exe', 'create_time']
+    # エントリごとに覚えておくウィンドウハンドルの数
+    MAX_HWNDS = 64
+
+    def __init__(self, capacity: int = 256, refresh_interval: float = 30.0):
+        """
+        Parameters:
+            capacity (int): キャッシュの最大エントリ数
+            refresh_interval (float): process_iterによる一括更新の間隔（秒）
+        """
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self._entries: "OrderedDict[Tuple[int, float], ProcessInfo]" = OrderedDict()
+        self._pid_index: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.syscalls = 0
+        self.reused_pids = 0
+        self.sweeps = 0
+
+    def configure(self, capacity: int, refresh_interval: float) -> None:
+        """設定値を反映"""
+        with self._lock:
+            self.capacity = capacity
+            self.refresh_interval = refresh_interval
+            self._evict_if_needed()
+
+    def get(self, pid: int, hwnd: Optional[int] = None) -> Optional[ProcessInfo]:
+        """PIDに対応するプロセス情報を取得（キャッシュにない場合のみpsutilを呼ぶ）
+
+        hwnd を渡すと、そのウィンドウで初めて参照されたエントリはPIDが
+        再利用されていないか create_time で確認する。
+        """
+        self._refresh_in_background_if_due()
+
+        with self._lock:
+            key = self._pid_index.get(pid)
+            info = self._entries.get(key) if key is not None else None
+        if info is not None and (hwnd is None or hwnd in info.hwnds or self._is_same_process(info)):
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                if hwnd is not None and hwnd not in info.hwnds:
+                    if len(info.hwnds) >= self.MAX_HWNDS:
+                        info.hwnds.clear()
+                    info.hwnds.add(hwnd)
+                self.hits += 1
+            return info
+
+        with self._lock:
+            self.misses += 1
+        info = self._load(pid)
+        with self._lock:
+            if info is not None:
+                if hwnd is not None:
+                    info.hwnds.add(hwnd)
+                self._store(info)
+            elif key is not None:
+                # 確認したプロセスはすでに終了している
+                self._remove(key)
+        return info
+
+    def _is_same_process(self, info: ProcessInfo) -> bool:
+        """PIDがまだ info のプロセスのものか（create_time を1回だけ取得して比べる）"""
+        self.syscalls += 1
+        try:
+            return self._create_time(info.pid) == info.create_time
+        except psutil.Error:
+            return False
+
+    @staticmethod
+    def _create_time(pid: int) -> float:
+        return psutil.Process(pid).create_time()
+
+    def get_cwd(self, pid: int) -> str:
+        """プロセスの作業ディレクトリ（初回のみ取得してキャッシュ）"""
+        info = self.get(pid)
+        if info is None:
+            return ''
+        if info.cwd is None:
+            try:
+                self.syscalls += 1
+                info.cwd = self.get_handle(pid).cwd() or ''
+            except Exception:
+                info.cwd = ''
+        return info.cwd
+
+    def get_handle(self, pid: int) -> Optional[psutil.Process]:
+        """psutil.Processオブジェクトを取得（open_filesなどの追加調査用）"""
+        info = self.get(pid)
+        if info is None:
+            return None
+        if info.handle is None:
+            try:
+                self.syscalls += 1
+                info.handle = psutil.Process(pid)
+            except psutil.Error:
+                return None
+        return info.handle
+
+    def _load(self, pid: int) -> Optional[ProcessInfo]:
+        """単一プロセスの情報をpsutilから取得"""
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                self.syscalls += 2
+                create_time = process.create_time()
+                name = process.name()
+                exe = ''
+                try:
+                    self.syscalls += 1
+                    exe = process.exe()
+                except (psutil.AccessDenied, psutil.ZombieProcess):
+                    pass
+            return ProcessInfo(pid=pid, create_time=create_time, name=name, exe=exe, handle=process)
+        except psutil.Error as e:
+            logging.debug(f"Process lookup failed for pid {pid}: {e}")
+            return None
+
+    def _store(self, info: ProcessInfo) -> None:
+        old_key = self._pid_index.get(info.pid)
+        if old_key is not None and old_key != info.key:
+            # PIDが別のプロセスに再利用された
+            self._entries.pop(old_key, None)
+            self.reused_pids += 1
+        self._entries[info.key] = info
+        self._entries.move_to_end(info.key)
+        self._pid_index[info.pid] = info.key
+        self._evict_if_needed()
+
+    def _remove(self, key: Tuple[int, float]) -> None:
+        self._entries.pop(key, None)
+        if self._pid_index.get(key[0]) == key:
+            del self._pid_index[key[0]]
+
+    def _evict_if_needed(self) -> None:
+        while len(self._entries) > self.capacity:
+            key, _ = self._entries.popitem(last=False)
+            if self._pid_index.get(key[0]) == key:
+                del self._pid_index[key[0]]
+
+    def _refresh_in_background_if_due(self) -> None:
+        if time.time() - self._last_refresh < self.refresh_interval:
+            return
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._last_refresh = time.time()
+        self._refresh_thread = threading.Thread(target=self.refresh, daemon=True)
+        self._refresh_thread.start()
+
+    def refresh(self) -> None:
+        """process_iterの1回の走査でキャッシュ全体を検証・更新する
+
+        - 終了したプロセスのエントリを削除
+        - create_timeが変わったPID（再利用）を置き換え
+        - 空き容量があれば未登録のプロセスを事前登録
+        """
+        try:
+            seen: Dict[int, ProcessInfo] = {}
+            for proc in psutil.process_iter(attrs=self.SWEEP_ATTRS):
+                attrs = proc.info
+                if attrs.get('create_time') is None:
+                    continue
+                seen[attrs['pid']] = ProcessInfo(
+                    pid=attrs['pid'],
+                    create_time=attrs['create_time'],
+                    name=attrs.get('name') or '',
+                    exe=attrs.get('exe') or ''
+                )
+        except Exception as e:
+            logging.warning(f"Process sweep failed: {e}")
+            return
+
+        with self._lock:
+            for key in list(self._entries.keys()):
+                current = seen.get(key[0])
+                if current is None or current.create_time != key[1]:
+                    del self._entries[key]
+                    if self._pid_index.get(key[0]) == key:
+                        del self._pid_index[key[0]]
+                    if current is not None:
+                        self.reused_pids += 1
+
+            for pid, info in seen.items():
+                if len(self._entries) >= self.capacity:
+                    break
+                if info.key not in self._entries:
+                    # 事前登録は古い側に置き、実際に使われているエントリを優先して残す
+                    self._entries[info.key] = info
+                    self._entries.move_to_end(info.key, last=False)
+                    self._pid_index[pid] = info.key
+
+            self._last_refresh = time.time()
+            self.sweeps += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pid_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'syscalls': self.syscalls,
+            'reused_pids': self.reused_pids,
+            'sweeps': self.sweeps
+        }
+
+
+# 全モニターで共有するインスタンス
+_shared_process_cache = ProcessInfoCache()
+
+def get_process_cache() -> ProcessInfoCache:
+    """共有プロセス情報キャッシュを取得"""
+    return _shared_process_cache
\ No newline at end of file
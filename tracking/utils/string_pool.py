@@ -0,0 +1,91 @@
+# string_pool.py
+import sys
+import time
+import threading
+from datetime import date
+from typing import Dict, Optional, Any
+
+class StringPool:
+    """WindowInfoで繰り返し現れる文字列を共有するためのインターンテーブル
+
+    プロセス名・実行ファイルのパス・ウィンドウタイトルなどは1日の間に何千回も
+    同じ値が現れるため、同じ値の文字列オブジェクトを1つだけ保持して共有する。
+    容量に達した後の新しい値は登録せずにそのまま返し、日付が変わったら空にする。
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Parameters:
+            capacity (int): 保持する文字列の最大数
+        """
+        self.capacity = capacity
+        self._strings: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._day = date.today()
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.bytes_shared = 0
+
+    def configure(self, capacity: int) -> None:
+        with self._lock:
+            self.capacity = capacity
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        """value と等しい共有オブジェクトを返す（初出なら登録する）"""
+        if not value:
+            return value
+        shared = self._strings.get(value)
+        if shared is not None:
+            self.hits += 1
+            if shared is not value:
+                self.bytes_shared += sys.getsizeof(value)
+            return shared
+        with self._lock:
+            shared = self._strings.get(value)
+            if shared is not None:
+                return shared
+            if len(self._strings) >= self.capacity:
+                self.rejected += 1
+                return value
+            self._strings[value] = value
+            self.misses += 1
+            return value
+
+    def clear_if_new_day(self, now: Optional[float] = None) -> bool:
+        """日付が変わっていればテーブルを空にする"""
+        today = date.fromtimestamp(now if now is not None else time.time())
+        if today == self._day:
+            return False
+        with self._lock:
+            self._strings.clear()
+            self._day = today
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._strings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.rejected
+        return {
+            'size': len(self._strings),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'rejected': self.rejected,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            # 共有によって重複せずに済んだ文字列の合計サイズ（概算）
+            'bytes_shared': self.bytes_shared,
+            'bytes_held': sum(sys.getsizeof(s) for s in list(self._strings))
+        }
+
+
+# キャプチャ処理とメモリ上の履歴で共有するインスタンス
+_shared_string_pool = StringPool()
+
+def get_string_pool() -> StringPool:
+    """共有文字列プールを取得"""
+    return _shared_string_pool